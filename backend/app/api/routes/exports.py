@@ -0,0 +1,123 @@
+"""
+Inspection report export endpoints.
+
+POST an export request to get (or start rendering) the report for the
+inspection's current state; poll GET /exports/{id} until it is completed,
+then download it. Unchanged inspections are served from the stored export.
+"""
+import os
+from datetime import timedelta
+from typing import Literal
+from uuid import UUID
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response
+from fastapi.responses import FileResponse, RedirectResponse
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from app.core.auth import get_org_id
+from app.core.database import get_db
+from app.models.report_export import ReportExport
+from app.repositories.inspection_repository import InspectionRepository
+from app.repositories.report_export_repository import ReportExportRepository
+from app.services.report_export import CONTENT_TYPES, export_version
+from app.services.storage_service import generate_presigned_url
+from app.workers.report_exporter import render_export_background
+
+router = APIRouter(tags=["exports"])
+
+# A queued/running export older than this is assumed lost and re-dispatched
+EXPORT_STALE_SECONDS = int(os.getenv("EXPORT_STALE_SECONDS", "600"))
+
+
+class ExportCreateBody(BaseModel):
+    format: Literal["pdf", "csv", "jsonl"]
+
+
+def _export_response(export: ReportExport) -> dict:
+    completed = export.status == "completed"
+    return {
+        "id": str(export.id),
+        "inspection_id": str(export.inspection_id),
+        "format": export.format,
+        "version": export.version,
+        "status": export.status,
+        "file_size": export.file_size,
+        "error_message": export.error_message,
+        "download_url": f"/exports/{export.id}/download" if completed else None,
+        "created_at": export.created_at.isoformat() if export.created_at else None,
+        "completed_at": export.completed_at.isoformat() if export.completed_at else None,
+    }
+
+
+@router.post("/inspections/{inspection_id}/exports")
+def create_export(
+    inspection_id: UUID,
+    body: ExportCreateBody,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    org_id: UUID = Depends(get_org_id),
+):
+    """
+    Request an export of the inspection's current state. Returns 200 with the
+    cached export if it is already rendered, else 202 while it renders.
+    """
+    inspection = InspectionRepository(db).get_by_id(inspection_id, org_id=org_id)
+    if not inspection:
+        raise HTTPException(status_code=404, detail="Inspection not found")
+
+    repo = ReportExportRepository(db)
+    version = export_version(db, inspection, body.format)
+    export, created = repo.get_or_create(inspection_id, org_id, body.format, version)
+    if not created:
+        if export.status == "failed":
+            retried = repo.requeue_failed(export.id)
+        elif export.status in ("queued", "running"):
+            retried = repo.requeue_stale(export.id, timedelta(seconds=EXPORT_STALE_SECONDS))
+        else:
+            retried = None
+        if retried is not None:
+            export, created = retried, True
+    if created:
+        background_tasks.add_task(render_export_background, str(export.id))
+
+    if export.status != "completed":
+        response.status_code = 202
+    return _export_response(export)
+
+
+@router.get("/exports/{export_id}")
+def get_export(
+    export_id: UUID,
+    db: Session = Depends(get_db),
+    org_id: UUID = Depends(get_org_id),
+):
+    """Export status; download_url is set once it is completed."""
+    export = ReportExportRepository(db).get_by_id(export_id, org_id=org_id)
+    if not export:
+        raise HTTPException(status_code=404, detail="Export not found")
+    return _export_response(export)
+
+
+@router.get("/exports/{export_id}/download")
+def download_export(
+    export_id: UUID,
+    db: Session = Depends(get_db),
+    org_id: UUID = Depends(get_org_id),
+):
+    """Redirect to a presigned URL (object storage) or send the file (local storage)."""
+    export = ReportExportRepository(db).get_by_id(export_id, org_id=org_id)
+    if not export:
+        raise HTTPException(status_code=404, detail="Export not found")
+    if export.status != "completed" or not export.storage_key:
+        raise HTTPException(status_code=409, detail=f"Export is {export.status}")
+
+    url = generate_presigned_url(export.storage_key)
+    if url.startswith(("http://", "https://")):
+        return RedirectResponse(url, status_code=307)
+    return FileResponse(
+        url,
+        media_type=CONTENT_TYPES[export.format],
+        filename=f"inspection-{export.inspection_id}.{export.format}",
+    )
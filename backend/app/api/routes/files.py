@@ -1,47 +1,77 @@
 """
 File upload and metadata endpoints.
 """
+import asyncio
+import logging
 import mimetypes
+import os
+import time
+from datetime import datetime, timedelta, timezone
 from uuid import UUID
-from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, UploadFile
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
 from app.core.auth import get_org_id
-from app.services.storage_service import upload_file as storage_upload, generate_presigned_url
+from app.core.metrics import UPLOAD_THROUGHPUT_MB_S
+from app.services.storage_service import (
+    blob_key,
+    content_digest,
+    delete_file as storage_delete,
+    store_blob,
+    generate_presigned_upload,
+    generate_presigned_url,
+    object_size,
+    storage_url,
+)
 from app.repositories.inspection_repository import InspectionRepository
 from app.repositories.file_repository import FileRepository
-from app.workers.file_processor import process_file_background
+from app.repositories.direct_upload_repository import DirectUploadRepository
+from app.services.upload_service import (
+    MAX_SIZE,
+    acquire_blobs,
+    discard_blobs,
+    enqueue_jobs,
+    file_type_from_mime,
+    is_allowed,
+    register_files,
+)
+from app.workers.cleanup import collect_blobs
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["files"])
 
-ALLOWED_IMAGE = {"image/jpeg", "image/png", "image/jpg"}
-ALLOWED_AUDIO = {"audio/mpeg", "audio/mp3", "audio/m4a", "audio/x-m4a", "audio/wav"}
-ALLOWED_PDF = {"application/pdf"}
-ALLOWED = ALLOWED_IMAGE | ALLOWED_AUDIO | ALLOWED_PDF
-MAX_SIZE = 50 * 1024 * 1024  # 50MB
-
-
-def _file_type_from_mime(mime: str | None, filename: str) -> str:
-    if mime in ALLOWED_IMAGE:
-        return "image"
-    if mime in ALLOWED_AUDIO:
-        return "audio"
-    if mime in ALLOWED_PDF:
-        return "pdf"
-    if filename and filename.lower().endswith((".jpg", ".jpeg", ".png")):
-        return "image"
-    if filename and filename.lower().endswith((".mp3", ".m4a", ".wav")):
-        return "audio"
-    if filename and filename.lower().endswith(".pdf"):
-        return "pdf"
-    return "other"
+# Max storage writes in flight per upload request
+UPLOAD_CONCURRENCY = int(os.getenv("UPLOAD_CONCURRENCY", "8"))
+# How long a presigned key stays registrable; unregistered keys are then swept with their objects
+DIRECT_UPLOAD_TTL_SECONDS = int(os.getenv("DIRECT_UPLOAD_TTL_SECONDS", "86400"))
+
+
+class PresignFileBody(BaseModel):
+    file_name: str
+    file_size: int
+    mime_type: str | None = None
+
+
+class PresignBody(BaseModel):
+    files: list[PresignFileBody]
+
+
+class RegisterFileBody(BaseModel):
+    file_name: str
+    storage_key: str
+    mime_type: str | None = None
+
+
+class RegisterBody(BaseModel):
+    files: list[RegisterFileBody]
 
 
 @router.post("/inspections/{inspection_id}/files")
 async def upload_files(
     inspection_id: UUID,
-    background_tasks: BackgroundTasks,
     files: list[UploadFile] = File(...),
     db: Session = Depends(get_db),
     org_id: UUID = Depends(get_org_id),
@@ -50,14 +80,12 @@ async def upload_files(
     if not files:
         raise HTTPException(status_code=400, detail="No files provided")
     insp_repo = InspectionRepository(db)
-    file_repo = FileRepository(db)
     inspection = insp_repo.get_by_id(inspection_id, org_id=org_id)
     if not inspection:
         raise HTTPException(status_code=404, detail="Inspection not found")
 
-    org_str = str(org_id)
-    insp_str = str(inspection_id)
-    created = []
+    # Validate everything up front so a bad file doesn't leave a partial upload behind
+    file_types: list[tuple[str | None, str]] = []
     for upload in files:
         if upload.size and upload.size > MAX_SIZE:
             raise HTTPException(
@@ -65,27 +93,211 @@ async def upload_files(
                 detail=f"File {upload.filename} exceeds 50MB limit",
             )
         mime = upload.content_type or mimetypes.guess_type(upload.filename or "")[0]
-        if mime not in ALLOWED and _file_type_from_mime(mime, upload.filename or "") == "other":
+        if not is_allowed(mime, upload.filename or ""):
             raise HTTPException(
                 status_code=400,
                 detail=f"File type not allowed: {upload.filename}. Use image, audio, or PDF.",
             )
-        key, url = await storage_upload(upload, org_str, insp_str)
-        file_type = _file_type_from_mime(mime, upload.filename or "")
-        rec = file_repo.create(
-            inspection_id=inspection_id,
-            file_type=file_type,
-            file_name=upload.filename or "file",
-            storage_url=url,
-            storage_key=key,
-            file_size=upload.size,
-            mime_type=mime,
+        file_types.append((mime, file_type_from_mime(mime, upload.filename or "")))
+
+    start = time.perf_counter()
+
+    # Hashing and storage writes run concurrently, bounded by UPLOAD_CONCURRENCY
+    semaphore = asyncio.Semaphore(UPLOAD_CONCURRENCY)
+
+    async def _digest(upload: UploadFile) -> tuple[str, int]:
+        async with semaphore:
+            return await content_digest(upload.file)
+
+    async def _store(sha: str, upload: UploadFile) -> str:
+        async with semaphore:
+            await store_blob(sha, upload.file, upload.content_type)
+            return sha
+
+    digests = await asyncio.gather(*(_digest(upload) for upload in files))
+    for upload, (_sha, size) in zip(files, digests):
+        if size > MAX_SIZE:
+            raise HTTPException(status_code=400, detail=f"File {upload.filename} exceeds 50MB limit")
+
+    # Blob references, files rows and processing jobs go in one transaction.
+    # Content already in the blob store is only referenced, never rewritten.
+    written: list[str] = []
+    try:
+        new_shas = acquire_blobs(
+            db, [(sha, size, mime) for (sha, size), (mime, _type) in zip(digests, file_types)]
+        )
+        to_write = {}
+        for upload, (sha, _size) in zip(files, digests):
+            if sha in new_shas:
+                to_write.setdefault(sha, upload)
+        results = await asyncio.gather(
+            *(_store(sha, upload) for sha, upload in to_write.items()), return_exceptions=True
         )
-        background_tasks.add_task(process_file_background, str(rec.id), file_type, insp_str)
-        created.append({"id": str(rec.id), "file_name": rec.file_name, "status": rec.status})
+        written = [r for r in results if not isinstance(r, BaseException)]
+        failures = [r for r in results if isinstance(r, BaseException)]
+        if failures:
+            raise failures[0]
+
+        created, dispatch = register_files(
+            db,
+            inspection_id,
+            org_id,
+            [
+                {
+                    "file_type": file_type,
+                    "file_name": upload.filename or "file",
+                    "storage_url": storage_url(blob_key(sha)),
+                    "storage_key": blob_key(sha),
+                    "content_sha256": sha,
+                    "file_size": size,
+                    "mime_type": mime,
+                }
+                for upload, (sha, size), (mime, file_type) in zip(files, digests, file_types)
+            ],
+        )
+        db.commit()
+    except Exception as exc:
+        await discard_blobs(written)
+        db.rollback()
+        logger.error("Upload failed for inspection %s: %s", inspection_id, exc)
+        raise HTTPException(status_code=500, detail="Failed to store uploaded files") from exc
+    enqueue_jobs(inspection_id, org_id, dispatch)
+
+    elapsed = time.perf_counter() - start
+    total_mb = sum(size for _sha, size in digests) / (1024 * 1024)
+    if elapsed > 0:
+        UPLOAD_THROUGHPUT_MB_S.observe(total_mb / elapsed)
+    logger.info(
+        "Uploaded %d file(s) (%d new blobs), %.1f MB in %.2fs (%.1f MB/s) for inspection %s",
+        len(files), len(written), total_mb, elapsed, total_mb / elapsed if elapsed > 0 else 0.0, inspection_id,
+    )
     return {"files": created}
 
 
+@router.post("/inspections/{inspection_id}/files/presign")
+def presign_uploads(
+    inspection_id: UUID,
+    body: PresignBody,
+    db: Session = Depends(get_db),
+    org_id: UUID = Depends(get_org_id),
+):
+    """
+    Issue presigned PUT URLs so clients upload straight to object storage.
+    PUT each file to its upload_url (with the same Content-Type), then call /files/register.
+    """
+    if not body.files:
+        raise HTTPException(status_code=400, detail="No files provided")
+    inspection = InspectionRepository(db).get_by_id(inspection_id, org_id=org_id)
+    if not inspection:
+        raise HTTPException(status_code=404, detail="Inspection not found")
+    for f in body.files:
+        if f.file_size > MAX_SIZE:
+            raise HTTPException(status_code=400, detail=f"File {f.file_name} exceeds 50MB limit")
+        if not is_allowed(f.mime_type, f.file_name):
+            raise HTTPException(
+                status_code=400,
+                detail=f"File type not allowed: {f.file_name}. Use image, audio, or PDF.",
+            )
+
+    uploads = []
+    issued = []
+    expires_at = datetime.now(timezone.utc) + timedelta(seconds=DIRECT_UPLOAD_TTL_SECONDS)
+    for f in body.files:
+        presigned = generate_presigned_upload(str(org_id), str(inspection_id), f.file_name, f.mime_type)
+        if presigned is None:
+            raise HTTPException(status_code=501, detail="Direct uploads require the S3 storage backend")
+        key, url = presigned
+        uploads.append({
+            "file_name": f.file_name,
+            "storage_key": key,
+            "upload_url": url,
+            "headers": {"Content-Type": f.mime_type} if f.mime_type else {},
+        })
+        issued.append({
+            "storage_key": key,
+            "org_id": org_id,
+            "inspection_id": inspection_id,
+            "file_name": f.file_name,
+            "mime_type": f.mime_type,
+            "expires_at": expires_at,
+        })
+    # Only keys recorded here can be registered
+    DirectUploadRepository(db).create_many(issued)
+    return {"uploads": uploads}
+
+
+@router.post("/inspections/{inspection_id}/files/register")
+async def register_uploads(
+    inspection_id: UUID,
+    body: RegisterBody,
+    db: Session = Depends(get_db),
+    org_id: UUID = Depends(get_org_id),
+):
+    """
+    Record files that were uploaded directly to storage and queue them for processing.
+    Only keys issued by /files/presign are accepted, with the name and type given there.
+    Registering a key again returns the file it already created.
+    """
+    if not body.files:
+        raise HTTPException(status_code=400, detail="No files provided")
+    inspection = InspectionRepository(db).get_by_id(inspection_id, org_id=org_id)
+    if not inspection:
+        raise HTTPException(status_code=404, detail="Inspection not found")
+
+    keys = list(dict.fromkeys(f.storage_key for f in body.files))
+    names = {f.storage_key: f.file_name for f in body.files}
+    uploads_repo = DirectUploadRepository(db)
+    # Held until commit, so concurrent registrations of a key wait for the first one
+    issued = uploads_repo.lock_many(org_id, inspection_id, keys)
+    now = datetime.now(timezone.utc)
+    for key in keys:
+        upload = issued.get(key)
+        if upload is None:
+            raise HTTPException(status_code=400, detail=f"Invalid storage key for {names[key]}")
+        if upload.file_id is None and upload.expires_at <= now:
+            raise HTTPException(status_code=410, detail=f"Upload of {upload.file_name} expired; presign it again")
+    pending = [issued[key] for key in keys if issued[key].file_id is None]
+
+    # Sizes come from storage, not the client, and prove the upload happened
+    sizes = await asyncio.gather(*(object_size(u.storage_key) for u in pending))
+    for u, size in zip(pending, sizes):
+        if size is None:
+            raise HTTPException(status_code=409, detail=f"File {u.file_name} has not been uploaded")
+        if size > MAX_SIZE:
+            await storage_delete(u.storage_key)
+            uploads_repo.delete_many([u.storage_key])
+            db.commit()
+            raise HTTPException(status_code=400, detail=f"File {u.file_name} exceeds 50MB limit")
+
+    created, dispatch = register_files(
+        db,
+        inspection_id,
+        org_id,
+        [
+            {
+                "file_type": file_type_from_mime(u.mime_type, u.file_name),
+                "file_name": u.file_name,
+                "storage_url": storage_url(u.storage_key),
+                "storage_key": u.storage_key,
+                "file_size": size,
+                "mime_type": u.mime_type,
+            }
+            for u, size in zip(pending, sizes)
+        ],
+    )
+    items = {u.storage_key: item for u, item in zip(pending, created)}
+    for key, item in items.items():
+        issued[key].file_id = UUID(item["id"])
+    file_repo = FileRepository(db)
+    for key in keys:
+        if key not in items:
+            f = file_repo.get_by_id(issued[key].file_id)
+            items[key] = {"id": str(f.id), "file_name": f.file_name, "status": f.status}
+    db.commit()
+    enqueue_jobs(inspection_id, org_id, dispatch)
+    return {"files": [items[key] for key in keys]}
+
+
 @router.get("/inspections/{inspection_id}/files")
 def list_files(
     inspection_id: UUID,
@@ -143,4 +355,37 @@ def get_file_metadata(
         "inspection_id": str(f.inspection_id),
         "download_url": presigned,
         "created_at": f.created_at.isoformat() if f.created_at else None,
-    }
\ No newline at end of file
+    }
+
+
+@router.delete("/files/{file_id}")
+async def delete_file(
+    file_id: UUID,
+    db: Session = Depends(get_db),
+    org_id: UUID = Depends(get_org_id),
+):
+    """Delete a file and its findings. The stored object is removed once no other file references it."""
+    from app.models.inspection import Inspection
+    f = FileRepository(db).get_by_id(file_id)
+    if not f:
+        raise HTTPException(status_code=404, detail="File not found")
+    inspection = db.query(Inspection).filter(
+        Inspection.id == f.inspection_id,
+        Inspection.org_id == org_id,
+    ).first()
+    if not inspection:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    # The blob reference is dropped by a trigger in this same transaction
+    deleted = FileRepository(db).delete(file_id)
+    if deleted is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    # Objects go only after the delete committed; the cleanup worker retries failures
+    if deleted.content_sha256:
+        await collect_blobs(db, [deleted.content_sha256])
+    elif deleted.storage_key:
+        try:
+            await storage_delete(deleted.storage_key)
+        except Exception:
+            logger.exception("Failed to delete object %s of file %s", deleted.storage_key, file_id)
+    return {"id": str(file_id), "deleted": True}
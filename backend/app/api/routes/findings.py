@@ -1,20 +1,51 @@
 """
-Findings API route: list findings for an inspection.
+Findings API routes: list, stats, search, review queue and bulk reviews, export.
 """
+import base64
+import json
+import zlib
+from collections.abc import Iterator
+from datetime import datetime
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 
-from app.core.database import get_db
+from app.core.database import SessionLocal, get_db
 from app.core.auth import get_org_id
 from app.repositories.finding_repository import FindingRepository
 from app.repositories.inspection_repository import InspectionRepository
+from app.services.finding_search import FindingSearchService, render_snippet
+from app.services.hf_client import HFInferenceClient
+from app.services.report_export import finding_record
+from app.services.review_service import ReviewService
 from app.models.finding import Finding
-from app.models.inspection import Inspection
 from sqlalchemy import func
 
 router = APIRouter(tags=["findings"])
 
+# Lines are flushed to the client in chunks of about this size
+EXPORT_CHUNK_BYTES = 64 * 1024
+REVIEW_QUEUE_PAGE_SIZE = 50
+REVIEW_QUEUE_MAX_PAGE_SIZE = 500
+REVIEW_BATCH_MAX = 1000
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
+
+
+class ReviewCorrectionBody(BaseModel):
+    finding_id: UUID
+    corrected_category: str | None = None  # None: the AI category was right
+    corrected_severity: str | None = None  # None: the category's severity
+    notes: str | None = None
+    review_duration_seconds: int | None = None
+
+
+class ReviewBatchBody(BaseModel):
+    reviewer_id: UUID | None = None
+    reviews: list[ReviewCorrectionBody] = Field(min_length=1, max_length=REVIEW_BATCH_MAX)
+
 
 @router.get("/inspections/{inspection_id}/findings")
 def list_findings(
@@ -60,8 +91,7 @@ def get_findings_stats(
     """Aggregate findings by category across all org inspections."""
     stats = (
         db.query(Finding.category, func.count(Finding.id).label("count"))
-        .join(Inspection, Finding.inspection_id == Inspection.id)
-        .filter(Inspection.org_id == org_id)
+        .filter(Finding.org_id == org_id)
         .group_by(Finding.category)
         .all()
     )
@@ -73,32 +103,178 @@ def get_findings_stats(
     ]
 
 
+@router.get("/findings/search")
+async def search_findings(
+    q: str = Query(..., min_length=1, max_length=500),
+    limit: int = Query(SEARCH_PAGE_SIZE, ge=1, le=SEARCH_MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+    org_id: UUID = Depends(get_org_id),
+):
+    """
+    Search the org's findings by caption, description and transcription, ranking
+    full-text and semantic matches together. Each item has an HTML-escaped snippet
+    with matched terms in <mark> tags. Pass the returned next_offset as offset for the next page
+    (null on the last one).
+    """
+    hf = HFInferenceClient()
+    try:
+        page, next_offset = await FindingSearchService(db, hf).search(org_id, q, limit, offset)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    finally:
+        await hf.close()
+
+    return {
+        "items": [
+            {
+                "id": str(row.id),
+                "inspection_id": str(row.inspection_id),
+                "file_id": str(row.file_id) if row.file_id else None,
+                "category": row.category,
+                "severity": row.severity,
+                "confidence_score": row.confidence_score,
+                "needs_review": row.needs_review,
+                "created_at": row.created_at.isoformat() if row.created_at else None,
+                "snippet": render_snippet(row.snippet),
+                "score": float(row.score),
+                "text_rank": row.text_rank,
+                "vector_rank": row.vector_rank,
+            }
+            for row in page
+        ],
+        "next_offset": next_offset,
+    }
+
+
 @router.get("/findings/review-queue")
 def get_review_queue(
+    limit: int = Query(REVIEW_QUEUE_PAGE_SIZE, ge=1, le=REVIEW_QUEUE_MAX_PAGE_SIZE),
+    cursor: str | None = None,
     db: Session = Depends(get_db),
     org_id: UUID = Depends(get_org_id),
 ):
-    """Return all findings that need human review across all org inspections."""
-    items = (
-        db.query(Finding, Inspection)
-        .join(Inspection, Finding.inspection_id == Inspection.id)
-        .filter(Inspection.org_id == org_id, Finding.needs_review == True)
-        .order_by(Finding.created_at.desc())
-        .limit(50)
-        .all()
-    )
-    
-    return [
-        {
-            "id": str(row.Finding.id),
-            "ai_caption": row.Finding.ai_caption,
-            "category": row.Finding.category,
-            "confidence_score": row.Finding.confidence_score,
-            "severity": row.Finding.severity,
-            "inspection": {
-                "id": str(row.Inspection.id),
-                "name": row.Inspection.name,
+    """
+    Findings that need human review across all org inspections, newest first.
+    Pass the returned next_cursor to get the following page (null on the last one).
+    """
+    after = _decode_cursor(cursor) if cursor else None
+    rows = FindingRepository(db).review_queue_page(org_id, limit + 1, after=after)
+    page = rows[:limit]
+    next_cursor = _encode_cursor(page[-1]) if len(rows) > limit else None
+
+    return {
+        "items": [
+            {
+                "id": str(row.id),
+                "ai_caption": row.ai_caption,
+                "description": row.description,
+                "category": row.category,
+                "confidence_score": row.confidence_score,
+                "severity": row.severity,
+                "created_at": row.created_at.isoformat() if row.created_at else None,
+                "inspection": {
+                    "id": str(row.inspection_id),
+                    "name": row.inspection_name,
+                }
             }
-        }
-        for row in items
-    ]
+            for row in page
+        ],
+        "next_cursor": next_cursor,
+    }
+
+
+@router.post("/findings/reviews:batch")
+def create_reviews_batch(
+    body: ReviewBatchBody,
+    db: Session = Depends(get_db),
+    org_id: UUID = Depends(get_org_id),
+):
+    """
+    Record up to REVIEW_BATCH_MAX reviews in one transaction: a human_reviews row per finding,
+    the corrected category/severity applied, needs_review cleared, and the risk level
+    and status of affected inspections recomputed. Omitted corrections keep the AI's
+    values (confirming them). Nothing is written if any finding is missing.
+    """
+    try:
+        return ReviewService(db).apply_batch(
+            org_id, [review.model_dump() for review in body.reviews], reviewer_id=body.reviewer_id
+        )
+    except LookupError as exc:
+        raise HTTPException(status_code=404, detail={"message": "Findings not found", "finding_ids": exc.args[0]})
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+
+def _encode_cursor(row) -> str:
+    """Opaque keyset cursor: the (created_at, id) of the last row of a page."""
+    raw = json.dumps([row.created_at.isoformat(), str(row.id)])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        created_at, finding_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(created_at), UUID(finding_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@router.get("/findings/export")
+def export_findings(
+    since: datetime | None = None,
+    until: datetime | None = None,
+    category: list[str] | None = Query(None),
+    severity: list[str] | None = Query(None),
+    include_embedding: bool = False,
+    gzip: bool = False,
+    org_id: UUID = Depends(get_org_id),
+):
+    """
+    Stream every finding of the org as NDJSON, oldest first. Filter by created_at
+    (since inclusive, until exclusive) and by category/severity (repeat the
+    parameter for several values). Rows come from a server-side cursor, so memory
+    stays flat however many findings the org has.
+    """
+    def _ndjson() -> Iterator[bytes]:
+        # Own session: the request's session is closed before the body streams
+        db = SessionLocal()
+        try:
+            rows = FindingRepository(db).iter_for_org_export(
+                org_id,
+                since=since,
+                until=until,
+                categories=category,
+                severities=severity,
+                include_embedding=include_embedding,
+            )
+            chunk: list[bytes] = []
+            size = 0
+            for row in rows:
+                line = json.dumps(finding_record(row), default=str).encode() + b"\n"
+                chunk.append(line)
+                size += len(line)
+                if size >= EXPORT_CHUNK_BYTES:
+                    yield b"".join(chunk)
+                    chunk, size = [], 0
+            if chunk:
+                yield b"".join(chunk)
+        finally:
+            db.close()
+
+    def _gzipped(body: Iterator[bytes]) -> Iterator[bytes]:
+        compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+        for data in body:
+            out = compressor.compress(data)
+            if out:
+                yield out
+        yield compressor.flush()
+
+    headers = {"Content-Disposition": 'attachment; filename="findings.ndjson"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        _gzipped(_ndjson()) if gzip else _ndjson(),
+        media_type="application/x-ndjson",
+        headers=headers,
+    )
@@ -1,20 +1,28 @@
 """
 Inspection CRUD endpoints.
 """
+import asyncio
+import json
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 
 from app.core.database import get_db
 from app.core.auth import get_org_id
 from app.repositories.inspection_repository import InspectionRepository
+from app.repositories.file_repository import FileRepository
+from app.services.inspection_events import event_broker
 from app.models.inspection import Inspection
 from app.models.finding import Finding
 from sqlalchemy import func
 
 router = APIRouter(prefix="/inspections", tags=["inspections"])
 
+# Comment line sent on idle streams so proxies don't close them
+EVENTS_KEEPALIVE_SECONDS = 15
+
 
 class InspectionCreateBody(BaseModel):
     name: str
@@ -104,16 +112,14 @@ def get_inspection_stats(
     # Total findings across all inspections in org
     total_findings = (
         db.query(func.count(Finding.id))
-        .join(Inspection, Finding.inspection_id == Inspection.id)
-        .filter(Inspection.org_id == org_id)
+        .filter(Finding.org_id == org_id)
         .scalar()
     ) or 0
     
     # Pending reviews (findings needing review)
     pending_reviews = (
         db.query(func.count(Finding.id))
-        .join(Inspection, Finding.inspection_id == Inspection.id)
-        .filter(Inspection.org_id == org_id, Finding.needs_review == True)
+        .filter(Finding.org_id == org_id, Finding.needs_review == True)
         .scalar()
     ) or 0
 
@@ -148,3 +154,62 @@ def get_inspection(
         risk_level=insp.risk_level,
         report_narrative=insp.report_narrative,
     )
+
+
+def _sse(event: dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+@router.get("/{inspection_id}/events")
+async def stream_inspection_events(
+    inspection_id: UUID,
+    request: Request,
+    db: Session = Depends(get_db),
+    org_id: UUID = Depends(get_org_id),
+):
+    """
+    Server-sent events for an inspection's processing: a "snapshot" first, then
+    "files_added", "file" (status changes), "findings" and "inspection" (finalized)
+    as they commit. On "resync", refetch the inspection and its files.
+    """
+    repo = InspectionRepository(db)
+    insp = repo.get_by_id(inspection_id, org_id=org_id)
+    if not insp:
+        raise HTTPException(status_code=404, detail="Inspection not found")
+
+    # Subscribe before reading the snapshot so nothing committed in between is lost;
+    # the existence check above ran earlier, so reload the inspection's state too
+    queue = await event_broker.subscribe(inspection_id)
+    try:
+        db.refresh(insp)
+        snapshot = {
+            "type": "snapshot",
+            "inspection_id": str(inspection_id),
+            "status": insp.status,
+            "risk_level": insp.risk_level,
+            "files": FileRepository(db).status_counts(inspection_id),
+        }
+    except Exception:
+        event_broker.unsubscribe(inspection_id, queue)
+        raise
+    # The stream may stay open for minutes; don't hold a pooled connection for it
+    db.close()
+
+    async def _events():
+        try:
+            yield _sse(snapshot)
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=EVENTS_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield _sse(event)
+        finally:
+            event_broker.unsubscribe(inspection_id, queue)
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
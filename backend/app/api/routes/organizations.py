@@ -1,13 +1,16 @@
 """
 Organization endpoints (for dev/bootstrap; multi-tenant).
 """
+from typing import Any
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 
+from app.core.auth import get_org_id
 from app.core.database import get_db
 from app.models.organization import Organization
+from app.services.org_profiles import org_profiles, validate_settings
 
 router = APIRouter(prefix="/organizations", tags=["organizations"])
 
@@ -17,10 +20,17 @@ class OrganizationCreateBody(BaseModel):
     slug: str
 
 
+class OrganizationSettingsBody(BaseModel):
+    confidence_threshold: float | None = None
+    categories: list[str] | None = None
+    category_severity: dict[str, str] | None = None
+
+
 class OrganizationResponse(BaseModel):
     id: str
     name: str
     slug: str
+    settings: dict[str, Any] | None = None
 
     class Config:
         from_attributes = True
@@ -36,7 +46,7 @@ def create_organization(body: OrganizationCreateBody, db: Session = Depends(get_
     db.add(org)
     db.commit()
     db.refresh(org)
-    return OrganizationResponse(id=str(org.id), name=org.name, slug=org.slug)
+    return OrganizationResponse(id=str(org.id), name=org.name, slug=org.slug, settings=org.settings)
 
 
 @router.get("/{org_id}", response_model=OrganizationResponse)
@@ -45,4 +55,33 @@ def get_organization(org_id: UUID, db: Session = Depends(get_db)):
     org = db.query(Organization).filter(Organization.id == org_id).first()
     if not org:
         raise HTTPException(status_code=404, detail="Organization not found")
-    return OrganizationResponse(id=str(org.id), name=org.name, slug=org.slug)
+    return OrganizationResponse(id=str(org.id), name=org.name, slug=org.slug, settings=org.settings)
+
+
+@router.patch("/{org_id}/settings", response_model=OrganizationResponse)
+def update_organization_settings(
+    org_id: UUID,
+    body: OrganizationSettingsBody,
+    db: Session = Depends(get_db),
+    caller_org_id: UUID = Depends(get_org_id),
+):
+    """
+    Update the caller's org's classification settings (fields left out are kept).
+    New uploads use them right away in this process, in other workers within ORG_PROFILE_TTL_SECONDS.
+    """
+    # Other orgs are indistinguishable from missing ones
+    org = None
+    if org_id == caller_org_id:
+        org = db.query(Organization).filter(Organization.id == org_id).first()
+    if not org:
+        raise HTTPException(status_code=404, detail="Organization not found")
+    changes = body.model_dump(exclude_unset=True)
+    errors = validate_settings(changes)
+    if errors:
+        raise HTTPException(status_code=422, detail=errors)
+    # Reassign: the JSON column does not track in-place mutation
+    org.settings = {**(org.settings or {}), **changes}
+    db.commit()
+    db.refresh(org)
+    org_profiles.invalidate(org.id)
+    return OrganizationResponse(id=str(org.id), name=org.name, slug=org.slug, settings=org.settings)
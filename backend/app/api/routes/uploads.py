@@ -0,0 +1,268 @@
+"""
+Resumable chunked upload endpoints.
+
+Flow: create a session, PUT chunks at byte offsets (in any order, retrying
+only what failed), GET the session to see which ranges arrived, then POST
+/complete to promote the assembled file to a normal files row + processing job. The
+assembled file is stored in the content-addressed blob store.
+"""
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from app.core.auth import get_org_id
+from app.core.database import get_db
+from app.models.upload_session import UploadSession
+from app.repositories.inspection_repository import InspectionRepository
+from app.services.storage_service import (
+    PARTIAL_UPLOAD_DIR,
+    blob_key,
+    content_digest_path,
+    partial_upload_path,
+    storage_url,
+    store_blob_path,
+)
+from app.services.upload_service import (
+    MAX_SIZE,
+    acquire_blobs,
+    discard_blobs,
+    enqueue_jobs,
+    file_type_from_mime,
+    is_allowed,
+    register_files,
+)
+
+router = APIRouter(tags=["uploads"])
+
+MAX_CHUNK_SIZE = 16 * 1024 * 1024  # 16MB
+RECOMMENDED_CHUNK_SIZE = 2 * 1024 * 1024  # 2MB
+# Idle time after which a session and its partial file are deleted; every chunk restarts it
+UPLOAD_SESSION_TTL_SECONDS = int(os.getenv("UPLOAD_SESSION_TTL_SECONDS", "86400"))
+
+
+class UploadSessionCreateBody(BaseModel):
+    file_name: str
+    file_size: int
+    mime_type: str | None = None
+
+
+def _merge_range(ranges: list[list[int]], start: int, end: int) -> list[list[int]]:
+    """Add [start, end) to a sorted list of disjoint ranges, merging overlaps and neighbours."""
+    merged: list[list[int]] = []
+    # Copy the stored ranges: mutating them in place would hide the change from the ORM
+    for r_start, r_end in sorted([[s, e] for s, e in ranges] + [[start, end]]):
+        if merged and r_start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], r_end)
+        else:
+            merged.append([r_start, r_end])
+    return merged
+
+
+def _missing_ranges(ranges: list[list[int]], total: int) -> list[list[int]]:
+    missing: list[list[int]] = []
+    cursor = 0
+    for r_start, r_end in ranges:
+        if r_start > cursor:
+            missing.append([cursor, r_start])
+        cursor = max(cursor, r_end)
+    if cursor < total:
+        missing.append([cursor, total])
+    return missing
+
+
+def _session_response(session: UploadSession) -> dict:
+    ranges = session.received_ranges or []
+    return {
+        "id": str(session.id),
+        "inspection_id": str(session.inspection_id),
+        "file_name": session.file_name,
+        "status": session.status,
+        "total_size": session.total_size,
+        "received": ranges,
+        "received_bytes": sum(end - start for start, end in ranges),
+        "missing": _missing_ranges(ranges, session.total_size),
+        "file_id": str(session.file_id) if session.file_id else None,
+        "chunk_size": RECOMMENDED_CHUNK_SIZE,
+        "expires_at": session.expires_at.isoformat() if session.expires_at else None,
+    }
+
+
+def _expiry() -> datetime:
+    return datetime.now(timezone.utc) + timedelta(seconds=UPLOAD_SESSION_TTL_SECONDS)
+
+
+def _check_active(session: UploadSession) -> None:
+    if session.status != "active":
+        raise HTTPException(status_code=409, detail=f"Upload is {session.status}")
+    # The cleanup thread may not have deleted it yet
+    if session.expires_at <= datetime.now(timezone.utc):
+        raise HTTPException(status_code=410, detail="Upload expired")
+
+
+def _get_session(db: Session, upload_id: UUID, org_id: UUID, lock: bool = False) -> UploadSession:
+    q = db.query(UploadSession).filter(UploadSession.id == upload_id, UploadSession.org_id == org_id)
+    if lock:
+        q = q.with_for_update()
+    session = q.first()
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return session
+
+
+def _write_chunk(path, offset: int, data: bytes) -> None:
+    with open(path, "r+b") as f:
+        f.seek(offset)
+        f.write(data)
+
+
+@router.post("/inspections/{inspection_id}/uploads")
+def create_upload(
+    inspection_id: UUID,
+    body: UploadSessionCreateBody,
+    db: Session = Depends(get_db),
+    org_id: UUID = Depends(get_org_id),
+):
+    """Start a resumable upload for one file."""
+    inspection = InspectionRepository(db).get_by_id(inspection_id, org_id=org_id)
+    if not inspection:
+        raise HTTPException(status_code=404, detail="Inspection not found")
+    if body.file_size <= 0 or body.file_size > MAX_SIZE:
+        raise HTTPException(status_code=400, detail=f"File {body.file_name} must be between 1 byte and 50MB")
+    if not is_allowed(body.mime_type, body.file_name):
+        raise HTTPException(
+            status_code=400,
+            detail=f"File type not allowed: {body.file_name}. Use image, audio, or PDF.",
+        )
+
+    session = UploadSession(
+        org_id=org_id,
+        inspection_id=inspection_id,
+        file_name=body.file_name,
+        file_type=file_type_from_mime(body.mime_type, body.file_name),
+        mime_type=body.mime_type,
+        total_size=body.file_size,
+        received_ranges=[],
+        status="active",
+        expires_at=_expiry(),
+    )
+    db.add(session)
+    db.flush()
+    PARTIAL_UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    partial_upload_path(str(session.id)).touch()
+    db.commit()
+    db.refresh(session)
+    return _session_response(session)
+
+
+@router.put("/uploads/{upload_id}")
+async def put_chunk(
+    upload_id: UUID,
+    offset: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    org_id: UUID = Depends(get_org_id),
+):
+    """Write the request body at `offset`. Re-sending a chunk is harmless."""
+    declared = request.headers.get("content-length")
+    if declared and int(declared) > MAX_CHUNK_SIZE:
+        raise HTTPException(status_code=413, detail="Chunk exceeds 16MB limit")
+    # Read the body before taking the row lock so a slow client doesn't hold it
+    data = await request.body()
+    if not data:
+        raise HTTPException(status_code=400, detail="Empty chunk")
+    if len(data) > MAX_CHUNK_SIZE:
+        raise HTTPException(status_code=413, detail="Chunk exceeds 16MB limit")
+
+    session = _get_session(db, upload_id, org_id, lock=True)
+    _check_active(session)
+    if offset < 0 or offset + len(data) > session.total_size:
+        raise HTTPException(status_code=416, detail="Chunk outside declared file size")
+
+    await asyncio.to_thread(_write_chunk, partial_upload_path(str(session.id)), offset, data)
+    session.received_ranges = _merge_range(session.received_ranges or [], offset, offset + len(data))
+    session.expires_at = _expiry()
+    response = _session_response(session)
+    db.commit()
+    return response
+
+
+@router.get("/uploads/{upload_id}")
+def get_upload(
+    upload_id: UUID,
+    db: Session = Depends(get_db),
+    org_id: UUID = Depends(get_org_id),
+):
+    """Received and missing byte ranges, so a client can resume after a dropped connection."""
+    return _session_response(_get_session(db, upload_id, org_id))
+
+
+@router.post("/uploads/{upload_id}/complete")
+async def complete_upload(
+    upload_id: UUID,
+    db: Session = Depends(get_db),
+    org_id: UUID = Depends(get_org_id),
+):
+    """Promote a fully received upload to a files row and queue it for processing."""
+    session = _get_session(db, upload_id, org_id, lock=True)
+    if session.status == "completed":
+        return _session_response(session)
+    _check_active(session)
+    missing = _missing_ranges(session.received_ranges or [], session.total_size)
+    if missing:
+        raise HTTPException(status_code=409, detail={"message": "Upload incomplete", "missing": missing})
+
+    partial = partial_upload_path(str(session.id))
+    sha, size = await content_digest_path(partial)
+    written: list[str] = []
+    try:
+        # Identical content already in the blob store is referenced instead of copied
+        if acquire_blobs(db, [(sha, size, session.mime_type)]):
+            await store_blob_path(sha, partial, session.mime_type)
+            written.append(sha)
+        created, dispatch = register_files(
+            db,
+            session.inspection_id,
+            session.org_id,
+            [{
+                "file_type": session.file_type,
+                "file_name": session.file_name,
+                "storage_url": storage_url(blob_key(sha)),
+                "storage_key": blob_key(sha),
+                "content_sha256": sha,
+                "file_size": size,
+                "mime_type": session.mime_type,
+            }],
+        )
+        session.status = "completed"
+        session.file_id = UUID(created[0]["id"])
+        response = _session_response(session)
+        db.commit()
+    except Exception:
+        # The partial file is still there, so the client can retry /complete
+        await discard_blobs(written)
+        db.rollback()
+        raise
+    partial.unlink(missing_ok=True)
+    enqueue_jobs(session.inspection_id, session.org_id, dispatch)
+    return response
+
+
+@router.delete("/uploads/{upload_id}")
+def abort_upload(
+    upload_id: UUID,
+    db: Session = Depends(get_db),
+    org_id: UUID = Depends(get_org_id),
+):
+    """Abandon an upload and discard received bytes."""
+    session = _get_session(db, upload_id, org_id, lock=True)
+    if session.status == "active":
+        session.status = "aborted"
+        partial_upload_path(str(session.id)).unlink(missing_ok=True)
+    response = _session_response(session)
+    db.commit()
+    return response
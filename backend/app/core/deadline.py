@@ -0,0 +1,55 @@
+"""
+Per-job deadlines carried in a context variable, so model clients deep in a
+pipeline bound their request timeouts, retries and backoff sleeps by the
+time left for the file being processed. Tasks started with asyncio.gather
+inherit the deadline of the code that started them.
+"""
+import asyncio
+import contextvars
+import time
+from contextlib import contextmanager
+
+_deadline: contextvars.ContextVar[float | None] = contextvars.ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The current job's time budget ran out."""
+
+
+@contextmanager
+def deadline(seconds: float | None):
+    """Bound the enclosed work to `seconds` (never extends an outer deadline). None or <= 0: no bound."""
+    if seconds is None or seconds <= 0:
+        yield
+        return
+    at = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(at if current is None else min(current, at))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> float | None:
+    """Seconds left before the current deadline, or None without one."""
+    at = _deadline.get()
+    return None if at is None else at - time.monotonic()
+
+
+def timeout(default: float, what: str = "request") -> float:
+    """A request timeout: `default`, capped at the time left. Raises once the deadline has passed."""
+    left = remaining()
+    if left is None:
+        return default
+    if left <= 0:
+        raise DeadlineExceeded(f"Deadline exceeded before {what}")
+    return min(default, left)
+
+
+async def sleep(seconds: float, what: str = "retry") -> None:
+    """Back off before a retry, or raise right away if the retry could not start in time."""
+    left = remaining()
+    if left is not None and seconds >= left:
+        raise DeadlineExceeded(f"Deadline exceeded: {what} in {seconds:.0f}s, {max(left, 0):.0f}s left")
+    await asyncio.sleep(seconds)
@@ -0,0 +1,203 @@
+"""
+Prometheus metrics for the API, the file processing worker and the DB pool.
+Metric updates are in-process counter/histogram increments, so they are safe
+to call from the request and pipeline hot paths. Exposed on GET /metrics.
+"""
+import contextvars
+import time
+from contextlib import contextmanager
+
+from prometheus_client import Counter, Gauge, Histogram, REGISTRY
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import event
+
+from app.core.database import engine
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "auditpilot_http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ["method", "route", "status"],
+)
+
+WORKER_QUEUE_DEPTH = Gauge(
+    "auditpilot_worker_queue_depth",
+    "Files enqueued for background processing that have not started yet.",
+)
+
+SCHEDULER_QUEUE_DEPTH = Gauge(
+    "auditpilot_scheduler_queue_depth",
+    "Files queued in the job scheduler, by priority class and org.",
+    ["priority", "org_id"],
+)
+
+SCHEDULER_WAIT_SECONDS = Histogram(
+    "auditpilot_scheduler_wait_seconds",
+    "Time a scheduled task waited for a worker, by priority class and org.",
+    ["priority", "org_id"],
+    buckets=(0.1, 0.5, 1, 5, 15, 30, 60, 300, 900, 1800, 3600),
+)
+
+JOBS_RECLAIMED = Counter(
+    "auditpilot_jobs_reclaimed_total",
+    "Jobs whose lease expired and were swept, by outcome (requeued or dead).",
+    ["outcome"],
+)
+
+PIPELINES_IN_FLIGHT = Gauge(
+    "auditpilot_pipelines_in_flight",
+    "File pipelines currently running.",
+    ["file_type"],
+)
+
+PIPELINE_STAGE_SECONDS = Histogram(
+    "auditpilot_pipeline_stage_duration_seconds",
+    "Latency of individual file pipeline stages.",
+    ["file_type", "stage"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300),
+)
+
+RATE_LIMIT_WAIT_SECONDS = Histogram(
+    "auditpilot_rate_limit_wait_seconds",
+    "Time spent waiting on the client-side rate limiter.",
+    ["client"],
+    buckets=(0, 0.1, 0.5, 1, 5, 10, 30, 60),
+)
+
+MODEL_RETRIES = Counter(
+    "auditpilot_model_retries_total",
+    "Model API attempts that were retried, by reason.",
+    ["client", "model", "reason"],
+)
+
+MODEL_CIRCUIT_STATE = Gauge(
+    "auditpilot_model_circuit_state",
+    "Circuit breaker state per model: 0 closed, 1 half-open, 2 open.",
+    ["client", "model"],
+)
+
+MODEL_LATENCY_EWMA_SECONDS = Gauge(
+    "auditpilot_model_latency_ewma_seconds",
+    "Exponentially weighted moving average of model call latency.",
+    ["client", "model"],
+)
+
+MODEL_HEDGED_REQUESTS = Counter(
+    "auditpilot_model_hedged_requests_total",
+    "Requests that sent a hedge, by which of the two answered first.",
+    ["client", "model", "outcome"],
+)
+
+TEXT_CLASSIFICATIONS = Counter(
+    "auditpilot_text_classifications_total",
+    "Transcriptions and PDF texts classified, by method (embedding similarity or zero-shot).",
+    ["method"],
+)
+
+UPLOAD_THROUGHPUT_MB_S = Histogram(
+    "auditpilot_upload_throughput_mb_per_second",
+    "Per-request upload throughput (stored bytes over request handling time).",
+    buckets=(0.5, 1, 2, 5, 10, 25, 50, 100, 250),
+)
+
+DB_STATEMENTS_PER_FILE = Histogram(
+    "auditpilot_db_statements_per_file",
+    "SQL statements issued while processing one file.",
+    buckets=(2, 4, 6, 8, 10, 15, 20, 30, 50),
+)
+
+DB_POOL_CHECKOUTS = Counter(
+    "auditpilot_db_pool_checkouts_total",
+    "Connections checked out of the SQLAlchemy pool.",
+)
+
+
+@contextmanager
+def observe_stage(file_type: str, stage: str):
+    """Time one pipeline stage into PIPELINE_STAGE_SECONDS."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        PIPELINE_STAGE_SECONDS.labels(file_type, stage).observe(time.perf_counter() - start)
+
+
+class StatementCounter:
+    count = 0
+
+
+_statement_counter: contextvars.ContextVar[StatementCounter | None] = contextvars.ContextVar(
+    "statement_counter", default=None
+)
+
+
+@contextmanager
+def count_statements():
+    """Count SQL statements executed in the current context (e.g. one worker job)."""
+    counter = StatementCounter()
+    token = _statement_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _statement_counter.reset(token)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording request latency per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Label by route template, not raw path, to keep cardinality bounded.
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_SECONDS.labels(scope["method"], route_path, str(status_code)).observe(
+                time.perf_counter() - start
+            )
+
+
+class _PoolCollector:
+    """Reads SQLAlchemy pool state at scrape time instead of on every checkout."""
+
+    def collect(self):
+        pool = engine.pool
+        for name, doc, getter in (
+            ("auditpilot_db_pool_size", "Configured pool size.", "size"),
+            ("auditpilot_db_pool_checked_out", "Connections currently checked out.", "checkedout"),
+            ("auditpilot_db_pool_checked_in", "Idle connections in the pool.", "checkedin"),
+            ("auditpilot_db_pool_overflow", "Connections opened beyond the pool size.", "overflow"),
+        ):
+            fn = getattr(pool, getter, None)
+            if fn is not None:
+                yield GaugeMetricFamily(name, doc, value=fn())
+
+
+@event.listens_for(engine, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    DB_POOL_CHECKOUTS.inc()
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _on_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    counter = _statement_counter.get()
+    if counter is not None:
+        counter.count += 1
+
+
+REGISTRY.register(_PoolCollector())
@@ -0,0 +1,213 @@
+"""
+Opt-in sampling profiler for API requests and worker jobs.
+A background thread samples Python stacks via sys._current_frames() and writes
+speedscope JSON (or collapsed stacks for flamegraph.pl) under PROFILE_DIR.
+Nothing runs on the hot path unless profiling is enabled.
+"""
+import hmac
+import itertools
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Allow per-request profiling via the X-Profile header
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+# Shared secret a request must send as X-Profile to be profiled; unset = no request is
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+# Profile every Nth worker job (0 = never)
+PROFILE_WORKER_EVERY_N = int(os.getenv("PROFILE_WORKER_EVERY_N", "0"))
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR") or Path(tempfile.gettempdir()) / "auditpilot_profiles")
+PROFILE_INTERVAL_SECONDS = float(os.getenv("PROFILE_INTERVAL_SECONDS", "0.005"))
+# "speedscope" (JSON, open at https://www.speedscope.app) or "collapsed" (flamegraph.pl input)
+PROFILE_FORMAT = os.getenv("PROFILE_FORMAT", "speedscope")
+
+PROFILE_HEADER = b"x-profile"
+
+# Leaf frames that mean a thread is parked, not doing work
+_IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("thread.py", "_worker"),
+}
+
+_job_counter = itertools.count(1)
+
+
+class SamplingProfiler:
+    """Samples the stacks of selected threads (or all busy threads) at a fixed interval."""
+
+    def __init__(self, name: str, thread_ids: set[int] | None = None, interval: float = PROFILE_INTERVAL_SECONDS):
+        self.name = name
+        self.thread_ids = thread_ids
+        self.interval = interval
+        self._frames: list[tuple[str, str, int]] = []
+        self._frame_index: dict[tuple[str, str, int], int] = {}
+        self._samples: dict[int, list[tuple[tuple[int, ...], float]]] = defaultdict(list)
+        self._thread_names: dict[int, str] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._started = 0.0
+        self._duration = 0.0
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name=f"profiler-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._duration = time.perf_counter() - self._started
+        self._thread_names = {t.ident: t.name for t in threading.enumerate() if t.ident is not None}
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            weight, last = now - last, now
+            for tid, frame in sys._current_frames().items():
+                if tid == own:
+                    continue
+                if self.thread_ids is not None:
+                    if tid not in self.thread_ids:
+                        continue
+                elif _is_idle(frame):
+                    continue
+                self._samples[tid].append((self._stack(frame), weight))
+
+    def _stack(self, frame) -> tuple[int, ...]:
+        stack: list[int] = []
+        while frame is not None:
+            code = frame.f_code
+            key = (code.co_name, code.co_filename, code.co_firstlineno)
+            idx = self._frame_index.get(key)
+            if idx is None:
+                idx = self._frame_index[key] = len(self._frames)
+                self._frames.append(key)
+            stack.append(idx)
+            frame = frame.f_back
+        stack.reverse()
+        return tuple(stack)
+
+    def write(self, path: Path) -> Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if PROFILE_FORMAT == "collapsed":
+            path.write_text(self._render_collapsed())
+        else:
+            path.write_text(json.dumps(self._render_speedscope()))
+        return path
+
+    def _render_speedscope(self) -> dict:
+        profiles = []
+        for tid, samples in self._samples.items():
+            profiles.append({
+                "type": "sampled",
+                "name": self._thread_names.get(tid, f"thread-{tid}"),
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": self._duration,
+                "samples": [list(stack) for stack, _ in samples],
+                "weights": [weight for _, weight in samples],
+            })
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": self.name,
+            "exporter": "auditpilot",
+            "activeProfileIndex": 0,
+            "shared": {
+                "frames": [{"name": name, "file": file, "line": line} for name, file, line in self._frames],
+            },
+            "profiles": profiles,
+        }
+
+    def _render_collapsed(self) -> str:
+        counts: dict[str, int] = defaultdict(int)
+        for samples in self._samples.values():
+            for stack, _ in samples:
+                counts[";".join(f"{self._frames[i][0]} ({os.path.basename(self._frames[i][1])})" for i in stack)] += 1
+        return "".join(f"{stack} {n}\n" for stack, n in counts.items())
+
+
+def _is_idle(frame) -> bool:
+    code = frame.f_code
+    return (os.path.basename(code.co_filename), code.co_name) in _IDLE_LEAVES
+
+
+def _profile_path(name: str) -> Path:
+    ext = "collapsed.txt" if PROFILE_FORMAT == "collapsed" else "speedscope.json"
+    safe = re.sub(r"[^A-Za-z0-9_.-]+", "_", name).strip("_")
+    return PROFILE_DIR / f"{time.strftime('%Y%m%dT%H%M%S')}-{safe}.{ext}"
+
+
+@contextmanager
+def profiled(name: str, thread_ids: set[int] | None = None, path: Path | None = None):
+    """Sample stacks for the duration of the block and write a profile file."""
+    profiler = SamplingProfiler(name, thread_ids=thread_ids)
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        try:
+            written = profiler.write(path or _profile_path(name))
+            logger.info("Profile written to %s", written)
+        except OSError:
+            logger.exception("Failed to write profile %s", name)
+
+
+def should_profile_job() -> bool:
+    """True for every PROFILE_WORKER_EVERY_N-th worker job."""
+    if PROFILE_WORKER_EVERY_N <= 0:
+        return False
+    return next(_job_counter) % PROFILE_WORKER_EVERY_N == 0
+
+
+class ProfilingMiddleware:
+    """
+    Profile a single request when its X-Profile header equals PROFILE_TOKEN.
+    Sync endpoints run on threadpool threads, so all busy threads are sampled;
+    the profile's file name (under PROFILE_DIR) is returned in the X-Profile-Id
+    response header. Only installed when PROFILING_ENABLED is set.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        if not PROFILE_TOKEN:
+            logger.warning("PROFILING_ENABLED is set without PROFILE_TOKEN; no request will be profiled")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        path = _profile_path(f"{scope['method']}-{scope['path']}")
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", path.name.encode())]
+            await send(message)
+
+        with profiled(f"{scope['method']} {scope['path']}", path=path):
+            await self.app(scope, receive, send_wrapper)
+
+
+def _wants_profile(scope) -> bool:
+    if not PROFILE_TOKEN:
+        return False
+    for key, value in scope.get("headers", []):
+        if key == PROFILE_HEADER:
+            return hmac.compare_digest(value, PROFILE_TOKEN.encode())
+    return False
@@ -5,6 +5,12 @@ from app.models.file import File
 from app.models.finding import Finding
 from app.models.human_review import HumanReview
 from app.models.usage_log import UsageLog
+from app.models.processing_job import ProcessingJob
+from app.models.upload_session import UploadSession
+from app.models.blob import Blob
+from app.models.narrative_summary import NarrativeSummary
+from app.models.report_export import ReportExport
+from app.models.direct_upload import DirectUpload
 
 __all__ = [
     "Organization",
@@ -14,4 +20,10 @@ __all__ = [
     "Finding",
     "HumanReview",
     "UsageLog",
+    "ProcessingJob",
+    "UploadSession",
+    "Blob",
+    "NarrativeSummary",
+    "ReportExport",
+    "DirectUpload",
 ]
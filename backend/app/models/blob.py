@@ -0,0 +1,17 @@
+from sqlalchemy import Column, String, BigInteger, Integer, DateTime, CheckConstraint
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class Blob(Base):
+    __tablename__ = "blobs"
+
+    sha256 = Column(String, primary_key=True)
+    storage_key = Column(String, nullable=False)
+    size = Column(BigInteger, nullable=False)
+    mime_type = Column(String)
+    ref_count = Column(Integer, nullable=False, default=1)  # files rows pointing at this blob
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        CheckConstraint("ref_count >= 0", name="check_blob_ref_count"),
+    )
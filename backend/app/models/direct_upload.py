@@ -0,0 +1,16 @@
+from sqlalchemy import Column, String, ForeignKey, DateTime
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class DirectUpload(Base):
+    __tablename__ = "direct_uploads"
+
+    storage_key = Column(String, primary_key=True)  # issued by /files/presign
+    org_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False)
+    inspection_id = Column(UUID(as_uuid=True), ForeignKey("inspections.id", ondelete="CASCADE"), nullable=False)
+    file_name = Column(String, nullable=False)
+    mime_type = Column(String)
+    file_id = Column(UUID(as_uuid=True), ForeignKey("files.id", ondelete="CASCADE"))  # set once registered
+    expires_at = Column(DateTime(timezone=True), nullable=False)  # registration deadline
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
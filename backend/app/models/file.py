@@ -14,6 +14,7 @@ class File(Base):
     file_name = Column(String, nullable=False)
     storage_url = Column(String, nullable=False)
     storage_key = Column(String, nullable=False)
+    content_sha256 = Column(String, ForeignKey("blobs.sha256"))
     file_size = Column(Integer)
     mime_type = Column(String)
     status = Column(String, default="pending")
@@ -1,6 +1,6 @@
-from sqlalchemy import Column, String, Float, Boolean, ForeignKey, DateTime, CheckConstraint, Text
-from sqlalchemy.dialects.postgresql import UUID, JSONB
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Float, Boolean, ForeignKey, DateTime, CheckConstraint, Text, Computed
+from sqlalchemy.dialects.postgresql import UUID, JSONB, TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
 from pgvector.sqlalchemy import Vector
 import uuid
@@ -11,6 +11,8 @@ class Finding(Base):
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     inspection_id = Column(UUID(as_uuid=True), ForeignKey("inspections.id", ondelete="CASCADE"), nullable=False)
+    # Copied from the inspection by a DB trigger (migration 018); never set it directly
+    org_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id", ondelete="CASCADE"))
     file_id = Column(UUID(as_uuid=True), ForeignKey("files.id", ondelete="CASCADE"))
     category = Column(String, nullable=False)
     severity = Column(String)
@@ -23,6 +25,15 @@ class Finding(Base):
     equipment_id = Column(String)
     extra_metadata = Column(JSONB, default={})
     embedding = Column(Vector(384))  # pgvector column
+    analysis_version = Column(String)  # see file_processor.analysis_version()
+    embedding_model = Column(String)
+    # Generated by the database (migration 019); deferred so ORM loads skip it
+    search_vector = deferred(Column(TSVECTOR, Computed(
+        "setweight(to_tsvector('english', coalesce(ai_caption, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(description, '')), 'B') || "
+        "setweight(to_tsvector('english', coalesce(transcription, '')), 'C')",
+        persisted=True,
+    )))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
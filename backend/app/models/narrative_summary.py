@@ -0,0 +1,11 @@
+from sqlalchemy import Column, String, Text, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class NarrativeSummary(Base):
+    __tablename__ = "narrative_summaries"
+
+    content_hash = Column(String, primary_key=True)  # sha256 of model, parameters and input text
+    model = Column(String, nullable=False)
+    summary = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, CheckConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+import uuid
+from app.core.database import Base
+
+class ProcessingJob(Base):
+    __tablename__ = "processing_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    file_id = Column(UUID(as_uuid=True), ForeignKey("files.id", ondelete="CASCADE"), nullable=False)
+    inspection_id = Column(UUID(as_uuid=True), ForeignKey("inspections.id", ondelete="CASCADE"), nullable=False)
+    org_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id", ondelete="CASCADE"))
+    file_type = Column(String, nullable=False)
+    priority = Column(String, nullable=False, default="interactive")
+    status = Column(String, default="queued")
+    lease_owner = Column(String)
+    lease_expires_at = Column(DateTime(timezone=True))
+    attempts = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        CheckConstraint("status IN ('queued', 'running', 'completed', 'failed', 'dead')", name="check_job_status"),
+        CheckConstraint("priority IN ('interactive', 'backfill')", name="check_job_priority"),
+    )
+
+    file = relationship("File", backref="processing_jobs")
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, String, BigInteger, ForeignKey, DateTime, CheckConstraint, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+import uuid
+from app.core.database import Base
+
+class ReportExport(Base):
+    __tablename__ = "report_exports"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    inspection_id = Column(UUID(as_uuid=True), ForeignKey("inspections.id", ondelete="CASCADE"), nullable=False)
+    org_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False)
+    format = Column(String, nullable=False)
+    version = Column(String, nullable=False)  # hash of the inspection and findings state it was rendered from
+    status = Column(String, default="queued")
+    storage_key = Column(String)
+    file_size = Column(BigInteger)
+    error_message = Column(String)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    requested_at = Column(DateTime(timezone=True), server_default=func.now())  # last requested as current
+    completed_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        CheckConstraint("format IN ('pdf', 'csv', 'jsonl')", name="check_export_format"),
+        CheckConstraint("status IN ('queued', 'running', 'completed', 'failed')", name="check_export_status"),
+        UniqueConstraint("inspection_id", "format", "version", name="uq_report_exports_version"),
+    )
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, String, BigInteger, ForeignKey, DateTime, CheckConstraint
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.sql import func
+import uuid
+from app.core.database import Base
+
+class UploadSession(Base):
+    __tablename__ = "upload_sessions"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    org_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False)
+    inspection_id = Column(UUID(as_uuid=True), ForeignKey("inspections.id", ondelete="CASCADE"), nullable=False)
+    file_name = Column(String, nullable=False)
+    file_type = Column(String, nullable=False)
+    mime_type = Column(String)
+    total_size = Column(BigInteger, nullable=False)
+    received_ranges = Column(JSONB, default=[])  # sorted, merged [start, end) byte ranges
+    status = Column(String, default="active")
+    file_id = Column(UUID(as_uuid=True), ForeignKey("files.id", ondelete="SET NULL"))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False)  # pushed back by every chunk
+
+    __table_args__ = (
+        CheckConstraint("status IN ('active', 'completed', 'aborted')", name="check_upload_status"),
+    )
@@ -9,7 +9,7 @@ class UsageLog(Base):
     __tablename__ = "usage_logs"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    inspection_id = Column(UUID(as_uuid=True), ForeignKey("inspections.id", ondelete="CASCADE"), nullable=False)
+    inspection_id = Column(UUID(as_uuid=True), ForeignKey("inspections.id", ondelete="CASCADE"))
     file_id = Column(UUID(as_uuid=True), ForeignKey("files.id", ondelete="SET NULL"))
     model_name = Column(String, nullable=False)
     task_type = Column(String, nullable=False)
@@ -17,6 +17,11 @@ class UsageLog(Base):
     output_tokens = Column(Integer)
     processing_time_ms = Column(Integer)
     cost_usd = Column(Numeric(10, 6))
+    bytes_sent = Column(Integer)
+    bytes_received = Column(Integer)
+    status = Column(String)
+    http_status = Column(Integer)
+    retry_count = Column(Integer, default=0)
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
 
     inspection = relationship("Inspection", backref="usage_logs")
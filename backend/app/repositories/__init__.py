@@ -1,4 +1,21 @@
 from app.repositories.inspection_repository import InspectionRepository
 from app.repositories.file_repository import FileRepository
+from app.repositories.processing_job_repository import ProcessingJobRepository
+from app.repositories.blob_repository import BlobRepository
+from app.repositories.narrative_summary_repository import NarrativeSummaryRepository
+from app.repositories.report_export_repository import ReportExportRepository
+from app.repositories.human_review_repository import HumanReviewRepository
+from app.repositories.direct_upload_repository import DirectUploadRepository
+from app.repositories.upload_session_repository import UploadSessionRepository
 
-__all__ = ["InspectionRepository", "FileRepository"]
+__all__ = [
+    "InspectionRepository",
+    "FileRepository",
+    "ProcessingJobRepository",
+    "BlobRepository",
+    "NarrativeSummaryRepository",
+    "ReportExportRepository",
+    "HumanReviewRepository",
+    "DirectUploadRepository",
+    "UploadSessionRepository",
+]
@@ -0,0 +1,63 @@
+"""
+Repository for the content-addressed blob store.
+
+Object writes and deletes for a blob happen only while the caller's
+transaction holds its blobs row lock (taken by acquire_many/delete_unreferenced),
+so a concurrent upload of the same content can never observe a half-written or
+just-deleted object. References are dropped by a trigger on files (migration
+020) in the transaction that deletes the file; unreferenced blobs are collected
+after that commits.
+"""
+from collections import Counter
+from sqlalchemy import delete, literal_column, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from app.models.blob import Blob
+
+
+class BlobRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def acquire_many(self, blobs: list[dict]) -> set[str]:
+        """
+        Take one reference per dict (sha256, storage_key, size, mime_type), inserting
+        rows for new content with a single INSERT ... ON CONFLICT. Duplicate hashes in
+        the batch are folded into one row. Returns the hashes whose rows were created,
+        i.e. whose objects the caller must write before committing. Never commits.
+        """
+        if not blobs:
+            return set()
+        counts = Counter(b["sha256"] for b in blobs)
+        rows = {b["sha256"]: {**b, "ref_count": counts[b["sha256"]]} for b in blobs}
+        # Sorted so concurrent batches lock rows in the same order
+        stmt = pg_insert(Blob).values([rows[sha] for sha in sorted(rows)])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Blob.sha256],
+            set_={"ref_count": Blob.ref_count + stmt.excluded.ref_count},
+        ).returning(Blob.sha256, Blob.ref_count, literal_column("xmax = 0").label("inserted"))
+        # A row back from ref_count 0 may have lost its object to an interrupted collection
+        return {
+            row.sha256 for row in self.db.execute(stmt) if row.inserted or row.ref_count == counts[row.sha256]
+        }
+
+    def delete_unreferenced(self, shas: list[str] | None = None, limit: int = 100) -> list[str]:
+        """
+        Delete blob rows with no references left (among shas, or any), skipping rows
+        another transaction holds, and return their storage keys. The caller deletes
+        the objects before committing. Never commits.
+        """
+        unreferenced = select(Blob.sha256).where(Blob.ref_count == 0)
+        if shas is not None:
+            if not shas:
+                return []
+            unreferenced = unreferenced.where(Blob.sha256.in_(shas))
+        unreferenced = unreferenced.limit(limit).with_for_update(skip_locked=True)
+        return list(
+            self.db.scalars(
+                delete(Blob)
+                .where(Blob.sha256.in_(unreferenced.scalar_subquery()), Blob.ref_count == 0)
+                .returning(Blob.storage_key),
+                execution_options={"synchronize_session": False},
+            )
+        )
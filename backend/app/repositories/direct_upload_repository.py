@@ -0,0 +1,76 @@
+"""
+Repository for storage keys issued to direct-to-storage uploads.
+
+A key can only be registered if /files/presign issued it for that org and
+inspection. Registration locks the key's row, so concurrent registrations of
+the same key serialize, and records the created file, so a retry gets that
+file back instead of a second files row for the same object.
+"""
+from datetime import datetime
+from uuid import UUID
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+from app.models.direct_upload import DirectUpload
+
+
+class DirectUploadRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def create_many(self, uploads: list[dict], commit: bool = True) -> None:
+        """Record issued keys (storage_key, org_id, inspection_id, file_name, mime_type, expires_at)."""
+        if not uploads:
+            return
+        self.db.execute(insert(DirectUpload), uploads)
+        if commit:
+            self.db.commit()
+
+    def lock_many(self, org_id: UUID, inspection_id: UUID, storage_keys: list[str]) -> dict[str, DirectUpload]:
+        """
+        The issued uploads among storage_keys for this org and inspection, by key,
+        locked until the caller's transaction ends. Never commits.
+        """
+        if not storage_keys:
+            return {}
+        rows = self.db.scalars(
+            select(DirectUpload)
+            .where(
+                DirectUpload.storage_key.in_(storage_keys),
+                DirectUpload.org_id == org_id,
+                DirectUpload.inspection_id == inspection_id,
+            )
+            # Sorted so concurrent registrations lock rows in the same order
+            .order_by(DirectUpload.storage_key)
+            .with_for_update()
+        )
+        return {row.storage_key: row for row in rows}
+
+    def delete_many(self, storage_keys: list[str]) -> None:
+        """Forget issued keys (e.g. after their object was rejected). Never commits."""
+        if not storage_keys:
+            return
+        self.db.execute(
+            delete(DirectUpload).where(DirectUpload.storage_key.in_(storage_keys)),
+            execution_options={"synchronize_session": False},
+        )
+
+    def delete_expired(self, now: datetime, limit: int = 100) -> list[str]:
+        """
+        Delete unregistered uploads past their deadline, skipping rows another
+        transaction holds, and return their storage keys. The caller deletes any
+        uploaded objects before committing. Never commits.
+        """
+        expired = (
+            select(DirectUpload.storage_key)
+            .where(DirectUpload.file_id.is_(None), DirectUpload.expires_at <= now)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        return list(
+            self.db.scalars(
+                delete(DirectUpload)
+                .where(DirectUpload.storage_key.in_(expired.scalar_subquery()), DirectUpload.file_id.is_(None))
+                .returning(DirectUpload.storage_key),
+                execution_options={"synchronize_session": False},
+            )
+        )
@@ -1,9 +1,20 @@
 from datetime import datetime
 from uuid import UUID
+from sqlalchemy import delete, func, insert, select, update
 from sqlalchemy.orm import Session
 from app.models.file import File
 from app.models.inspection import Inspection
 
+# Statuses a file may move from into each target status. Guarding the UPDATE
+# on these makes transitions idempotent: a repeated or stale transition
+# matches no row and returns None.
+FILE_STATUS_TRANSITIONS: dict[str, tuple[str, ...]] = {
+    "pending": ("processing", "failed"),
+    "processing": ("pending",),
+    "completed": ("processing",),
+    "failed": ("pending", "processing"),
+}
+
 class FileRepository:
     def __init__(self, db: Session):
         self.db = db
@@ -17,6 +28,7 @@ class FileRepository:
         storage_key: str,
         file_size: int | None = None,
         mime_type: str | None = None,
+        content_sha256: str | None = None,
     ) -> File:
         f = File(
             inspection_id=inspection_id,
@@ -26,6 +38,7 @@ class FileRepository:
             storage_key=storage_key,
             file_size=file_size,
             mime_type=mime_type,
+            content_sha256=content_sha256,
             status="pending",
         )
         self.db.add(f)
@@ -33,6 +46,34 @@ class FileRepository:
         self.db.refresh(f)
         return f
 
+    def create_many(self, files: list[dict], commit: bool = True) -> list[File]:
+        """
+        Insert a batch of files with a single INSERT ... RETURNING.
+        Each dict takes the same fields as create(). Returns rows in input order.
+        """
+        if not files:
+            return []
+        rows = [{"file_size": None, "mime_type": None, "content_sha256": None, **f, "status": "pending"} for f in files]
+        created = list(
+            self.db.scalars(
+                insert(File).returning(File, sort_by_parameter_order=True),
+                rows,
+            )
+        )
+        if commit:
+            self.db.commit()
+        return created
+
+    def delete(self, file_id: UUID, commit: bool = True) -> File | None:
+        """Delete a file (findings and jobs cascade). Returns the deleted row, or None."""
+        f = self.db.scalars(
+            delete(File).where(File.id == file_id).returning(File),
+            execution_options={"synchronize_session": False},
+        ).first()
+        if commit:
+            self.db.commit()
+        return f
+
     def get_by_id(self, file_id: UUID) -> File | None:
         return self.db.query(File).filter(File.id == file_id).first()
 
@@ -45,21 +86,41 @@ class FileRepository:
         status: str,
         error_message: str | None = None,
         processed_at: datetime | None = None,
+        commit: bool = True,
     ) -> File | None:
-        f = self.db.query(File).filter(File.id == file_id).first()
-        if not f:
-            return None
-        f.status = status
+        """
+        Move a file to `status` with a single UPDATE ... RETURNING.
+        Returns None if the file doesn't exist or isn't in an allowed source status.
+        """
+        values: dict = {"status": status}
         if error_message is not None:
-            f.error_message = error_message
+            values["error_message"] = error_message
         if processed_at is not None:
-            f.processed_at = processed_at
+            values["processed_at"] = processed_at
         elif status == "completed":
-            f.processed_at = datetime.utcnow()
-        self.db.commit()
-        self.db.refresh(f)
+            values["processed_at"] = func.now()
+        stmt = (
+            update(File)
+            .where(File.id == file_id, File.status.in_(FILE_STATUS_TRANSITIONS[status]))
+            .values(**values)
+            .returning(File)
+        )
+        f = self.db.scalars(stmt, execution_options={"synchronize_session": False}).first()
+        if commit:
+            self.db.commit()
         return f
 
+    def status_counts(self, inspection_id: UUID) -> dict[str, int]:
+        """Total/completed/failed file counts for an inspection in one query."""
+        row = self.db.execute(
+            select(
+                func.count(File.id).label("total"),
+                func.count(File.id).filter(File.status == "completed").label("completed"),
+                func.count(File.id).filter(File.status == "failed").label("failed"),
+            ).where(File.inspection_id == inspection_id)
+        ).one()
+        return {"total": row.total, "completed": row.completed, "failed": row.failed}
+
     def count_by_inspection_and_status(self, inspection_id: UUID, status: str) -> int:
         return self.db.query(File).filter(
             File.inspection_id == inspection_id,
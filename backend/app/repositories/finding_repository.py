@@ -1,9 +1,37 @@
 """
 Repository for Finding CRUD operations.
 """
+from collections.abc import Iterator
+from datetime import datetime, timezone
 from uuid import UUID
+from sqlalchemy import case, delete, func, insert, literal_column, null, select, tuple_, update
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
+from app.models.file import File
+from app.models.human_review import HumanReview
 from app.models.finding import Finding
+from app.models.inspection import Inspection
+
+# Private-use characters ts_headline puts around matched terms in search snippets;
+# callers HTML-escape the snippet and then turn them into markup
+SNIPPET_START = "\ue000"
+SNIPPET_STOP = "\ue001"
+
+# Every row in a bulk insert must carry the same keys for executemany batching.
+_FINDING_DEFAULTS = {
+    "severity": None,
+    "confidence_score": None,
+    "needs_review": False,
+    "description": None,
+    "ai_caption": None,
+    "transcription": None,
+    "location_code": None,
+    "equipment_id": None,
+    "extra_metadata": {},
+    "embedding": None,
+    "analysis_version": None,
+    "embedding_model": None,
+}
 
 
 class FindingRepository:
@@ -46,6 +74,50 @@ class FindingRepository:
         self.db.refresh(finding)
         return finding
 
+    def create_many(self, findings: list[dict], commit: bool = True) -> list[UUID]:
+        """
+        Insert a batch of findings with a single multi-row INSERT ... RETURNING id.
+        Each dict takes the same fields as create(). Returns ids in input order.
+        Pass commit=False to make the insert part of a larger transaction.
+        """
+        if not findings:
+            return []
+        rows = [{**_FINDING_DEFAULTS, **f} for f in findings]
+        for row in rows:
+            row["extra_metadata"] = row["extra_metadata"] or {}
+        result = self.db.execute(
+            insert(Finding).returning(Finding.id, sort_by_parameter_order=True),
+            rows,
+        )
+        ids = list(result.scalars())
+        if commit:
+            self.db.commit()
+        return ids
+
+    def update_many(self, changes: list[dict], commit: bool = True) -> None:
+        """
+        Apply per-row changes, each a dict of id plus the columns to set, as one
+        executemany UPDATE. updated_at is bumped so exports and finalize see them.
+        """
+        if not changes:
+            return
+        now = datetime.now(timezone.utc)
+        self.db.execute(update(Finding), [{**change, "updated_at": now} for change in changes])
+        if commit:
+            self.db.commit()
+
+    def delete_by_files(self, file_ids: list[UUID], commit: bool = True) -> int:
+        """Delete every finding of the given files (their reviews cascade). Returns the row count."""
+        if not file_ids:
+            return 0
+        result = self.db.execute(
+            delete(Finding).where(Finding.file_id.in_(file_ids)),
+            execution_options={"synchronize_session": False},
+        )
+        if commit:
+            self.db.commit()
+        return result.rowcount
+
     def get_by_id(self, finding_id: UUID) -> Finding | None:
         return self.db.query(Finding).filter(Finding.id == finding_id).first()
 
@@ -57,5 +129,292 @@ class FindingRepository:
             .all()
         )
 
+    def aggregate_by_inspection(self, inspection_id: UUID, severity_weights: dict[str, int]) -> dict:
+        """
+        One aggregate query over an inspection's findings: total, highest severity
+        weight, whether any needs review, and how many changed since the
+        inspection was last finalized.
+        """
+        weight = case(
+            *[(Finding.severity == severity, w) for severity, w in severity_weights.items()],
+            else_=0,
+        )
+        finalized_at = (
+            select(Inspection.processing_completed_at)
+            .where(Inspection.id == inspection_id)
+            .scalar_subquery()
+        )
+        row = self.db.execute(
+            select(
+                func.count(Finding.id).label("total"),
+                func.coalesce(func.max(weight), 0).label("max_weight"),
+                func.coalesce(func.bool_or(Finding.needs_review), False).label("needs_review"),
+                func.count(Finding.id).filter(Finding.updated_at > finalized_at).label("changed_since_finalized"),
+            ).where(Finding.inspection_id == inspection_id)
+        ).one()
+        return row._asdict()
+
+    def lock_for_review(self, org_id: UUID, finding_ids: list[UUID]) -> list[Row]:
+        """
+        Lock the org's findings among finding_ids (SELECT ... FOR UPDATE OF findings)
+        and return their current category/severity. Ids of other orgs are left out.
+        """
+        return list(
+            self.db.execute(
+                select(Finding.id, Finding.inspection_id, Finding.category, Finding.severity)
+                .where(Finding.id.in_(finding_ids), Finding.org_id == org_id)
+                .with_for_update()
+            )
+        )
+
+    def review_queue_page(
+        self,
+        org_id: UUID,
+        limit: int,
+        after: tuple[datetime, UUID] | None = None,
+    ) -> list[Row]:
+        """
+        The org's findings needing review (queue columns only), newest first, with
+        their inspection's id and name. Keyset-paged: pass the (created_at, id) of
+        the last row seen.
+        """
+        stmt = (
+            select(
+                Finding.id,
+                Finding.ai_caption,
+                Finding.description,
+                Finding.category,
+                Finding.confidence_score,
+                Finding.severity,
+                Finding.created_at,
+                Finding.inspection_id,
+                Inspection.name.label("inspection_name"),
+            )
+            .join(Inspection, Inspection.id == Finding.inspection_id)
+            # "= true" rather than IS TRUE, so the partial (org_id, created_at, id) index applies
+            .where(Finding.org_id == org_id, Finding.needs_review == True)  # noqa: E712
+        )
+        if after is not None:
+            stmt = stmt.where(tuple_(Finding.created_at, Finding.id) < tuple_(*after))
+        return list(self.db.execute(stmt.order_by(Finding.created_at.desc(), Finding.id.desc()).limit(limit)))
+
+    def search(
+        self,
+        org_id: UUID,
+        query: str,
+        embedding: list[float] | None,
+        embedding_model: str,
+        limit: int,
+        offset: int = 0,
+        rrf_k: int = 60,
+        iterative_scan: str | None = None,
+    ) -> list[Row]:
+        """
+        One page of the org's findings matching `query`, fused by reciprocal rank
+        from a full-text leg (GIN on org_id, search_vector; ranked by ts_rank_cd)
+        and, given the query's embedding, a vector leg (HNSW cosine distance).
+        Each leg contributes its top offset + limit hits, so the page is exact
+        within that window. Rows carry both ranks (None when a leg missed the
+        finding), the fused score and a ts_headline snippet of the raw finding
+        text with SNIPPET_START/SNIPPET_STOP around matched terms.
+        """
+        depth = offset + limit
+        tsquery = func.websearch_to_tsquery("english", query)
+        text_score = func.ts_rank_cd(Finding.search_vector, tsquery, 32)
+        text_top = (
+            select(Finding.id, text_score.label("score"))
+            .where(Finding.org_id == org_id, Finding.search_vector.op("@@")(tsquery))
+            .order_by(text_score.desc(), Finding.id)
+            .limit(depth)
+            .subquery()
+        )
+        text_hits = select(
+            text_top.c.id,
+            func.row_number().over(order_by=(text_top.c.score.desc(), text_top.c.id)).label("rank"),
+        ).cte("text_hits")
+        text_term = func.coalesce(1.0 / (rrf_k + text_hits.c.rank), 0.0)
+
+        if embedding is None:
+            fused = select(
+                text_hits.c.id,
+                text_term.label("score"),
+                text_hits.c.rank.label("text_rank"),
+                null().label("vector_rank"),
+            )
+        else:
+            # The HNSW scan visits ef_search candidates before the org filter applies
+            self.db.execute(select(func.set_config("hnsw.ef_search", str(max(40, min(depth, 1000))), True)))
+            if iterative_scan:
+                # pgvector >= 0.8: keep scanning until depth rows pass the org filter
+                self.db.execute(select(func.set_config("hnsw.iterative_scan", iterative_scan, True)))
+            distance = Finding.embedding.cosine_distance(embedding)
+            vector_top = (
+                select(Finding.id, distance.label("distance"))
+                .where(Finding.org_id == org_id, Finding.embedding_model == embedding_model)
+                .order_by(distance)
+                .limit(depth)
+                .subquery()
+            )
+            vector_hits = select(
+                vector_top.c.id,
+                func.row_number().over(order_by=(vector_top.c.distance, vector_top.c.id)).label("rank"),
+            ).cte("vector_hits")
+            vector_term = func.coalesce(1.0 / (rrf_k + vector_hits.c.rank), 0.0)
+            fused = select(
+                func.coalesce(text_hits.c.id, vector_hits.c.id).label("id"),
+                (text_term + vector_term).label("score"),
+                text_hits.c.rank.label("text_rank"),
+                vector_hits.c.rank.label("vector_rank"),
+            ).select_from(text_hits.join(vector_hits, text_hits.c.id == vector_hits.c.id, full=True))
+
+        page = fused.order_by(literal_column("score").desc(), literal_column("id")).offset(offset).limit(limit).subquery()
+        document = func.concat_ws(" … ", Finding.ai_caption, Finding.description, Finding.transcription)
+        # ts_headline re-parses the document, so it only runs on the page's rows
+        snippet = func.ts_headline(
+            "english",
+            document,
+            tsquery,
+            f'StartSel="{SNIPPET_START}", StopSel="{SNIPPET_STOP}", '
+            'MaxWords=35, MinWords=15, MaxFragments=2, FragmentDelimiter=" … "',
+        )
+        return list(
+            self.db.execute(
+                select(
+                    Finding.id,
+                    Finding.inspection_id,
+                    Finding.file_id,
+                    Finding.category,
+                    Finding.severity,
+                    Finding.confidence_score,
+                    Finding.needs_review,
+                    Finding.created_at,
+                    page.c.score,
+                    page.c.text_rank,
+                    page.c.vector_rank,
+                    snippet.label("snippet"),
+                )
+                .join(page, page.c.id == Finding.id)
+                .order_by(page.c.score.desc(), Finding.id)
+            )
+        )
+
+    def list_for_narrative(self, inspection_id: UUID) -> list[Row]:
+        """Only the columns narrative generation reads (no embeddings or metadata)."""
+        return list(
+            self.db.execute(
+                select(
+                    Finding.id,
+                    Finding.category,
+                    Finding.severity,
+                    Finding.ai_caption,
+                    Finding.transcription,
+                    Finding.description,
+                    Finding.created_at,
+                ).where(Finding.inspection_id == inspection_id)
+            )
+        )
+
+    def change_stamp(self, inspection_id: UUID) -> tuple[int, object]:
+        """(count, latest updated_at) of an inspection's findings; changes whenever any finding does."""
+        row = self.db.execute(
+            select(func.count(Finding.id), func.max(Finding.updated_at)).where(
+                Finding.inspection_id == inspection_id
+            )
+        ).one()
+        return row[0], row[1]
+
+    def iter_for_export(self, inspection_id: UUID, batch_size: int = 500) -> Iterator[Row]:
+        """
+        Stream an inspection's findings (with their file name, without embeddings)
+        oldest first, fetching batch_size rows at a time from a server-side cursor.
+        """
+        stmt = (
+            select(*_export_columns())
+            .outerjoin(File, File.id == Finding.file_id)
+            .where(Finding.inspection_id == inspection_id)
+            .order_by(Finding.created_at, Finding.id)
+            .execution_options(yield_per=batch_size)
+        )
+        yield from self.db.execute(stmt)
+
+    def iter_for_org_export(
+        self,
+        org_id: UUID,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        categories: list[str] | None = None,
+        severities: list[str] | None = None,
+        include_embedding: bool = False,
+        batch_size: int = 1000,
+    ) -> Iterator[Row]:
+        """
+        Stream every finding of an org matching the filters, oldest first, from a
+        server-side cursor; memory use is bounded by batch_size whatever the total.
+        """
+        columns = [*_export_columns(), Finding.inspection_id]
+        if include_embedding:
+            columns.append(Finding.embedding)
+        stmt = (
+            select(*columns)
+            .outerjoin(File, File.id == Finding.file_id)
+            .where(Finding.org_id == org_id)
+        )
+        if since is not None:
+            stmt = stmt.where(Finding.created_at >= since)
+        if until is not None:
+            stmt = stmt.where(Finding.created_at < until)
+        if categories:
+            stmt = stmt.where(Finding.category.in_(categories))
+        if severities:
+            stmt = stmt.where(Finding.severity.in_(severities))
+        stmt = stmt.order_by(Finding.created_at, Finding.id).execution_options(yield_per=batch_size)
+        yield from self.db.execute(stmt)
+
+    def list_reviewed_embeddings(
+        self,
+        embedding_model: str,
+        file_types: tuple[str, ...] = ("audio", "pdf"),
+        limit: int = 5000,
+    ) -> list[Row]:
+        """
+        (finding_id, embedding, corrected_category) of the most recently reviewed
+        findings of `file_types` files embedded with `embedding_model`, newest
+        review first. A finding reviewed more than once appears once per review.
+        """
+        return list(
+            self.db.execute(
+                select(Finding.id.label("finding_id"), Finding.embedding, HumanReview.corrected_category)
+                .join(HumanReview, HumanReview.finding_id == Finding.id)
+                .join(File, File.id == Finding.file_id)
+                .where(
+                    Finding.embedding.is_not(None),
+                    Finding.embedding_model == embedding_model,
+                    File.file_type.in_(file_types),
+                )
+                .order_by(HumanReview.reviewed_at.desc())
+                .limit(limit)
+            )
+        )
+
     def count_by_inspection(self, inspection_id: UUID) -> int:
         return self.db.query(Finding).filter(Finding.inspection_id == inspection_id).count()
+
+
+def _export_columns() -> list:
+    """Finding columns (plus file name) included in exports; never the embedding."""
+    return [
+        Finding.id,
+        Finding.file_id,
+        File.file_name,
+        Finding.category,
+        Finding.severity,
+        Finding.confidence_score,
+        Finding.needs_review,
+        Finding.description,
+        Finding.ai_caption,
+        Finding.transcription,
+        Finding.location_code,
+        Finding.equipment_id,
+        Finding.extra_metadata,
+        Finding.created_at,
+    ]
@@ -0,0 +1,19 @@
+"""
+Repository for human reviews of findings.
+"""
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from app.models.human_review import HumanReview
+
+
+class HumanReviewRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def create_many(self, reviews: list[dict], commit: bool = True) -> int:
+        """Insert review rows (HumanReview columns) as one executemany INSERT. Returns the count."""
+        if reviews:
+            self.db.execute(insert(HumanReview), reviews)
+        if commit:
+            self.db.commit()
+        return len(reviews)
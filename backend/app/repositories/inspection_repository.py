@@ -1,5 +1,9 @@
 from uuid import UUID
+from sqlalchemy import case, exists, func, or_, select, update
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
+from app.models.file import File
+from app.models.finding import Finding
 from app.models.inspection import Inspection
 
 class InspectionRepository:
@@ -28,14 +32,66 @@ class InspectionRepository:
             .all()
         )
 
-    def update_status(self, inspection_id: UUID, status: str, **kwargs) -> Inspection | None:
-        insp = self.db.query(Inspection).filter(Inspection.id == inspection_id).first()
-        if not insp:
-            return None
-        insp.status = status
-        for k, v in kwargs.items():
-            if hasattr(insp, k):
-                setattr(insp, k, v)
-        self.db.commit()
-        self.db.refresh(insp)
-        return insp
\ No newline at end of file
+    def update_status(
+        self,
+        inspection_id: UUID,
+        status: str,
+        from_statuses: tuple[str, ...] | None = None,
+        commit: bool = True,
+        **kwargs,
+    ) -> Inspection | None:
+        """
+        Update status (and any other columns in kwargs) with a single UPDATE ... RETURNING.
+        If from_statuses is given, only an inspection currently in one of them is updated.
+        """
+        columns = Inspection.__table__.columns
+        values = {k: v for k, v in kwargs.items() if k in columns}
+        values["status"] = status
+        stmt = update(Inspection).where(Inspection.id == inspection_id)
+        if from_statuses is not None:
+            stmt = stmt.where(Inspection.status.in_(from_statuses))
+        stmt = stmt.values(**values).returning(Inspection)
+        insp = self.db.scalars(stmt, execution_options={"synchronize_session": False}).first()
+        if commit:
+            self.db.commit()
+        return insp
+
+    def refresh_review_state(
+        self,
+        inspection_ids: list[UUID],
+        severity_weights: dict[str, int],
+        commit: bool = True,
+    ) -> list[Row]:
+        """
+        Recompute risk_level and review status of finalized inspections from their
+        findings in one UPDATE (no narrative). Status is 'review' while a finding
+        needs review or a file failed, else 'completed'. Returns (id, status, risk_level).
+        """
+        if not inspection_ids:
+            return []
+        weight = case(
+            *[(Finding.severity == severity, w) for severity, w in severity_weights.items()],
+            else_=0,
+        )
+        max_weight = (
+            select(func.coalesce(func.max(weight), 0))
+            .where(Finding.inspection_id == Inspection.id)
+            .scalar_subquery()
+        )
+        pending_review = exists().where(Finding.inspection_id == Inspection.id, Finding.needs_review.is_(True))
+        failed_files = exists().where(File.inspection_id == Inspection.id, File.status == "failed")
+        rows = list(
+            self.db.execute(
+                update(Inspection)
+                .where(Inspection.id.in_(inspection_ids), Inspection.processing_completed_at.is_not(None))
+                .values(
+                    risk_level=case({w: severity for severity, w in severity_weights.items()}, value=max_weight),
+                    status=case((or_(pending_review, failed_files), "review"), else_="completed"),
+                )
+                .returning(Inspection.id, Inspection.status, Inspection.risk_level),
+                execution_options={"synchronize_session": False},
+            )
+        )
+        if commit:
+            self.db.commit()
+        return rows
@@ -0,0 +1,34 @@
+"""
+Repository for cached narrative chunk summaries.
+"""
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from app.models.narrative_summary import NarrativeSummary
+
+
+class NarrativeSummaryRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_many(self, content_hashes: list[str]) -> dict[str, str]:
+        """Cached summaries for the given hashes, in one query."""
+        if not content_hashes:
+            return {}
+        rows = self.db.execute(
+            select(NarrativeSummary.content_hash, NarrativeSummary.summary).where(
+                NarrativeSummary.content_hash.in_(set(content_hashes))
+            )
+        )
+        return {row.content_hash: row.summary for row in rows}
+
+    def put_many(self, model: str, summaries: dict[str, str], commit: bool = True) -> None:
+        """Store summaries by hash; existing entries are left as they are."""
+        if summaries:
+            self.db.execute(
+                pg_insert(NarrativeSummary)
+                .values([{"content_hash": h, "model": model, "summary": s} for h, s in summaries.items()])
+                .on_conflict_do_nothing(index_elements=[NarrativeSummary.content_hash])
+            )
+        if commit:
+            self.db.commit()
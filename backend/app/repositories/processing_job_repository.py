@@ -0,0 +1,167 @@
+"""
+Repository for processing job bookkeeping.
+"""
+from datetime import timedelta
+from uuid import UUID
+from sqlalchemy import case, func, insert, or_, select, update
+from sqlalchemy.orm import Session
+from app.models.processing_job import ProcessingJob
+
+
+class ProcessingJobRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def create_many(self, jobs: list[dict], commit: bool = True) -> list[ProcessingJob]:
+        """
+        Insert one job per dict (file_id, inspection_id, org_id, file_type, priority)
+        with a single INSERT ... RETURNING.
+        """
+        if not jobs:
+            return []
+        created = list(
+            self.db.scalars(
+                insert(ProcessingJob).returning(ProcessingJob, sort_by_parameter_order=True),
+                jobs,
+            )
+        )
+        if commit:
+            self.db.commit()
+        return created
+
+    def mark_running(
+        self,
+        job_id: UUID,
+        owner: str,
+        lease_seconds: float,
+        commit: bool = True,
+    ) -> ProcessingJob | None:
+        """
+        queued → running for the lease owner, counting the attempt.
+        Returns None if the job was not queued or its lease moved to another worker.
+        """
+        job = self.db.scalars(
+            update(ProcessingJob)
+            .where(
+                ProcessingJob.id == job_id,
+                ProcessingJob.status == "queued",
+                ProcessingJob.lease_owner == owner,
+            )
+            .values(
+                status="running",
+                started_at=func.now(),
+                attempts=ProcessingJob.attempts + 1,
+                lease_expires_at=func.now() + timedelta(seconds=lease_seconds),
+            )
+            .returning(ProcessingJob),
+            execution_options={"synchronize_session": False},
+        ).first()
+        if commit:
+            self.db.commit()
+        return job
+
+    def mark_finished(self, job_id: UUID, status: str, owner: str, commit: bool = True) -> ProcessingJob | None:
+        """
+        running → completed/failed, releasing the lease. Returns None if the job
+        was not running or the lease was lost; the caller must then discard its results.
+        """
+        job = self.db.scalars(
+            update(ProcessingJob)
+            .where(
+                ProcessingJob.id == job_id,
+                ProcessingJob.status == "running",
+                ProcessingJob.lease_owner == owner,
+            )
+            .values(status=status, finished_at=func.now(), lease_owner=None, lease_expires_at=None)
+            .returning(ProcessingJob),
+            execution_options={"synchronize_session": False},
+        ).first()
+        if commit:
+            self.db.commit()
+        return job
+
+    def renew_leases(self, owner: str, job_ids: list[UUID], lease_seconds: float, commit: bool = True) -> int:
+        """
+        Extend the owner's leases on the given queued or running jobs (those it still
+        works on). Returns the count.
+        """
+        if not job_ids:
+            return 0
+        result = self.db.execute(
+            update(ProcessingJob)
+            .where(
+                ProcessingJob.id.in_(job_ids),
+                ProcessingJob.lease_owner == owner,
+                ProcessingJob.status.in_(("queued", "running")),
+            )
+            .values(lease_expires_at=func.now() + timedelta(seconds=lease_seconds)),
+            execution_options={"synchronize_session": False},
+        )
+        if commit:
+            self.db.commit()
+        return result.rowcount
+
+    def release_leases(self, owner: str, job_ids: list[UUID] | None = None, commit: bool = True) -> int:
+        """
+        Expire the owner's leases now (all of them, e.g. on shutdown, or just job_ids)
+        so a sweeper reclaims the jobs right away. Returns the count.
+        """
+        stmt = update(ProcessingJob).where(
+            ProcessingJob.lease_owner == owner, ProcessingJob.status.in_(("queued", "running"))
+        )
+        if job_ids is not None:
+            if not job_ids:
+                return 0
+            stmt = stmt.where(ProcessingJob.id.in_(job_ids))
+        result = self.db.execute(
+            stmt.values(lease_expires_at=func.now()),
+            execution_options={"synchronize_session": False},
+        )
+        if commit:
+            self.db.commit()
+        return result.rowcount
+
+    def reclaim_expired(
+        self,
+        owner: str,
+        lease_seconds: float,
+        max_attempts: int,
+        limit: int = 500,
+        commit: bool = True,
+    ) -> list[ProcessingJob]:
+        """
+        Take over queued/running jobs whose lease expired (or that never had one).
+        Jobs that already used max_attempts claims become 'dead'; the rest go back
+        to 'queued' under a fresh lease for `owner`, who must dispatch them.
+        Concurrent sweepers skip each other's rows.
+        """
+        expired = (
+            select(ProcessingJob.id)
+            .where(
+                ProcessingJob.status.in_(("queued", "running")),
+                or_(ProcessingJob.lease_expires_at.is_(None), ProcessingJob.lease_expires_at < func.now()),
+            )
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        exhausted = ProcessingJob.attempts >= max_attempts
+        jobs = list(
+            self.db.scalars(
+                update(ProcessingJob)
+                .where(ProcessingJob.id.in_(expired.scalar_subquery()))
+                .values(
+                    status=case((exhausted, "dead"), else_="queued"),
+                    lease_owner=case((exhausted, None), else_=owner),
+                    lease_expires_at=case(
+                        (exhausted, None),
+                        else_=func.now() + timedelta(seconds=lease_seconds),
+                    ),
+                    finished_at=case((exhausted, func.now()), else_=None),
+                )
+                .returning(ProcessingJob),
+                execution_options={"synchronize_session": False},
+            )
+        )
+        if commit:
+            self.db.commit()
+        return jobs
@@ -0,0 +1,142 @@
+"""
+Repository for rendered report exports.
+"""
+from datetime import timedelta
+from uuid import UUID
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from app.models.report_export import ReportExport
+
+
+class ReportExportRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_or_create(
+        self,
+        inspection_id: UUID,
+        org_id: UUID,
+        format: str,
+        version: str,
+    ) -> tuple[ReportExport, bool]:
+        """
+        The export for this (inspection, format, version), inserting a queued row
+        if there is none, and marks it the most recently requested version.
+        Returns (export, created); only the creator should enqueue rendering. Commits.
+        """
+        created = self.db.scalars(
+            pg_insert(ReportExport)
+            .values(inspection_id=inspection_id, org_id=org_id, format=format, version=version, status="queued")
+            .on_conflict_do_nothing(index_elements=["inspection_id", "format", "version"])
+            .returning(ReportExport),
+            execution_options={"synchronize_session": False},
+        ).first()
+        if created is None:
+            existing = self.db.scalars(
+                update(ReportExport)
+                .where(
+                    ReportExport.inspection_id == inspection_id,
+                    ReportExport.format == format,
+                    ReportExport.version == version,
+                )
+                .values(requested_at=func.now())
+                .returning(ReportExport),
+                execution_options={"synchronize_session": False},
+            ).one()
+            self.db.commit()
+            return existing, False
+        self.db.commit()
+        return created, True
+
+    def get_by_id(self, export_id: UUID, org_id: UUID | None = None) -> ReportExport | None:
+        q = self.db.query(ReportExport).filter(ReportExport.id == export_id)
+        if org_id is not None:
+            q = q.filter(ReportExport.org_id == org_id)
+        return q.first()
+
+    def _transition(self, export_id: UUID, from_status: str, commit: bool, **values) -> ReportExport | None:
+        export = self.db.scalars(
+            update(ReportExport)
+            .where(ReportExport.id == export_id, ReportExport.status == from_status)
+            .values(**values)
+            .returning(ReportExport),
+            execution_options={"synchronize_session": False},
+        ).first()
+        if commit:
+            self.db.commit()
+        return export
+
+    def requeue_failed(self, export_id: UUID, commit: bool = True) -> ReportExport | None:
+        """failed → queued. Returns None if the export was not failed."""
+        return self._transition(export_id, "failed", commit, status="queued", error_message=None)
+
+    def requeue_stale(self, export_id: UUID, older_than: timedelta, commit: bool = True) -> ReportExport | None:
+        """
+        queued/running → queued for an export whose task was lost (e.g. the process
+        restarted). created_at is reset so it is not requeued again right away.
+        """
+        export = self.db.scalars(
+            update(ReportExport)
+            .where(
+                ReportExport.id == export_id,
+                ReportExport.status.in_(("queued", "running")),
+                ReportExport.created_at < func.now() - older_than,
+            )
+            .values(status="queued", created_at=func.now())
+            .returning(ReportExport),
+            execution_options={"synchronize_session": False},
+        ).first()
+        if commit:
+            self.db.commit()
+        return export
+
+    def mark_running(self, export_id: UUID, commit: bool = True) -> ReportExport | None:
+        """queued → running. Returns None if the export was not queued."""
+        return self._transition(export_id, "queued", commit, status="running")
+
+    def mark_completed(
+        self,
+        export_id: UUID,
+        storage_key: str,
+        file_size: int,
+        commit: bool = True,
+    ) -> ReportExport | None:
+        return self._transition(
+            export_id,
+            "running",
+            commit,
+            status="completed",
+            storage_key=storage_key,
+            file_size=file_size,
+            completed_at=func.now(),
+        )
+
+    def mark_failed(self, export_id: UUID, error_message: str, commit: bool = True) -> ReportExport | None:
+        return self._transition(export_id, "running", commit, status="failed", error_message=error_message)
+
+    def delete_superseded(self, export: ReportExport, commit: bool = True) -> list[str]:
+        """
+        Delete finished exports of the same inspection and format requested before
+        this one. Deletes nothing if a version was requested after it (this render
+        finished late). Returns their storage keys so the caller can remove the objects.
+        """
+        same_report = (
+            ReportExport.inspection_id == export.inspection_id,
+            ReportExport.format == export.format,
+        )
+        newer = select(ReportExport.id).where(*same_report, ReportExport.requested_at > export.requested_at)
+        keys = self.db.scalars(
+            delete(ReportExport)
+            .where(
+                *same_report,
+                ReportExport.requested_at < export.requested_at,
+                ReportExport.status.in_(("completed", "failed")),
+                ~newer.exists(),
+            )
+            .returning(ReportExport.storage_key),
+            execution_options={"synchronize_session": False},
+        ).all()
+        if commit:
+            self.db.commit()
+        return [key for key in keys if key]
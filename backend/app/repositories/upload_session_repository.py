@@ -0,0 +1,34 @@
+"""
+Repository for resumable upload sessions.
+"""
+from datetime import datetime
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from app.models.upload_session import UploadSession
+
+
+class UploadSessionRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def delete_expired(self, now: datetime, limit: int = 100) -> list[str]:
+        """
+        Delete sessions past their expiry, skipping rows another transaction holds
+        (e.g. a chunk being written), and return their ids. The caller removes the
+        partial files before committing. Never commits.
+        """
+        expired = (
+            select(UploadSession.id)
+            .where(UploadSession.expires_at <= now)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        return [
+            str(upload_id)
+            for upload_id in self.db.scalars(
+                delete(UploadSession)
+                .where(UploadSession.id.in_(expired.scalar_subquery()), UploadSession.expires_at <= now)
+                .returning(UploadSession.id),
+                execution_options={"synchronize_session": False},
+            )
+        ]
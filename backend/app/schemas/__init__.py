@@ -5,6 +5,7 @@ from app.schemas.file import File, FileCreate, FileUpdate
 from app.schemas.finding import Finding, FindingCreate, FindingUpdate
 from app.schemas.human_review import HumanReview, HumanReviewCreate
 from app.schemas.usage_log import UsageLog, UsageLogCreate
+from app.schemas.processing_job import ProcessingJob, ProcessingJobCreate
 
 __all__ = [
     "Organization",
@@ -26,4 +27,6 @@ __all__ = [
     "HumanReviewCreate",
     "UsageLog",
     "UsageLogCreate",
+    "ProcessingJob",
+    "ProcessingJobCreate",
 ]
@@ -10,6 +10,7 @@ class FileBase(BaseModel):
     storage_key: str
     file_size: Optional[int] = None
     mime_type: Optional[str] = None
+    content_sha256: Optional[str] = None
 
 class FileCreate(FileBase):
     inspection_id: UUID
@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+from uuid import UUID
+
+class ProcessingJobBase(BaseModel):
+    file_id: UUID
+    inspection_id: UUID
+    file_type: str
+
+class ProcessingJobCreate(ProcessingJobBase):
+    pass
+
+class ProcessingJob(ProcessingJobBase):
+    id: UUID
+    status: str
+    attempts: int = 0
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
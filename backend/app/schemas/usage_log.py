@@ -11,14 +11,19 @@ class UsageLogBase(BaseModel):
     output_tokens: Optional[int] = None
     processing_time_ms: Optional[int] = None
     cost_usd: Optional[Decimal] = None
+    bytes_sent: Optional[int] = None
+    bytes_received: Optional[int] = None
+    status: Optional[str] = None
+    http_status: Optional[int] = None
+    retry_count: Optional[int] = 0
 
 class UsageLogCreate(UsageLogBase):
-    inspection_id: UUID
+    inspection_id: Optional[UUID] = None
     file_id: Optional[UUID] = None
 
 class UsageLog(UsageLogBase):
     id: UUID
-    inspection_id: UUID
+    inspection_id: Optional[UUID] = None
     file_id: Optional[UUID] = None
     timestamp: datetime
 
@@ -4,14 +4,13 @@ Audio processing: Whisper transcription + BART classification.
 import logging
 
 from app.services.hf_client import HFInferenceClient
-from app.services.image_processor import (
-    DEFECT_CATEGORIES,
-    CATEGORY_SEVERITY,
-    CONFIDENCE_THRESHOLD,
-)
+from app.services.image_processor import CLASSIFIER_MODEL
+from app.services.org_profiles import DEFAULT_PROFILE, ClassificationProfile
 
 logger = logging.getLogger(__name__)
 
+TRANSCRIPTION_MODEL = "openai/whisper-large-v3"
+
 
 class AudioProcessor:
     def __init__(self, hf: HFInferenceClient):
@@ -20,8 +19,9 @@ class AudioProcessor:
     async def transcribe(self, audio_bytes: bytes) -> str:
         """Transcribe audio using Whisper."""
         result = await self.hf.inference_binary(
-            "openai/whisper-large-v3",
+            TRANSCRIPTION_MODEL,
             audio_bytes,
+            task="transcription",
         )
         # result: {"text": "..."} or [{"text": "..."}]
         if isinstance(result, dict):
@@ -30,8 +30,8 @@ class AudioProcessor:
             return result[0].get("text", "")
         return ""
 
-    async def classify_transcription(self, text: str) -> dict:
-        """Classify transcription text into defect categories."""
+    async def classify_transcription(self, text: str, profile: ClassificationProfile = DEFAULT_PROFILE) -> dict:
+        """Classify transcription text into the profile's defect categories."""
         if not text or len(text.strip()) < 10:
             return {
                 "category": "clear/no defect",
@@ -42,21 +42,22 @@ class AudioProcessor:
             }
 
         result = await self.hf.inference_json(
-            "facebook/bart-large-mnli",
+            CLASSIFIER_MODEL,
             {
                 "inputs": text[:1024],  # truncate to avoid token limits
-                "parameters": {"candidate_labels": DEFECT_CATEGORIES},
+                "parameters": {"candidate_labels": list(profile.categories)},
             },
+            task="zero_shot_classification",
         )
-        labels = result.get("labels", DEFECT_CATEGORIES)
-        scores = result.get("scores", [0.0] * len(DEFECT_CATEGORIES))
+        labels = result.get("labels", list(profile.categories))
+        scores = result.get("scores", [0.0] * len(profile.categories))
         top_label = labels[0]
         top_score = scores[0]
 
         return {
             "category": top_label,
             "confidence": top_score,
-            "severity": CATEGORY_SEVERITY.get(top_label, "medium"),
-            "needs_review": top_score < CONFIDENCE_THRESHOLD,
+            "severity": profile.severity_of(top_label),
+            "needs_review": profile.needs_review(top_score),
             "all_scores": dict(zip(labels, scores)),
         }
@@ -25,6 +25,7 @@ class EmbeddingService:
         result = await self.hf.inference_json(
             MODEL,
             {"inputs": truncated},
+            task="embedding",
         )
 
         # HF returns a flat list of floats or a nested list
@@ -41,3 +42,14 @@ class EmbeddingService:
             logger.warning("Embedding dim %d != expected %d", len(embedding), EMBEDDING_DIM)
 
         return embedding
+
+    async def generate_embeddings(self, texts: list[str]) -> list[list[float]]:
+        """Embed several texts in one request (e.g. fixed prototype sentences)."""
+        result = await self.hf.inference_json(
+            MODEL,
+            {"inputs": [text[:2000] for text in texts]},
+            task="embedding",
+        )
+        if not isinstance(result, list) or len(result) != len(texts):
+            raise ValueError(f"Unexpected batch embedding response: {type(result)}")
+        return result
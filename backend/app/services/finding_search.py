@@ -0,0 +1,68 @@
+"""
+Hybrid search over an org's findings: Postgres full-text search on captions,
+descriptions and transcriptions fused with pgvector similarity to the query's
+embedding by reciprocal rank (RRF). Exact terms ("panel 3B") surface through
+the text leg, paraphrases ("live wires exposed") through the vector leg. If
+the query can't be embedded, results come from the text leg alone.
+"""
+import html
+import logging
+import os
+from uuid import UUID
+
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from app.repositories.finding_repository import SNIPPET_START, SNIPPET_STOP, FindingRepository
+from app.services.embedding_service import MODEL as EMBEDDING_MODEL, EmbeddingService
+from app.services.hf_client import HFInferenceClient
+
+logger = logging.getLogger(__name__)
+
+# RRF constant: higher values flatten the advantage of top-ranked hits
+SEARCH_RRF_K = int(os.getenv("SEARCH_RRF_K", "60"))
+# Deepest result reachable by paging (offset + limit); bounds each leg's scan
+SEARCH_MAX_DEPTH = int(os.getenv("SEARCH_MAX_DEPTH", "500"))
+# pgvector >= 0.8 iterative HNSW scans ("relaxed_order", "strict_order"); empty to disable
+SEARCH_HNSW_ITERATIVE_SCAN = os.getenv("SEARCH_HNSW_ITERATIVE_SCAN", "relaxed_order")
+
+
+class FindingSearchService:
+    def __init__(self, db: Session, hf: HFInferenceClient):
+        self.db = db
+        self.hf = hf
+
+    async def search(self, org_id: UUID, query: str, limit: int, offset: int = 0) -> tuple[list[Row], int | None]:
+        """
+        One page of fused results, best first, and the offset of the next page
+        (None on the last one). Raises ValueError past SEARCH_MAX_DEPTH.
+        """
+        if offset + limit > SEARCH_MAX_DEPTH:
+            raise ValueError(f"offset + limit must not exceed {SEARCH_MAX_DEPTH}")
+        embedding = None
+        try:
+            embedding = await EmbeddingService(self.hf).generate_embedding(query)
+        except Exception as exc:
+            logger.warning("Query embedding failed, searching text only: %s", exc)
+        if embedding is not None and not any(embedding):
+            embedding = None
+        # One extra row tells whether another page exists within the depth limit
+        peek = 1 if offset + limit < SEARCH_MAX_DEPTH else 0
+        rows = FindingRepository(self.db).search(
+            org_id,
+            query,
+            embedding,
+            EMBEDDING_MODEL,
+            limit + peek,
+            offset,
+            rrf_k=SEARCH_RRF_K,
+            iterative_scan=SEARCH_HNSW_ITERATIVE_SCAN or None,
+        )
+        return rows[:limit], offset + limit if len(rows) > limit else None
+
+
+def render_snippet(snippet: str | None) -> str | None:
+    """HTML-safe snippet: finding text escaped, matched terms wrapped in <mark>."""
+    if snippet is None:
+        return None
+    return html.escape(snippet).replace(SNIPPET_START, "<mark>").replace(SNIPPET_STOP, "</mark>")
@@ -7,9 +7,18 @@ import json
 import logging
 import os
 import re
+import time
+from functools import lru_cache
 
 import httpx
 
+from app.core import deadline
+from app.core.metrics import MODEL_RETRIES
+from app.services.hedging import hedge_delay, hedged_post
+from app.services.model_health import model_health
+from app.services.org_profiles import DEFAULT_PROFILE, ClassificationProfile
+from app.services.usage_logger import record_model_call
+
 logger = logging.getLogger(__name__)
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
@@ -17,20 +26,21 @@ GEMINI_MODEL = "gemini-2.0-flash"
 GEMINI_FALLBACK_MODEL = "gemini-2.0-flash-lite"
 GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta/models"
 MAX_RETRIES = 3
+REQUEST_TIMEOUT = 60.0
 
-# Structured prompt for defect analysis
-ANALYSIS_PROMPT = """You are an expert building inspector and safety auditor. Analyze this image and identify any defects, hazards, or issues.
+# Images per batched generateContent request, and a cap on their combined raw
+# size (inline data is base64-encoded and requests are limited to 20MB)
+GEMINI_BATCH_SIZE = int(os.getenv("GEMINI_BATCH_SIZE", "8"))
+GEMINI_BATCH_MAX_BYTES = int(os.getenv("GEMINI_BATCH_MAX_BYTES", str(12 * 1024 * 1024)))
 
-You MUST respond with ONLY a valid JSON object (no markdown, no code fences) in this exact format:
-{
-  "category": "<one of: structural damage, electrical hazard, water damage, fire risk, equipment issue, fall hazard, clear/no defect>",
-  "confidence": <float between 0.0 and 1.0>,
-  "severity": "<one of: critical, high, medium, low, clear>",
-  "description": "<detailed description of what you see, max 2 sentences>",
-  "defects_found": <true or false>
-}
 
-Category and severity mapping:
+def _escape(text: str) -> str:
+    """Escape braces for str.format()."""
+    return text.replace("{", "{{").replace("}", "}}")
+
+
+# Category/severity guidance shared by the single and batch prompts
+_ANALYSIS_GUIDELINES = """Category and severity mapping:
 - structural damage → critical
 - electrical hazard → critical
 - fire risk → high
@@ -46,6 +56,53 @@ Rules:
 - If there are multiple issues, report the most severe one.
 """
 
+# Structured prompt for defect analysis
+ANALYSIS_PROMPT = """You are an expert building inspector and safety auditor. Analyze this image and identify any defects, hazards, or issues.
+
+You MUST respond with ONLY a valid JSON object (no markdown, no code fences) in this exact format:
+{
+  "category": "<one of: structural damage, electrical hazard, water damage, fire risk, equipment issue, fall hazard, clear/no defect>",
+  "confidence": <float between 0.0 and 1.0>,
+  "severity": "<one of: critical, high, medium, low, clear>",
+  "description": "<detailed description of what you see, max 2 sentences>",
+  "defects_found": <true or false>
+}
+
+""" + _ANALYSIS_GUIDELINES
+
+# Prompt for several images in one request; each image follows an "Image <index>:" line
+BATCH_ANALYSIS_PROMPT = """You are an expert building inspector and safety auditor. You are given {count} images, each preceded by a line "Image <index>:" with indices 0 to {last}. Analyze each image independently and identify any defects, hazards, or issues.
+
+You MUST respond with ONLY a valid JSON array (no markdown, no code fences) containing exactly one object per image, in this exact format:
+[
+  {{
+    "index": <the image index>,
+    "category": "<one of: structural damage, electrical hazard, water damage, fire risk, equipment issue, fall hazard, clear/no defect>",
+    "confidence": <float between 0.0 and 1.0>,
+    "severity": "<one of: critical, high, medium, low, clear>",
+    "description": "<detailed description of what you see, max 2 sentences>",
+    "defects_found": <true or false>
+  }}
+]
+
+""" + _escape(_ANALYSIS_GUIDELINES)
+
+
+@lru_cache(maxsize=128)
+def analysis_prompts(profile: ClassificationProfile) -> tuple[str, str]:
+    """(single, batch) analysis prompts for a profile's categories and severities, built once per profile."""
+    if profile == DEFAULT_PROFILE:
+        return ANALYSIS_PROMPT, BATCH_ANALYSIS_PROMPT
+    categories = ", ".join(profile.categories)
+    mapping = "\n".join(f"- {category} → {severity}" for category, severity in profile.severities)
+    guidelines = "Category and severity mapping:\n" + mapping + _ANALYSIS_GUIDELINES[_ANALYSIS_GUIDELINES.index("\n\nRules:"):]
+    default_categories = ", ".join(DEFAULT_PROFILE.categories)
+    single = ANALYSIS_PROMPT.replace(default_categories, categories).replace(_ANALYSIS_GUIDELINES, guidelines)
+    batch = BATCH_ANALYSIS_PROMPT.replace(default_categories, _escape(categories)).replace(
+        _escape(_ANALYSIS_GUIDELINES), _escape(guidelines)
+    )
+    return single, batch
+
 
 class GeminiVisionClient:
     """Async client for Google Gemini Vision API."""
@@ -56,85 +113,159 @@ class GeminiVisionClient:
 
     async def _get_client(self) -> httpx.AsyncClient:
         if self._client is None or self._client.is_closed:
-            self._client = httpx.AsyncClient(timeout=60.0)
+            self._client = httpx.AsyncClient(timeout=REQUEST_TIMEOUT)
         return self._client
 
     async def close(self) -> None:
         if self._client and not self._client.is_closed:
             await self._client.aclose()
 
-    async def analyze_image(self, image_bytes: bytes) -> dict:
+    async def analyze_image(self, image_bytes: bytes, profile: ClassificationProfile = DEFAULT_PROFILE) -> dict:
         """
         Send an image to Gemini Vision for defect analysis.
         Returns a dict with category, confidence, severity, description, needs_review.
         Retries on rate limits (429) and server errors (503) with exponential backoff.
         """
-        import asyncio
-
+        prompt, _ = analysis_prompts(profile)
+        payload = _payload([{"text": prompt}, _image_part(image_bytes)], max_output_tokens=500)
+        text = await self._generate(payload, "vision_analysis")
+        return _parse_gemini_response(text, profile)
+
+    async def analyze_images(
+        self,
+        images: list[bytes],
+        profile: ClassificationProfile = DEFAULT_PROFILE,
+    ) -> list[dict | Exception]:
+        """
+        Analyze several images, packing up to GEMINI_BATCH_SIZE of them (and at most
+        GEMINI_BATCH_MAX_BYTES) into each generateContent request. Results are in
+        input order. Entries the batch response doesn't cover with a valid object are
+        retried as single-image calls; an entry whose analysis failed is returned as
+        the exception instead of a dict.
+        """
+        results: list[dict | Exception | None] = [None] * len(images)
+        singles: list[int] = []
+        _, batch_prompt = analysis_prompts(profile)
+
+        for batch in _pack_batches(images):
+            if len(batch) == 1:
+                singles.extend(batch)
+                continue
+            parts: list[dict] = [{"text": batch_prompt.format(count=len(batch), last=len(batch) - 1)}]
+            for position, i in enumerate(batch):
+                parts += [{"text": f"Image {position}:"}, _image_part(images[i])]
+            try:
+                text = await self._generate(
+                    _payload(parts, max_output_tokens=250 * len(batch) + 100),
+                    "vision_analysis_batch",
+                )
+            except Exception as exc:
+                # The provider is failing after retries and fallback; singles would fail the same way
+                for i in batch:
+                    results[i] = exc
+                continue
+            parsed = _parse_batch_response(text, len(batch), profile)
+            for position, i in enumerate(batch):
+                if parsed[position] is None:
+                    singles.append(i)
+                else:
+                    results[i] = parsed[position]
+            if any(p is None for p in parsed):
+                logger.warning(
+                    "Gemini batch response covered %d/%d images, retrying the rest singly",
+                    sum(p is not None for p in parsed), len(batch),
+                )
+
+        for i in singles:
+            try:
+                results[i] = await self.analyze_image(images[i], profile)
+            except Exception as exc:
+                results[i] = exc
+        return results
+
+    async def _generate(self, payload: dict, task: str) -> str:
+        """
+        POST a generateContent request, trying the primary model then the fallback,
+        each with retries, all within the current job deadline. Returns the first
+        candidate's text.
+        """
         if not self.api_key:
             raise ValueError("GEMINI_API_KEY is not set. Get a free key at https://aistudio.google.com/apikey")
 
         client = await self._get_client()
-        b64_image = base64.b64encode(image_bytes).decode("utf-8")
-
-        # Detect MIME type from image bytes
-        mime_type = _detect_mime(image_bytes)
-
-        payload = {
-            "contents": [
-                {
-                    "parts": [
-                        {"text": ANALYSIS_PROMPT},
-                        {
-                            "inline_data": {
-                                "mime_type": mime_type,
-                                "data": b64_image,
-                            }
-                        },
-                    ]
-                }
-            ],
-            "generationConfig": {
-                "temperature": 0.1,
-                "maxOutputTokens": 500,
-            },
-        }
 
-        # Try primary model, then fallback
+        # Encode once: the base64 images dominate the body and are reused across retries.
+        body = json.dumps(payload).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+
+        # Try primary model, then fallback. A model whose circuit is open is
+        # skipped, and one whose circuit opens mid-retry is abandoned without
+        # sleeping; the last model is always tried.
         models = [GEMINI_MODEL, GEMINI_FALLBACK_MODEL]
         last_error = None
 
-        for model in models:
+        for index, model in enumerate(models):
+            health = model_health("gemini", model)
+            last_resort = index == len(models) - 1
+            if not last_resort and not health.allow_request():
+                logger.info("Gemini circuit open for %s, routing to fallback", model)
+                continue
+
+            def circuit_opened(started: float, reason: str) -> bool:
+                health.record_failure(time.monotonic() - started, reason)
+                return not last_resort and not health.allow_request()
+
             url = f"{GEMINI_BASE_URL}/{model}:generateContent?key={self.api_key}"
 
             for attempt in range(1, MAX_RETRIES + 1):
+                started = time.monotonic()
                 try:
-                    resp = await client.post(url, json=payload)
+                    resp = await hedged_post(
+                        client,
+                        url,
+                        client_name="gemini",
+                        model=model,
+                        # Only hedge a healthy model; a struggling one gets no extra load
+                        hedge_after=hedge_delay("gemini", model, task) if health.state == "closed" else None,
+                        content=body,
+                        headers=headers,
+                        timeout=deadline.timeout(REQUEST_TIMEOUT, f"{task} call"),
+                    )
 
                     # Rate limit — wait and retry
                     if resp.status_code == 429:
+                        _record(model, body, resp, started, attempt, "rate_limited", task=task)
+                        if circuit_opened(started, "rate_limited"):
+                            break
                         retry_delay = min(2 ** attempt * 5, 60)  # 10s, 20s, 40s
-                        body = resp.json()
+                        error_body = resp.json()
                         # Try to extract suggested retry delay
-                        details = body.get("error", {}).get("details", [])
+                        details = error_body.get("error", {}).get("details", [])
                         for d in details:
                             if d.get("@type", "").endswith("RetryInfo"):
                                 suggested = d.get("retryDelay", "")
                                 if suggested and suggested.endswith("s"):
                                     retry_delay = min(float(suggested.rstrip("s")) + 1, 60)
                         logger.warning("Gemini rate limit (429) for %s, retrying in %.0fs (attempt %d)", model, retry_delay, attempt)
-                        await asyncio.sleep(retry_delay)
+                        MODEL_RETRIES.labels("gemini", model, "rate_limited").inc()
+                        await deadline.sleep(retry_delay, f"retry of {model}")
                         continue
 
                     # Server error — retry
                     if resp.status_code == 503:
+                        _record(model, body, resp, started, attempt, "server_error", task=task)
+                        if circuit_opened(started, "server_error"):
+                            break
                         backoff = 2 ** attempt
                         logger.warning("Gemini server error (503) for %s, retrying in %ds (attempt %d)", model, backoff, attempt)
-                        await asyncio.sleep(backoff)
+                        MODEL_RETRIES.labels("gemini", model, "server_error").inc()
+                        await deadline.sleep(backoff, f"retry of {model}")
                         continue
 
                     resp.raise_for_status()
                     result = resp.json()
+                    _record(model, body, resp, started, attempt, "success", result.get("usageMetadata"), task=task)
+                    health.record_success(time.monotonic() - started, task)
 
                     # Parse Gemini response
                     text = (
@@ -143,26 +274,33 @@ class GeminiVisionClient:
                         .get("parts", [{}])[0]
                         .get("text", "")
                     )
-
-                    parsed = _parse_gemini_response(text)
                     logger.info("Gemini analysis successful with model %s", model)
-                    return parsed
+                    return text
 
                 except httpx.HTTPStatusError as exc:
+                    _record(model, body, exc.response, started, attempt, "http_error", task=task)
                     last_error = exc
+                    # Other 4xx responses are about the request, not the model's health
+                    if exc.response.status_code >= 500 and circuit_opened(started, "http_error"):
+                        break
                     if attempt < MAX_RETRIES:
                         backoff = 2 ** attempt
                         logger.warning("Gemini HTTP error %s for %s, retrying in %ds", exc.response.status_code, model, backoff)
-                        await asyncio.sleep(backoff)
+                        MODEL_RETRIES.labels("gemini", model, "http_error").inc()
+                        await deadline.sleep(backoff, f"retry of {model}")
                     else:
                         logger.error("Gemini failed after %d attempts with model %s: %s", MAX_RETRIES, model, exc)
                         break  # try next model
                 except httpx.RequestError as exc:
+                    _record(model, body, None, started, attempt, "request_error", task=task)
                     last_error = exc
+                    if circuit_opened(started, "request_error"):
+                        break
                     if attempt < MAX_RETRIES:
                         backoff = 2 ** attempt
                         logger.warning("Gemini request error for %s: %s, retrying in %ds", model, exc, backoff)
-                        await asyncio.sleep(backoff)
+                        MODEL_RETRIES.labels("gemini", model, "request_error").inc()
+                        await deadline.sleep(backoff, f"retry of {model}")
                     else:
                         logger.error("Gemini request failed after %d attempts with model %s: %s", MAX_RETRIES, model, exc)
                         break  # try next model
@@ -170,6 +308,67 @@ class GeminiVisionClient:
         raise RuntimeError(f"Gemini Vision analysis failed after all retries: {last_error}")
 
 
+def _payload(parts: list[dict], max_output_tokens: int) -> dict:
+    return {
+        "contents": [{"parts": parts}],
+        "generationConfig": {
+            "temperature": 0.1,
+            "maxOutputTokens": max_output_tokens,
+        },
+    }
+
+
+def _image_part(image_bytes: bytes) -> dict:
+    return {
+        "inline_data": {
+            "mime_type": _detect_mime(image_bytes),
+            "data": base64.b64encode(image_bytes).decode("utf-8"),
+        }
+    }
+
+
+def _pack_batches(images: list[bytes]) -> list[list[int]]:
+    """Group image indices into request-sized batches (count and byte limits)."""
+    batches: list[list[int]] = []
+    current: list[int] = []
+    current_bytes = 0
+    for i, image in enumerate(images):
+        if current and (len(current) >= GEMINI_BATCH_SIZE or current_bytes + len(image) > GEMINI_BATCH_MAX_BYTES):
+            batches.append(current)
+            current, current_bytes = [], 0
+        current.append(i)
+        current_bytes += len(image)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _record(
+    model: str,
+    body: bytes,
+    resp: httpx.Response | None,
+    started: float,
+    attempt: int,
+    status: str,
+    usage: dict | None = None,
+    task: str = "vision_analysis",
+) -> None:
+    """Buffer a usage log record for one generateContent attempt."""
+    usage = usage or {}
+    record_model_call(
+        model,
+        task,
+        status=status,
+        processing_time_ms=int((time.monotonic() - started) * 1000),
+        bytes_sent=len(body),
+        bytes_received=len(resp.content) if resp is not None else None,
+        http_status=resp.status_code if resp is not None else None,
+        retry_count=attempt - 1,
+        input_tokens=usage.get("promptTokenCount"),
+        output_tokens=usage.get("candidatesTokenCount"),
+    )
+
+
 def _detect_mime(image_bytes: bytes) -> str:
     """Detect image MIME type from magic bytes."""
     if image_bytes[:8] == b"\x89PNG\r\n\x1a\n":
@@ -181,15 +380,17 @@ def _detect_mime(image_bytes: bytes) -> str:
     return "image/jpeg"  # default
 
 
-def _parse_gemini_response(text: str) -> dict:
-    """Parse Gemini's JSON response into a structured classification dict."""
-    from app.services.image_processor import CATEGORY_SEVERITY, CONFIDENCE_THRESHOLD
-
-    # Strip markdown code fences if present
+def _strip_fences(text: str) -> str:
     cleaned = text.strip()
     cleaned = re.sub(r"^```(?:json)?\s*", "", cleaned)
     cleaned = re.sub(r"\s*```$", "", cleaned)
-    cleaned = cleaned.strip()
+    return cleaned.strip()
+
+
+def _parse_gemini_response(text: str, profile: ClassificationProfile = DEFAULT_PROFILE) -> dict:
+    """Parse Gemini's JSON response into a structured classification dict."""
+    # Strip markdown code fences if present
+    cleaned = _strip_fences(text)
 
     try:
         data = json.loads(cleaned)
@@ -203,17 +404,66 @@ def _parse_gemini_response(text: str) -> dict:
             "description": f"AI analysis returned unparseable response. Raw: {text[:200]}",
             "all_scores": {},
         }
-
+    return _classification(data, profile)
+
+
+def _parse_batch_response(
+    text: str,
+    count: int,
+    profile: ClassificationProfile = DEFAULT_PROFILE,
+) -> list[dict | None]:
+    """
+    Parse a batch response into one classification per image index. Entries that
+    are missing, duplicated, out of range or malformed are None.
+    """
+    results: list[dict | None] = [None] * count
+    try:
+        data = json.loads(_strip_fences(text))
+    except json.JSONDecodeError:
+        logger.warning("Failed to parse Gemini batch response as JSON: %s", text[:200])
+        return results
+    if not isinstance(data, list):
+        logger.warning("Gemini batch response is not a JSON array: %s", text[:200])
+        return results
+
+    seen: set[int] = set()
+    duplicated: set[int] = set()
+    for entry in data:
+        if not isinstance(entry, dict):
+            continue
+        index = entry.get("index")
+        if isinstance(index, bool) or not isinstance(index, int) or not 0 <= index < count:
+            continue
+        # Two answers for one image: neither can be trusted to belong to it
+        if index in seen:
+            duplicated.add(index)
+            continue
+        seen.add(index)
+        if not isinstance(entry.get("category"), str):
+            continue
+        try:
+            confidence = float(entry.get("confidence"))
+        except (TypeError, ValueError):
+            continue
+        if not 0.0 <= confidence <= 1.0:
+            continue
+        results[index] = _classification(entry, profile)
+    for index in duplicated:
+        results[index] = None
+    return results
+
+
+def _classification(data: dict, profile: ClassificationProfile) -> dict:
     category = data.get("category", "unknown").lower()
     confidence = float(data.get("confidence", 0.0))
-    severity = data.get("severity", CATEGORY_SEVERITY.get(category, "medium"))
+    severity = data.get("severity", profile.severity_of(category))
     description = data.get("description", "")
 
     return {
         "category": category,
         "confidence": confidence,
         "severity": severity,
-        "needs_review": confidence < CONFIDENCE_THRESHOLD,
+        "needs_review": profile.needs_review(confidence),
         "description": description,
         "all_scores": {category: confidence},
     }
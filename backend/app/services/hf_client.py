@@ -1,20 +1,29 @@
 """
 Async client for the Hugging Face Inference API.
 Handles retries, rate‐limiting, and both binary + JSON payloads.
+Timeouts, retries and backoff are bounded by the current job deadline.
 """
 import asyncio
+import json
 import logging
 import os
 import time
 
 import httpx
 
+from app.core import deadline
+from app.core.metrics import MODEL_RETRIES, RATE_LIMIT_WAIT_SECONDS
+from app.services.hedging import hedge_delay, hedged_post
+from app.services.model_health import model_health
+from app.services.usage_logger import record_model_call
+
 logger = logging.getLogger(__name__)
 
 HF_API_URL = "https://api-inference.huggingface.co/models"
 HF_API_TOKEN = os.getenv("HF_API_TOKEN", "")
 MAX_RETRIES = 3
 RATE_LIMIT_PER_MIN = 30
+REQUEST_TIMEOUT = 90.0
 
 
 class HFInferenceClient:
@@ -24,12 +33,13 @@ class HFInferenceClient:
         self.token = token or HF_API_TOKEN
         self.headers = {"Authorization": f"Bearer {self.token}"}
         self._client: httpx.AsyncClient | None = None
-        # simple sliding‐window rate limiter
+        # simple sliding‐window rate limiter, shared by concurrent calls on this client
         self._call_times: list[float] = []
+        self._rate_lock = asyncio.Lock()
 
     async def _get_client(self) -> httpx.AsyncClient:
         if self._client is None or self._client.is_closed:
-            self._client = httpx.AsyncClient(timeout=90.0)
+            self._client = httpx.AsyncClient(timeout=REQUEST_TIMEOUT)
         return self._client
 
     async def close(self) -> None:
@@ -46,17 +56,29 @@ class HFInferenceClient:
         if len(self._call_times) >= RATE_LIMIT_PER_MIN:
             wait = window - (now - self._call_times[0]) + 0.5
             logger.info("Rate limit reached, waiting %.1fs", wait)
-            await asyncio.sleep(wait)
+            RATE_LIMIT_WAIT_SECONDS.labels("hf").observe(wait)
+            await deadline.sleep(wait, "rate limit wait")
+        else:
+            RATE_LIMIT_WAIT_SECONDS.labels("hf").observe(0)
+
+    def _take_hedge_slot(self) -> bool:
+        """Count a hedged request against the rate limit, if there is room for it right now."""
+        now = time.monotonic()
+        self._call_times = [t for t in self._call_times if now - t < 60.0]
+        if len(self._call_times) >= RATE_LIMIT_PER_MIN:
+            return False
+        self._call_times.append(now)
+        return True
 
     # ---------- public methods ----------
 
-    async def inference_json(self, model: str, payload: dict) -> dict | list:
+    async def inference_json(self, model: str, payload: dict, task: str = "inference") -> dict | list:
         """Send a JSON payload (text tasks like classification, summarization)."""
-        return await self._call(model, json_payload=payload)
+        return await self._call(model, json_payload=payload, task=task)
 
-    async def inference_binary(self, model: str, data: bytes) -> dict | list:
+    async def inference_binary(self, model: str, data: bytes, task: str = "inference") -> dict | list:
         """Send raw bytes (images, audio)."""
-        return await self._call(model, binary_payload=data)
+        return await self._call(model, binary_payload=data, task=task)
 
     # ---------- internal ----------
 
@@ -65,40 +87,56 @@ class HFInferenceClient:
         model: str,
         json_payload: dict | None = None,
         binary_payload: bytes | None = None,
+        task: str = "inference",
     ) -> dict | list:
         url = f"{HF_API_URL}/{model}"
         client = await self._get_client()
 
+        # Encode once so retries don't re-serialize and we know the request size.
+        if binary_payload is not None:
+            body = binary_payload
+            headers = self.headers
+        else:
+            body = json.dumps(json_payload).encode("utf-8")
+            headers = {**self.headers, "Content-Type": "application/json"}
+
         for attempt in range(1, MAX_RETRIES + 1):
-            await self._wait_for_rate_limit()
-            self._call_times.append(time.monotonic())
+            async with self._rate_lock:
+                await self._wait_for_rate_limit()
+                self._call_times.append(time.monotonic())
+            started = time.monotonic()
+            resp: httpx.Response | None = None
 
             try:
-                if binary_payload is not None:
-                    resp = await client.post(
-                        url,
-                        headers=self.headers,
-                        content=binary_payload,
-                    )
-                else:
-                    resp = await client.post(
-                        url,
-                        headers=self.headers,
-                        json=json_payload,
-                    )
+                resp = await hedged_post(
+                    client,
+                    url,
+                    client_name="hf",
+                    model=model,
+                    hedge_after=hedge_delay("hf", model, task),
+                    allow_hedge=self._take_hedge_slot,
+                    headers=headers,
+                    content=body,
+                    timeout=deadline.timeout(REQUEST_TIMEOUT, f"{task} call"),
+                )
 
                 # Model is loading — HF returns 503 with estimated_time
                 if resp.status_code == 503:
-                    body = resp.json()
-                    wait = body.get("estimated_time", 20)
+                    self._record(model, task, body, resp, started, attempt, "loading")
+                    body_json = resp.json()
+                    wait = body_json.get("estimated_time", 20)
                     logger.info("Model %s loading, retrying in %.0fs (attempt %d)", model, wait, attempt)
-                    await asyncio.sleep(min(wait, 60))
+                    MODEL_RETRIES.labels("hf", model, "loading").inc()
+                    await deadline.sleep(min(wait, 60), f"retry of {model}")
                     continue
 
                 resp.raise_for_status()
+                self._record(model, task, body, resp, started, attempt, "success")
+                model_health("hf", model).observe_latency(time.monotonic() - started, task)
                 return resp.json()
 
             except httpx.HTTPStatusError as exc:
+                self._record(model, task, body, exc.response, started, attempt, "http_error")
                 # Permanent model availability errors; retrying won't help.
                 if exc.response.status_code in (404, 410):
                     logger.error("HF model unavailable (%s) for %s", exc.response.status_code, model)
@@ -109,16 +147,41 @@ class HFInferenceClient:
                         "HF API error %s for %s, retrying in %ds (attempt %d)",
                         exc.response.status_code, model, backoff, attempt,
                     )
-                    await asyncio.sleep(backoff)
+                    MODEL_RETRIES.labels("hf", model, "http_error").inc()
+                    await deadline.sleep(backoff, f"retry of {model}")
                 else:
                     logger.error("HF API call failed after %d attempts: %s", MAX_RETRIES, exc)
                     raise
             except httpx.RequestError as exc:
+                self._record(model, task, body, None, started, attempt, "request_error")
                 if attempt < MAX_RETRIES:
                     backoff = 2 ** attempt
                     logger.warning("Request error for %s: %s, retrying in %ds", model, exc, backoff)
-                    await asyncio.sleep(backoff)
+                    MODEL_RETRIES.labels("hf", model, "request_error").inc()
+                    await deadline.sleep(backoff, f"retry of {model}")
                 else:
                     raise
 
         raise RuntimeError(f"HF inference failed for {model} after {MAX_RETRIES} retries")
+
+    @staticmethod
+    def _record(
+        model: str,
+        task: str,
+        body: bytes,
+        resp: httpx.Response | None,
+        started: float,
+        attempt: int,
+        status: str,
+    ) -> None:
+        """Buffer a usage log record for one attempt (flushed in batches)."""
+        record_model_call(
+            model,
+            task,
+            status=status,
+            processing_time_ms=int((time.monotonic() - started) * 1000),
+            bytes_sent=len(body),
+            bytes_received=len(resp.content) if resp is not None else None,
+            http_status=resp.status_code if resp is not None else None,
+            retry_count=attempt - 1,
+        )
@@ -16,6 +16,9 @@ CAPTION_MODELS = [
     "Salesforce/blip-image-captioning-large",
 ]
 
+# Zero-shot classifier for captions, transcriptions and PDF text
+CLASSIFIER_MODEL = "facebook/bart-large-mnli"
+
 # Defect categories for zero-shot classification
 DEFECT_CATEGORIES = [
     "structural damage",
@@ -54,7 +57,7 @@ class ImageProcessor:
 
         for model in CAPTION_MODELS:
             try:
-                result = await self.hf.inference_binary(model, image_bytes)
+                result = await self.hf.inference_binary(model, image_bytes, task="image_captioning")
                 # Common response shape: [{"generated_text": "..."}]
                 if isinstance(result, list) and len(result) > 0:
                     text = result[0].get("generated_text", "")
@@ -74,26 +77,30 @@ class ImageProcessor:
             raise last_error
         return ""
 
-    async def classify_text(self, text: str) -> dict:
-        """Zero-shot classify text into defect categories using BART-MNLI."""
+    async def classify_text(self, text: str, profile=None) -> dict:
+        """Zero-shot classify text into the profile's defect categories using BART-MNLI."""
+        from app.services.org_profiles import DEFAULT_PROFILE
+
+        profile = profile or DEFAULT_PROFILE
         result = await self.hf.inference_json(
-            "facebook/bart-large-mnli",
+            CLASSIFIER_MODEL,
             {
                 "inputs": text,
-                "parameters": {"candidate_labels": DEFECT_CATEGORIES},
+                "parameters": {"candidate_labels": list(profile.categories)},
             },
+            task="zero_shot_classification",
         )
         # result: {"labels": [...], "scores": [...], "sequence": "..."}
-        labels = result.get("labels", DEFECT_CATEGORIES)
-        scores = result.get("scores", [0.0] * len(DEFECT_CATEGORIES))
+        labels = result.get("labels", list(profile.categories))
+        scores = result.get("scores", [0.0] * len(profile.categories))
         top_label = labels[0]
         top_score = scores[0]
 
         return {
             "category": top_label,
             "confidence": top_score,
-            "severity": CATEGORY_SEVERITY.get(top_label, "medium"),
-            "needs_review": top_score < CONFIDENCE_THRESHOLD,
+            "severity": profile.severity_of(top_label),
+            "needs_review": profile.needs_review(top_score),
             "all_scores": dict(zip(labels, scores)),
         }
 
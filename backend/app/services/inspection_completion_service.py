@@ -10,6 +10,8 @@ from sqlalchemy.orm import Session
 
 from app.repositories.finding_repository import FindingRepository
 from app.repositories.inspection_repository import InspectionRepository
+from app.services.inspection_events import publish_event
+from app.services.narrative_service import NarrativeService
 from app.services.hf_client import HFInferenceClient
 
 logger = logging.getLogger(__name__)
@@ -29,28 +31,43 @@ class InspectionCompletionService:
         self.finding_repo = FindingRepository(db)
         self.inspection_repo = InspectionRepository(db)
         self.hf = hf
-
-    async def finalize(self, inspection_id: UUID) -> None:
-        """Run after all files are processed: compute risk, narrative, mark complete."""
-        findings = self.finding_repo.list_by_inspection(inspection_id)
-        total_findings = len(findings)
+        self.narrative = NarrativeService(db, hf)
+
+    async def finalize(self, inspection_id: UUID, total_files: int | None = None, failed_files: int = 0) -> None:
+        """
+        Run after all files are processed: compute risk, narrative, mark complete.
+        Risk, counts and the review flag come from one aggregate query. When the
+        inspection was finalized before and none of its findings changed since,
+        the stored narrative is kept; otherwise only changed narrative chunks are
+        re-summarized (see NarrativeService).
+        """
         inspection = self.inspection_repo.get_by_id(inspection_id)
-
         if not inspection:
             logger.error("Inspection %s not found", inspection_id)
             return
 
-        # 1. Risk level from severity distribution
-        risk_level = self._calculate_risk(findings)
-
-        # 2. Generate narrative
-        narrative = await self._generate_narrative(findings, inspection)
-
-        # 3. Check if any need human review
-        needs_review = any(getattr(f, "needs_review", False) for f in findings)
-        status = "review" if needs_review else "completed"
-
-        # 4. Update inspection record
+        # 1. Risk, finding count and review flag
+        stats = self.finding_repo.aggregate_by_inspection(inspection_id, SEVERITY_WEIGHTS)
+        total_findings = stats["total"]
+        risk_level = self._risk_from_weight(stats["max_weight"])
+        needs_review = stats["needs_review"]
+        status = "review" if needs_review or failed_files else "completed"
+
+        # 2. Narrative, unless nothing changed since the last finalize
+        unchanged = (
+            inspection.processing_completed_at is not None
+            and inspection.report_narrative
+            and total_findings == inspection.total_findings
+            and stats["changed_since_finalized"] == 0
+        )
+        if unchanged:
+            narrative = inspection.report_narrative
+        else:
+            findings = self.finding_repo.list_for_narrative(inspection_id)
+            narrative = await self._generate_narrative(findings, inspection)
+
+        # 3. Update inspection record
+        extra = {"total_files": total_files} if total_files is not None else {}
         self.inspection_repo.update_status(
             inspection_id,
             status=status,
@@ -58,68 +75,30 @@ class InspectionCompletionService:
             report_narrative=narrative,
             total_findings=total_findings,
             processing_completed_at=datetime.now(timezone.utc),
+            commit=False,
+            **extra,
+        )
+        publish_event(
+            self.db,
+            inspection_id,
+            "inspection",
+            status=status,
+            risk_level=risk_level,
+            total_findings=total_findings,
         )
+        self.db.commit()
         logger.info(
-            "Inspection %s finalized: risk=%s findings=%d status=%s",
-            inspection_id, risk_level, total_findings, status,
+            "Inspection %s finalized: risk=%s findings=%d status=%s narrative=%s",
+            inspection_id, risk_level, total_findings, status, "kept" if unchanged else "regenerated",
         )
 
-    def _calculate_risk(self, findings: list) -> str:
-        """Highest severity among findings wins."""
-        if not findings:
-            return "clear"
-
-        max_weight = 0
-        for f in findings:
-            sev = getattr(f, "severity", None) or "clear"
-            max_weight = max(max_weight, SEVERITY_WEIGHTS.get(sev, 0))
-
-        # Map weight back to label
+    def _risk_from_weight(self, max_weight: int) -> str:
+        """Map the highest severity weight back to its label."""
         for label, weight in SEVERITY_WEIGHTS.items():
             if weight == max_weight:
                 return label
         return "clear"
 
     async def _generate_narrative(self, findings: list, inspection) -> str:
-        """Generate report narrative using BART-CNN summarization."""
-        if not findings:
-            return "No findings were detected during this inspection. All uploaded files were analyzed and no defects or hazards were identified."
-
-        # Build context from findings
-        lines: list[str] = []
-        name = getattr(inspection, "name", "Inspection")
-        location = getattr(inspection, "site_location", "")
-        lines.append(f"Inspection: {name}. Location: {location}.")
-
-        for i, f in enumerate(findings, 1):
-            category = getattr(f, "category", "unknown")
-            severity = getattr(f, "severity", "unknown")
-            caption = getattr(f, "ai_caption", "") or ""
-            transcription = getattr(f, "transcription", "") or ""
-            desc = caption or transcription
-            lines.append(f"Finding {i}: {category} ({severity}). {desc}")
-
-        context = " ".join(lines)
-
-        # BART-CNN can handle ~1024 tokens, truncate if needed
-        if len(context) > 3000:
-            context = context[:3000]
-
-        try:
-            result = await self.hf.inference_json(
-                "facebook/bart-large-cnn",
-                {
-                    "inputs": context,
-                    "parameters": {
-                        "max_length": 400,
-                        "min_length": 80,
-                        "do_sample": False,
-                    },
-                },
-            )
-            if isinstance(result, list) and len(result) > 0:
-                return result[0].get("summary_text", context)
-            return context
-        except Exception as exc:
-            logger.warning("Narrative generation failed, using raw context: %s", exc)
-            return context
+        """Generate report narrative with a cached map-reduce over BART-CNN (see NarrativeService)."""
+        return await self.narrative.generate(findings, inspection)
@@ -0,0 +1,145 @@
+"""
+Inspection progress events over Postgres LISTEN/NOTIFY.
+
+Workers call publish_event() inside the transaction that makes the change,
+so an event is delivered when (and only if) that transaction commits. Each
+API process keeps one LISTEN connection (EventBroker) and fans notifications
+out to the SSE subscribers of each inspection.
+"""
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from uuid import UUID
+
+import psycopg2
+import psycopg2.extensions
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.database import engine
+
+logger = logging.getLogger(__name__)
+
+EVENTS_CHANNEL = "inspection_events"
+SUBSCRIBER_QUEUE_SIZE = 256
+RECONNECT_SECONDS = 2.0
+
+
+def publish_event(db: Session, inspection_id: UUID | str, event_type: str, **data) -> None:
+    """Queue an event on the session's transaction (NOTIFY is sent on commit, dropped on rollback)."""
+    payload = json.dumps({"type": event_type, "inspection_id": str(inspection_id), **data}, default=str)
+    db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": EVENTS_CHANNEL, "payload": payload})
+
+
+class EventBroker:
+    """
+    One LISTEN connection per process, driven by the event loop's reader
+    callback (no polling thread). Connects on first subscribe. If the
+    connection drops, subscribers get a "resync" event and it reconnects.
+    """
+
+    def __init__(self):
+        self._conn = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._lock = asyncio.Lock()
+        self._subscribers: dict[str, set[asyncio.Queue]] = defaultdict(set)
+
+    async def subscribe(self, inspection_id: UUID | str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers[str(inspection_id)].add(queue)
+        try:
+            await self._ensure_connected()
+        except Exception:
+            self.unsubscribe(inspection_id, queue)
+            raise
+        return queue
+
+    def unsubscribe(self, inspection_id: UUID | str, queue: asyncio.Queue) -> None:
+        key = str(inspection_id)
+        self._subscribers[key].discard(queue)
+        if not self._subscribers[key]:
+            del self._subscribers[key]
+
+    async def _ensure_connected(self) -> None:
+        async with self._lock:
+            if self._conn is not None:
+                return
+            self._loop = asyncio.get_running_loop()
+            self._conn = await asyncio.to_thread(_listen_connection)
+            self._loop.add_reader(self._conn.fileno(), self._on_readable)
+            logger.info("Listening for inspection events on channel %s", EVENTS_CHANNEL)
+
+    def _on_readable(self) -> None:
+        try:
+            self._conn.poll()
+        except psycopg2.Error as exc:
+            logger.warning("Inspection event listener lost its connection: %s", exc)
+            self._disconnect()
+            # Events may have been missed; tell clients to refetch once
+            for queues in self._subscribers.values():
+                for queue in queues:
+                    _offer(queue, {"type": "resync"})
+            self._loop.call_later(RECONNECT_SECONDS, self._schedule_reconnect)
+            return
+        while self._conn.notifies:
+            self._dispatch(self._conn.notifies.pop(0).payload)
+
+    def _dispatch(self, payload: str) -> None:
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            logger.warning("Dropping malformed inspection event: %r", payload[:200])
+            return
+        for queue in self._subscribers.get(event.get("inspection_id"), ()):
+            _offer(queue, event)
+
+    def _schedule_reconnect(self) -> None:
+        if self._subscribers:
+            self._loop.create_task(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        try:
+            await self._ensure_connected()
+        except Exception as exc:
+            logger.warning("Inspection event listener reconnect failed: %s", exc)
+            self._loop.call_later(RECONNECT_SECONDS, self._schedule_reconnect)
+
+    def _disconnect(self) -> None:
+        if self._conn is None:
+            return
+        try:
+            self._loop.remove_reader(self._conn.fileno())
+        except Exception:
+            pass
+        try:
+            self._conn.close()
+        except Exception:
+            pass
+        self._conn = None
+
+    def close(self) -> None:
+        self._disconnect()
+
+
+def _listen_connection():
+    """Dedicated autocommit connection (outside the pool) subscribed to EVENTS_CHANNEL."""
+    dsn = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+    conn = psycopg2.connect(dsn)
+    conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+    with conn.cursor() as cur:
+        cur.execute(f"LISTEN {EVENTS_CHANNEL}")
+    return conn
+
+
+def _offer(queue: asyncio.Queue, event: dict) -> None:
+    """Enqueue without blocking. A subscriber that falls behind is reset to a single resync."""
+    try:
+        queue.put_nowait(event)
+    except asyncio.QueueFull:
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait({"type": "resync"})
+
+
+event_broker = EventBroker()
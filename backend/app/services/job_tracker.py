@@ -7,7 +7,9 @@ from sqlalchemy.orm import Session
 from app.repositories.file_repository import FileRepository
 from app.repositories.finding_repository import FindingRepository
 from app.repositories.inspection_repository import InspectionRepository
+from app.repositories.processing_job_repository import ProcessingJobRepository
 from app.models.file import File
+from app.services.inspection_events import publish_event
 
 logger = logging.getLogger(__name__)
 
@@ -18,29 +20,67 @@ class JobTracker:
         self.file_repo = FileRepository(db)
         self.finding_repo = FindingRepository(db)
         self.inspection_repo = InspectionRepository(db)
+        self.job_repo = ProcessingJobRepository(db)
+
+    def claim_file(
+        self,
+        file_id: UUID,
+        job_id: UUID | None = None,
+        owner: str | None = None,
+        lease_seconds: float = 0,
+    ) -> File | None:
+        """
+        Move the job queued → running under `owner`'s lease and the file
+        pending → processing in one commit. Returns None if the job's lease
+        moved to another worker, or the file is missing or already claimed.
+        """
+        if job_id is not None and self.job_repo.mark_running(job_id, owner, lease_seconds, commit=False) is None:
+            self.db.rollback()
+            return None
+        f = self.update_file_status(file_id, "processing", commit=False)
+        if f is None and job_id is not None:
+            # Stale or duplicate job: nothing left to do, so don't keep leasing it
+            self.job_repo.mark_finished(job_id, "completed", owner, commit=False)
+        self.db.commit()
+        return f
+
+    def finish_job(
+        self,
+        job_id: UUID | None,
+        status: str,
+        owner: str | None = None,
+        commit: bool = True,
+    ) -> bool:
+        """Finish the job under `owner`'s lease. False if the lease was lost (reclaimed by a sweeper)."""
+        if job_id is None:
+            return True
+        return self.job_repo.mark_finished(job_id, status, owner, commit=commit) is not None
 
     def update_file_status(
         self,
         file_id: UUID,
         status: str,
         error_message: str | None = None,
+        commit: bool = True,
     ) -> File | None:
-        return self.file_repo.update_status(file_id, status, error_message=error_message)
-
-    def update_inspection_progress(self, inspection_id: UUID) -> None:
-        total = self.file_repo.total_count_by_inspection(inspection_id)
-        completed = self.file_repo.count_by_inspection_and_status(inspection_id, "completed")
-        failed = self.file_repo.count_by_inspection_and_status(inspection_id, "failed")
-        if total == 0:
-            return
-        if completed + failed >= total:
-            finding_count = self.finding_repo.count_by_inspection(inspection_id)
-            self.inspection_repo.update_status(
-                inspection_id,
-                "completed" if failed == 0 else "review",
-                total_findings=finding_count,
-                total_files=total,
-            )
+        """Apply a status transition and publish it to the inspection's event stream."""
+        f = self.file_repo.update_status(file_id, status, error_message=error_message, commit=False)
+        if f is not None:
+            publish_event(self.db, f.inspection_id, "file", file_id=str(f.id), status=f.status)
+        if commit:
+            self.db.commit()
+        return f
+
+    def update_inspection_progress(self, inspection_id: UUID) -> dict[str, int] | None:
+        """
+        Return the inspection's file status counts once every file has finished
+        (completed or failed), else None. The caller finalizes the inspection.
+        """
+        counts = self.file_repo.status_counts(inspection_id)
+        if counts["total"] == 0:
+            return None
+        if counts["completed"] + counts["failed"] >= counts["total"]:
+            return counts
         return None
 
     def log_processing_step(self, file_id: str, step: str, duration_seconds: float) -> None:
@@ -0,0 +1,154 @@
+"""
+Per-model health tracking for external model APIs: a rolling error rate, a
+latency EWMA and a circuit breaker.
+
+The breaker is closed while a model is healthy. When the error rate over the
+last MODEL_BREAKER_WINDOW calls reaches MODEL_BREAKER_ERROR_RATE it opens and
+callers skip the model. After MODEL_BREAKER_OPEN_SECONDS one half-open probe
+is let through: success closes the breaker, failure re-opens it. Calls slower
+than MODEL_SLOW_CALL_SECONDS count as errors, so a model that answers but
+only after a long stall is routed around too.
+
+Successful-call latencies are also kept per task, for the quantiles that
+decide when to hedge a request (see hedging.py).
+
+State is per process and shared by every worker thread and event loop.
+"""
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+
+from app.core.metrics import MODEL_CIRCUIT_STATE, MODEL_LATENCY_EWMA_SECONDS
+
+logger = logging.getLogger(__name__)
+
+MODEL_BREAKER_WINDOW = int(os.getenv("MODEL_BREAKER_WINDOW", "20"))
+MODEL_BREAKER_MIN_CALLS = int(os.getenv("MODEL_BREAKER_MIN_CALLS", "5"))
+MODEL_BREAKER_ERROR_RATE = float(os.getenv("MODEL_BREAKER_ERROR_RATE", "0.5"))
+MODEL_BREAKER_OPEN_SECONDS = float(os.getenv("MODEL_BREAKER_OPEN_SECONDS", "30"))
+MODEL_SLOW_CALL_SECONDS = float(os.getenv("MODEL_SLOW_CALL_SECONDS", "30"))
+# Successful-call latencies kept per task for quantiles (hedging), and the
+# fewest samples a quantile is computed from
+MODEL_LATENCY_WINDOW = int(os.getenv("MODEL_LATENCY_WINDOW", "200"))
+MODEL_LATENCY_MIN_SAMPLES = int(os.getenv("MODEL_LATENCY_MIN_SAMPLES", "20"))
+# Weight of the newest sample in the latency EWMA
+LATENCY_EWMA_ALPHA = 0.2
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class ModelHealth:
+    def __init__(self, client: str, model: str):
+        self.client = client
+        self.model = model
+        self.state = CLOSED
+        self.latency_ewma: float | None = None
+        self._latencies: dict[str | None, deque[float]] = {}
+        self._outcomes: deque[bool] = deque(maxlen=MODEL_BREAKER_WINDOW)
+        self._opened_at = 0.0
+        self._probe_started: float | None = None
+        self._lock = threading.Lock()
+        MODEL_CIRCUIT_STATE.labels(client, model).set(0)
+
+    def allow_request(self) -> bool:
+        """
+        Whether a call to this model should be made now. While half-open only
+        one probe is in flight at a time; a probe that never reports back is
+        replaced after MODEL_BREAKER_OPEN_SECONDS.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                if now - self._opened_at < MODEL_BREAKER_OPEN_SECONDS:
+                    return False
+                self._set_state(HALF_OPEN)
+            if self._probe_started is not None and now - self._probe_started < MODEL_BREAKER_OPEN_SECONDS:
+                return False
+            self._probe_started = now
+            return True
+
+    def latency_quantile(self, q: float, task: str | None = None) -> float | None:
+        """Latency quantile of recent successful calls for a task; None with too few samples."""
+        with self._lock:
+            samples = sorted(self._latencies.get(task, ()))
+        if len(samples) < MODEL_LATENCY_MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, max(0, math.ceil(q * len(samples)) - 1))]
+
+    def observe_latency(self, latency: float, task: str | None = None) -> None:
+        """Record a successful call's latency without touching the breaker."""
+        with self._lock:
+            self._observe_latency(latency)
+            self._latencies.setdefault(task, deque(maxlen=MODEL_LATENCY_WINDOW)).append(latency)
+
+    def record_success(self, latency: float, task: str | None = None) -> None:
+        with self._lock:
+            self._observe_latency(latency)
+            self._latencies.setdefault(task, deque(maxlen=MODEL_LATENCY_WINDOW)).append(latency)
+            if latency >= MODEL_SLOW_CALL_SECONDS:
+                self._failed(f"slow call ({latency:.1f}s)")
+                return
+            self._outcomes.append(True)
+            if self.state != CLOSED:
+                self._outcomes.clear()
+                self._probe_started = None
+                self._set_state(CLOSED)
+
+    def record_failure(self, latency: float | None = None, reason: str = "error") -> None:
+        with self._lock:
+            if latency is not None:
+                self._observe_latency(latency)
+            self._failed(reason)
+
+    def _failed(self, reason: str) -> None:
+        self._outcomes.append(False)
+        if self.state == HALF_OPEN:
+            self._open(f"half-open probe failed: {reason}")
+        elif self.state == CLOSED and len(self._outcomes) >= MODEL_BREAKER_MIN_CALLS:
+            rate = self._outcomes.count(False) / len(self._outcomes)
+            if rate >= MODEL_BREAKER_ERROR_RATE:
+                self._open(f"error rate {rate:.0%} over last {len(self._outcomes)} calls, last: {reason}")
+
+    def _open(self, why: str) -> None:
+        self._opened_at = time.monotonic()
+        self._probe_started = None
+        self._set_state(OPEN)
+        logger.warning(
+            "Circuit opened for %s model %s (%s); skipping it for %.0fs",
+            self.client, self.model, why, MODEL_BREAKER_OPEN_SECONDS,
+        )
+
+    def _set_state(self, state: str) -> None:
+        if state != self.state and state == CLOSED:
+            logger.info("Circuit closed for %s model %s", self.client, self.model)
+        self.state = state
+        MODEL_CIRCUIT_STATE.labels(self.client, self.model).set(_STATE_VALUES[state])
+
+    def _observe_latency(self, latency: float) -> None:
+        if self.latency_ewma is None:
+            self.latency_ewma = latency
+        else:
+            self.latency_ewma += LATENCY_EWMA_ALPHA * (latency - self.latency_ewma)
+        MODEL_LATENCY_EWMA_SECONDS.labels(self.client, self.model).set(self.latency_ewma)
+
+
+_registry: dict[tuple[str, str], ModelHealth] = {}
+_registry_lock = threading.Lock()
+
+
+def model_health(client: str, model: str) -> ModelHealth:
+    """The process-wide health tracker for one model."""
+    key = (client, model)
+    with _registry_lock:
+        health = _registry.get(key)
+        if health is None:
+            health = _registry[key] = ModelHealth(client, model)
+        return health
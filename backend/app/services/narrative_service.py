@@ -0,0 +1,176 @@
+"""
+Inspection narrative generation as a cached map-reduce over BART-CNN.
+
+Findings are grouped by (category, severity) and packed into chunks that fit
+the model's input. Chunks of every group are summarized in parallel, group
+summaries are reduced the same way until each group has one, and the groups
+are merged into the final narrative. Every summary is cached by a hash of
+its input, so re-finalizing after a new file only re-summarizes the chunks
+whose text changed (plus the final merge).
+"""
+import asyncio
+import hashlib
+import logging
+import os
+
+from sqlalchemy.orm import Session
+
+from app.repositories.narrative_summary_repository import NarrativeSummaryRepository
+from app.services.hf_client import HFInferenceClient
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_MODEL = "facebook/bart-large-cnn"
+# BART-CNN handles ~1024 tokens; 3000 characters stays safely under that
+CHUNK_CHARS = 3000
+# Texts shorter than this are used as they are rather than summarized
+MIN_SUMMARIZE_CHARS = 600
+# Used when a summarization call fails: the input, cut to this length
+FALLBACK_CHARS = 600
+# Reduce rounds before remaining summaries are joined and cut instead
+MAX_REDUCE_ROUNDS = 6
+# Max BART calls in flight per narrative
+NARRATIVE_CONCURRENCY = int(os.getenv("NARRATIVE_CONCURRENCY", "4"))
+
+CHUNK_LENGTHS = (150, 30)  # (max_length, min_length) for group chunks
+FINAL_LENGTHS = (400, 80)  # for the merged narrative
+
+NO_FINDINGS_NARRATIVE = (
+    "No findings were detected during this inspection. All uploaded files were "
+    "analyzed and no defects or hazards were identified."
+)
+
+SEVERITY_ORDER = {"critical": 0, "high": 1, "medium": 2, "low": 3, "clear": 4}
+
+
+class NarrativeService:
+    def __init__(self, db: Session, hf: HFInferenceClient):
+        self.db = db
+        self.hf = hf
+        self.cache = NarrativeSummaryRepository(db)
+        self._semaphore = asyncio.Semaphore(NARRATIVE_CONCURRENCY)
+
+    async def generate(self, findings: list, inspection) -> str:
+        if not findings:
+            return NO_FINDINGS_NARRATIVE
+
+        groups: dict[tuple[str, str], list] = {}
+        for f in findings:
+            key = (getattr(f, "category", None) or "unknown", getattr(f, "severity", None) or "unknown")
+            groups.setdefault(key, []).append(f)
+        # Most severe first; within a group oldest first, so new findings only touch the last chunk
+        ordered = sorted(groups.items(), key=lambda kv: (SEVERITY_ORDER.get(kv[0][1], 5), kv[0][0]))
+
+        group_parts = []
+        for (category, severity), members in ordered:
+            members.sort(key=lambda f: (getattr(f, "created_at", None) is None, getattr(f, "created_at", None), str(f.id)))
+            group_parts.append([_finding_text(f) for f in members])
+        group_summaries = await self._reduce(group_parts, CHUNK_LENGTHS)
+
+        name = getattr(inspection, "name", "Inspection")
+        location = getattr(inspection, "site_location", "") or ""
+        sections = [f"Inspection: {name}. Location: {location}."]
+        for ((category, severity), members), summary in zip(ordered, group_summaries):
+            label = category.replace("_", " ").capitalize()
+            sections.append(f"{label} ({severity}, {len(members)} finding{'s' if len(members) != 1 else ''}): {summary}")
+        return (await self._reduce([sections], FINAL_LENGTHS))[0]
+
+    async def _reduce(self, groups: list[list[str]], lengths: tuple[int, int]) -> list[str]:
+        """
+        Reduce each group's parts to a single text. Each round packs the parts
+        of every unfinished group into chunks and summarizes all of them together.
+        """
+        states = [list(parts) for parts in groups]
+        active = list(range(len(states)))
+        rounds = 0
+        while active:
+            rounds += 1
+            chunked = {i: _pack(states[i]) for i in active}
+            flat = [chunk for i in active for chunk in chunked[i]]
+            summaries = iter(await self._summarize_many(flat, lengths))
+            still_active = []
+            for i in active:
+                before = len(states[i])
+                states[i] = [next(summaries) for _ in chunked[i]]
+                if len(states[i]) <= 1:
+                    continue
+                if len(states[i]) >= before or rounds >= MAX_REDUCE_ROUNDS:
+                    # Summaries too long to share a chunk never merge: join and cut them
+                    logger.warning("Narrative: %d summaries did not reduce, joining them", len(states[i]))
+                    states[i] = [" ".join(states[i])[:CHUNK_CHARS]]
+                    continue
+                still_active.append(i)
+            active = still_active
+        return [state[0] if state else "" for state in states]
+
+    async def _summarize_many(self, texts: list[str], lengths: tuple[int, int]) -> list[str]:
+        """Summaries for texts: short ones as-is, cached ones from one lookup, the rest in parallel."""
+        keys = [_cache_key(text, lengths) for text in texts]
+        cached = self.cache.get_many([k for k, t in zip(keys, texts) if len(t) >= MIN_SUMMARIZE_CHARS])
+        missing = {k: t for k, t in zip(keys, texts) if len(t) >= MIN_SUMMARIZE_CHARS and k not in cached}
+        results = await asyncio.gather(*(self._summarize(t, lengths) for t in missing.values()))
+        fresh = {k: s for k, s in zip(missing, results) if s}
+        if fresh:
+            self.cache.put_many(SUMMARY_MODEL, fresh)
+        if missing:
+            logger.info("Narrative: %d summaries cached, %d generated", len(cached), len(missing))
+
+        out = []
+        for key, text in zip(keys, texts):
+            if len(text) < MIN_SUMMARIZE_CHARS:
+                out.append(text)
+            else:
+                out.append(cached.get(key) or fresh.get(key) or text[:FALLBACK_CHARS])
+        return out
+
+    async def _summarize(self, text: str, lengths: tuple[int, int]) -> str | None:
+        max_length, min_length = lengths
+        async with self._semaphore:
+            try:
+                result = await self.hf.inference_json(
+                    SUMMARY_MODEL,
+                    {
+                        "inputs": text,
+                        "parameters": {
+                            "max_length": max_length,
+                            "min_length": min_length,
+                            "do_sample": False,
+                        },
+                    },
+                    task="summarization",
+                )
+            except Exception as exc:
+                logger.warning("Narrative chunk summarization failed, using raw text: %s", exc)
+                return None
+        if isinstance(result, list) and len(result) > 0:
+            return result[0].get("summary_text")
+        return None
+
+
+def _finding_text(finding) -> str:
+    caption = getattr(finding, "ai_caption", "") or ""
+    transcription = getattr(finding, "transcription", "") or ""
+    text = (caption or transcription or getattr(finding, "description", "") or "").strip()
+    if text and text[-1] not in ".!?":
+        text += "."
+    return text or "No description."
+
+
+def _pack(parts: list[str], limit: int = CHUNK_CHARS) -> list[str]:
+    """Greedily join parts into chunks of at most `limit` characters (oversized parts are cut)."""
+    chunks: list[str] = []
+    current = ""
+    for part in parts:
+        part = part[:limit]
+        if current and len(current) + 1 + len(part) > limit:
+            chunks.append(current)
+            current = part
+        else:
+            current = f"{current} {part}" if current else part
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _cache_key(text: str, lengths: tuple[int, int]) -> str:
+    return hashlib.sha256(f"{SUMMARY_MODEL}|{lengths[0]}|{lengths[1]}|{text}".encode()).hexdigest()
@@ -0,0 +1,145 @@
+"""
+Per-org classification profiles built from Organization.settings:
+
+    {
+      "confidence_threshold": 0.7,                  # below → needs_review
+      "categories": ["water damage", "mold", ...],   # empty → DEFECT_CATEGORIES
+      "category_severity": {"mold": "high"}          # overrides CATEGORY_SEVERITY
+    }
+
+Profiles are cached in-process for ORG_PROFILE_TTL_SECONDS and dropped when
+an org's settings are updated through the API, so pipelines resolve an org's
+profile without a DB round trip per file. Profiles are immutable and hashable:
+derived artifacts (Gemini prompts, label embeddings) are cached per profile
+by the modules that build them.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.organization import Organization
+from app.services.image_processor import CATEGORY_SEVERITY, CONFIDENCE_THRESHOLD, DEFECT_CATEGORIES
+
+logger = logging.getLogger(__name__)
+
+ORG_PROFILE_TTL_SECONDS = float(os.getenv("ORG_PROFILE_TTL_SECONDS", "300"))
+SEVERITIES = ("critical", "high", "medium", "low", "clear")
+# Always offered, so every profile can say "nothing found"
+CLEAR_CATEGORY = "clear/no defect"
+
+
+@dataclass(frozen=True)
+class ClassificationProfile:
+    categories: tuple[str, ...]
+    severities: tuple[tuple[str, str], ...]  # (category, severity), in category order
+    confidence_threshold: float
+
+    def severity_of(self, category: str) -> str:
+        return dict(self.severities).get(category, CATEGORY_SEVERITY.get(category, "medium"))
+
+    def needs_review(self, confidence: float) -> bool:
+        return confidence < self.confidence_threshold
+
+    def fingerprint(self) -> str:
+        """Short hash of the profile, stable across processes (unlike hash())."""
+        payload = json.dumps([self.categories, self.severities, self.confidence_threshold])
+        return hashlib.sha256(payload.encode()).hexdigest()[:12]
+
+    @classmethod
+    def from_settings(cls, settings: dict | None) -> "ClassificationProfile":
+        """Build a profile from an org's settings, ignoring malformed entries."""
+        settings = settings or {}
+        categories = [c.strip().lower() for c in settings.get("categories") or [] if isinstance(c, str) and c.strip()]
+        categories = list(dict.fromkeys(categories or DEFECT_CATEGORIES))
+        if CLEAR_CATEGORY not in categories:
+            categories.append(CLEAR_CATEGORY)
+
+        overrides = {
+            str(category).lower(): severity
+            for category, severity in (settings.get("category_severity") or {}).items()
+            if severity in SEVERITIES
+        }
+        severities = tuple(
+            (category, overrides.get(category, CATEGORY_SEVERITY.get(category, "medium")))
+            for category in categories
+        )
+
+        threshold = settings.get("confidence_threshold")
+        if isinstance(threshold, bool) or not isinstance(threshold, (int, float)) or not 0 <= threshold <= 1:
+            threshold = CONFIDENCE_THRESHOLD
+        return cls(tuple(categories), severities, float(threshold))
+
+
+DEFAULT_PROFILE = ClassificationProfile.from_settings(None)
+
+
+def validate_settings(settings: dict) -> list[str]:
+    """Problems with classification settings, for rejecting an update (empty if valid)."""
+    errors = []
+    threshold = settings.get("confidence_threshold")
+    if threshold is not None and (
+        isinstance(threshold, bool) or not isinstance(threshold, (int, float)) or not 0 <= threshold <= 1
+    ):
+        errors.append("confidence_threshold must be a number between 0 and 1")
+    categories = settings.get("categories")
+    if categories is not None and (
+        not isinstance(categories, list) or not all(isinstance(c, str) and c.strip() for c in categories)
+    ):
+        errors.append("categories must be a list of non-empty strings")
+    overrides = settings.get("category_severity")
+    if overrides is not None:
+        if not isinstance(overrides, dict):
+            errors.append("category_severity must be an object")
+        else:
+            bad = sorted(str(c) for c, severity in overrides.items() if severity not in SEVERITIES)
+            if bad:
+                errors.append(f"category_severity values must be one of {', '.join(SEVERITIES)} (invalid: {', '.join(bad)})")
+    return errors
+
+
+class OrgProfileCache:
+    """Thread-safe TTL cache of org id → ClassificationProfile."""
+
+    def __init__(self, ttl_seconds: float = ORG_PROFILE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: dict[UUID, tuple[ClassificationProfile, float]] = {}
+
+    def get(self, db: Session, org_id: UUID | str | None) -> ClassificationProfile:
+        """The org's profile; reads the org's settings only on a miss or after the TTL."""
+        if org_id is None:
+            return DEFAULT_PROFILE
+        org_id = UUID(str(org_id))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(org_id)
+        if entry is not None and now - entry[1] < self.ttl_seconds:
+            return entry[0]
+
+        settings = db.scalar(select(Organization.settings).where(Organization.id == org_id))
+        profile = ClassificationProfile.from_settings(settings)
+        # Share the default instance so its derived artifacts are built once
+        if profile == DEFAULT_PROFILE:
+            profile = DEFAULT_PROFILE
+        with self._lock:
+            self._entries[org_id] = (profile, now)
+        return profile
+
+    def invalidate(self, org_id: UUID | str | None = None) -> None:
+        """Drop one org's cached profile (all of them without an id)."""
+        with self._lock:
+            if org_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(UUID(str(org_id)), None)
+
+
+org_profiles = OrgProfileCache()
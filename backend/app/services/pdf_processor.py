@@ -7,11 +7,8 @@ from io import BytesIO
 from pypdf import PdfReader
 
 from app.services.hf_client import HFInferenceClient
-from app.services.image_processor import (
-    DEFECT_CATEGORIES,
-    CATEGORY_SEVERITY,
-    CONFIDENCE_THRESHOLD,
-)
+from app.services.image_processor import CLASSIFIER_MODEL
+from app.services.org_profiles import DEFAULT_PROFILE, ClassificationProfile
 
 logger = logging.getLogger(__name__)
 
@@ -32,8 +29,8 @@ class PdfProcessor:
         logger.info("Extracted %d chars from %d pages", len(full_text), len(reader.pages))
         return full_text
 
-    async def classify_text(self, text: str) -> dict:
-        """Classify extracted text into defect categories."""
+    async def classify_text(self, text: str, profile: ClassificationProfile = DEFAULT_PROFILE) -> dict:
+        """Classify extracted text into the profile's defect categories."""
         if not text or len(text.strip()) < 10:
             return {
                 "category": "clear/no defect",
@@ -45,21 +42,22 @@ class PdfProcessor:
 
         # Use first 1024 chars for classification (BART token limit)
         result = await self.hf.inference_json(
-            "facebook/bart-large-mnli",
+            CLASSIFIER_MODEL,
             {
                 "inputs": text[:1024],
-                "parameters": {"candidate_labels": DEFECT_CATEGORIES},
+                "parameters": {"candidate_labels": list(profile.categories)},
             },
+            task="zero_shot_classification",
         )
-        labels = result.get("labels", DEFECT_CATEGORIES)
-        scores = result.get("scores", [0.0] * len(DEFECT_CATEGORIES))
+        labels = result.get("labels", list(profile.categories))
+        scores = result.get("scores", [0.0] * len(profile.categories))
         top_label = labels[0]
         top_score = scores[0]
 
         return {
             "category": top_label,
             "confidence": top_score,
-            "severity": CATEGORY_SEVERITY.get(top_label, "medium"),
-            "needs_review": top_score < CONFIDENCE_THRESHOLD,
+            "severity": profile.severity_of(top_label),
+            "needs_review": profile.needs_review(top_score),
             "all_scores": dict(zip(labels, scores)),
         }
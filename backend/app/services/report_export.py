@@ -0,0 +1,223 @@
+"""
+Render inspection reports for export: PDF (narrative, thumbnails, findings
+table), CSV and JSONL (one finding per row/line).
+
+Renderers write to a local path and stream findings from the database, so
+memory stays flat for large inspections. Exports are cached by a version
+derived from the inspection and its findings; see export_version().
+"""
+import asyncio
+import csv
+import hashlib
+import io
+import json
+import logging
+from collections.abc import Iterable
+from pathlib import Path
+from uuid import UUID
+from xml.sax.saxutils import escape
+
+from PIL import Image
+from sqlalchemy.orm import Session
+
+from app.models.file import File
+from app.models.inspection import Inspection
+from app.repositories.finding_repository import FindingRepository
+from app.services.storage_service import download_file
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ("pdf", "csv", "jsonl")
+CONTENT_TYPES = {
+    "pdf": "application/pdf",
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+}
+# Bump when a renderer's output changes so cached exports are re-rendered
+EXPORT_LAYOUT_VERSION = 1
+MAX_THUMBNAILS = 24
+THUMBNAIL_PX = 240
+# Longest text shown in a PDF table cell
+PDF_CELL_CHARS = 300
+
+EXPORT_COLUMNS = [
+    "id",
+    "file_id",
+    "file_name",
+    "category",
+    "severity",
+    "confidence_score",
+    "needs_review",
+    "description",
+    "ai_caption",
+    "transcription",
+    "location_code",
+    "equipment_id",
+    "created_at",
+]
+
+
+def export_version(db: Session, inspection: Inspection, format: str) -> str:
+    """
+    Version of an export: changes whenever the inspection row or any of its
+    findings changes, so an unchanged inspection is served from the cache.
+    """
+    count, last_updated = FindingRepository(db).change_stamp(inspection.id)
+    raw = f"{EXPORT_LAYOUT_VERSION}|{format}|{inspection.updated_at}|{count}|{last_updated}"
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+def export_key(org_id: UUID, inspection_id: UUID, version: str, format: str) -> str:
+    return f"exports/{org_id}/{inspection_id}/{version}.{format}"
+
+
+def _cell(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, UUID):
+        return str(value)
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def render_csv(rows: Iterable, path: Path) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(EXPORT_COLUMNS)
+        for row in rows:
+            writer.writerow([_cell(getattr(row, col)) for col in EXPORT_COLUMNS])
+
+
+def finding_record(row) -> dict:
+    """JSON-ready dict for one exported finding row (any selected columns)."""
+    record = {}
+    for key, value in row._mapping.items():
+        if isinstance(value, UUID):
+            value = str(value)
+        elif hasattr(value, "isoformat"):
+            value = value.isoformat()
+        elif hasattr(value, "tolist"):  # pgvector embedding (numpy array)
+            value = value.tolist()
+        record[key] = value
+    if "extra_metadata" in record:
+        record["extra_metadata"] = record["extra_metadata"] or {}
+    return record
+
+
+def render_jsonl(rows: Iterable, path: Path) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(finding_record(row), default=str))
+            f.write("\n")
+
+
+async def collect_thumbnails(db: Session, inspection_id: UUID, limit: int = MAX_THUMBNAILS) -> list[tuple[str, bytes]]:
+    """(file name, JPEG thumbnail) for up to `limit` processed images of the inspection."""
+    files = (
+        db.query(File.file_name, File.storage_key)
+        .filter(File.inspection_id == inspection_id, File.file_type == "image", File.status == "completed")
+        .order_by(File.created_at)
+        .limit(limit)
+        .all()
+    )
+
+    async def _thumb(file_name: str, storage_key: str) -> tuple[str, bytes] | None:
+        try:
+            data = await download_file(storage_key)
+            return file_name, await asyncio.to_thread(_make_thumbnail, data)
+        except Exception as exc:
+            logger.warning("Skipping thumbnail for %s: %s", file_name, exc)
+            return None
+
+    results = await asyncio.gather(*(_thumb(f.file_name, f.storage_key) for f in files))
+    return [r for r in results if r is not None]
+
+
+def _make_thumbnail(data: bytes) -> bytes:
+    with Image.open(io.BytesIO(data)) as img:
+        img = img.convert("RGB")
+        img.thumbnail((THUMBNAIL_PX, THUMBNAIL_PX))
+        out = io.BytesIO()
+        img.save(out, format="JPEG", quality=80)
+        return out.getvalue()
+
+
+def render_pdf(inspection: Inspection, rows: Iterable, thumbnails: list[tuple[str, bytes]], path: Path) -> None:
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.units import mm
+    from reportlab.platypus import Image as PdfImage
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+    styles = getSampleStyleSheet()
+    small = styles["BodyText"].clone("small", fontSize=8, leading=10)
+
+    def para(text, style=small) -> Paragraph:
+        text = _cell(text)
+        if len(text) > PDF_CELL_CHARS:
+            text = text[:PDF_CELL_CHARS] + "…"
+        return Paragraph(escape(text), style)
+
+    story = [
+        Paragraph(escape(inspection.name), styles["Title"]),
+        Paragraph(
+            escape(
+                f"Location: {inspection.site_location or '-'} · Status: {inspection.status} · "
+                f"Risk: {inspection.risk_level or '-'} · Files: {inspection.total_files or 0} · "
+                f"Findings: {inspection.total_findings or 0}"
+            ),
+            styles["Normal"],
+        ),
+        Spacer(1, 6 * mm),
+        Paragraph("Summary", styles["Heading2"]),
+        Paragraph(escape(inspection.report_narrative or "No narrative available."), styles["BodyText"]),
+    ]
+
+    if thumbnails:
+        story += [Spacer(1, 4 * mm), Paragraph("Images", styles["Heading2"])]
+        size = 40 * mm
+        cells = [[PdfImage(io.BytesIO(data), width=size, height=size, kind="proportional"), para(name)]
+                 for name, data in thumbnails]
+        grid = [sum(cells[i:i + 2], []) for i in range(0, len(cells), 2)]
+        if len(grid[-1]) < 4:
+            grid[-1] += ["", ""]
+        story.append(Table(grid, colWidths=[size + 4 * mm, 40 * mm] * 2))
+
+    story += [Spacer(1, 4 * mm), Paragraph("Findings", styles["Heading2"])]
+    header = ["Category", "Severity", "Confidence", "Review", "File", "Details"]
+    data = [[para(h) for h in header]]
+    for row in rows:
+        details = row.description or row.ai_caption or row.transcription or ""
+        data.append([
+            para(row.category),
+            para(row.severity),
+            para(f"{row.confidence_score:.0%}" if row.confidence_score is not None else ""),
+            para("yes" if row.needs_review else ""),
+            para(row.file_name),
+            para(details),
+        ])
+    table = Table(data, repeatRows=1, colWidths=[25 * mm, 18 * mm, 20 * mm, 14 * mm, 30 * mm, 73 * mm])
+    table.setStyle(TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#eeeeee")),
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+    ]))
+    story.append(table)
+
+    SimpleDocTemplate(str(path), pagesize=A4, title=inspection.name).build(story)
+
+
+async def render_report(db: Session, inspection: Inspection, format: str, path: Path) -> None:
+    """Render one export format of the inspection to `path`."""
+    rows = FindingRepository(db).iter_for_export(inspection.id)
+    if format == "csv":
+        render_csv(rows, path)
+    elif format == "jsonl":
+        render_jsonl(rows, path)
+    elif format == "pdf":
+        thumbnails = await collect_thumbnails(db, inspection.id)
+        render_pdf(inspection, rows, thumbnails, path)
+    else:
+        raise ValueError(f"Unknown export format: {format}")
@@ -0,0 +1,105 @@
+"""
+Bulk human review: apply a batch of reviewer corrections in one transaction.
+Every reviewed finding gets a human_reviews row, takes the corrected category
+and severity and leaves the review queue. Finalized inspections get their risk
+level and review status recomputed; the narrative is left for the next
+finalize, which sees the changed findings.
+"""
+import logging
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.repositories.finding_repository import FindingRepository
+from app.repositories.human_review_repository import HumanReviewRepository
+from app.repositories.inspection_repository import InspectionRepository
+from app.services.inspection_completion_service import SEVERITY_WEIGHTS
+from app.services.inspection_events import publish_event
+from app.services.org_profiles import SEVERITIES, org_profiles
+
+logger = logging.getLogger(__name__)
+
+
+class ReviewService:
+    def __init__(self, db: Session):
+        self.db = db
+        self.finding_repo = FindingRepository(db)
+        self.review_repo = HumanReviewRepository(db)
+        self.inspection_repo = InspectionRepository(db)
+
+    def apply_batch(self, org_id: UUID, reviews: list[dict], reviewer_id: UUID | None = None) -> dict:
+        """
+        Record the reviews (finding_id, corrected_category, corrected_severity, notes,
+        review_duration_seconds; corrections may be None) and update their findings
+        and inspections, all or nothing.
+        Raises ValueError for an invalid batch and LookupError for findings the org doesn't have.
+        """
+        ids = [review["finding_id"] for review in reviews]
+        if len(set(ids)) != len(ids):
+            raise ValueError("Each finding can be reviewed once per batch")
+        bad = sorted({
+            r["corrected_severity"] for r in reviews
+            if r.get("corrected_severity") and r["corrected_severity"] not in SEVERITIES
+        })
+        if bad:
+            raise ValueError(f"Severity must be one of {', '.join(SEVERITIES)} (invalid: {', '.join(bad)})")
+
+        try:
+            current = {row.id: row for row in self.finding_repo.lock_for_review(org_id, ids)}
+            missing = [str(finding_id) for finding_id in ids if finding_id not in current]
+            if missing:
+                raise LookupError(missing)
+
+            profile = org_profiles.get(self.db, org_id)
+            review_rows, changes = [], []
+            for review in reviews:
+                finding = current[review["finding_id"]]
+                category = (review.get("corrected_category") or finding.category).strip().lower()
+                if review.get("corrected_severity"):
+                    severity = review["corrected_severity"]
+                elif category != finding.category:
+                    severity = profile.severity_of(category)
+                else:
+                    severity = finding.severity
+                review_rows.append({
+                    "finding_id": finding.id,
+                    "reviewer_id": reviewer_id,
+                    "original_category": finding.category,
+                    "corrected_category": category,
+                    "original_severity": finding.severity,
+                    "corrected_severity": severity,
+                    "notes": review.get("notes"),
+                    "review_duration_seconds": review.get("review_duration_seconds"),
+                })
+                changes.append({"id": finding.id, "category": category, "severity": severity, "needs_review": False})
+
+            self.review_repo.create_many(review_rows, commit=False)
+            self.finding_repo.update_many(changes, commit=False)
+
+            inspection_ids = {finding.inspection_id for finding in current.values()}
+            for inspection_id in inspection_ids:
+                count = sum(1 for finding in current.values() if finding.inspection_id == inspection_id)
+                publish_event(self.db, inspection_id, "findings_reviewed", count=count)
+            refreshed = self.inspection_repo.refresh_review_state(list(inspection_ids), SEVERITY_WEIGHTS, commit=False)
+            for row in refreshed:
+                publish_event(self.db, row.id, "inspection", status=row.status, risk_level=row.risk_level)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        corrected = sum(
+            1 for row in review_rows
+            if (row["corrected_category"], row["corrected_severity"]) != (row["original_category"], row["original_severity"])
+        )
+        logger.info(
+            "Recorded %d review(s) (%d corrected) across %d inspection(s)",
+            len(review_rows), corrected, len(inspection_ids),
+        )
+        return {
+            "reviewed": len(review_rows),
+            "corrected": corrected,
+            "inspections": [
+                {"id": str(row.id), "status": row.status, "risk_level": row.risk_level} for row in refreshed
+            ],
+        }
@@ -0,0 +1,213 @@
+"""
+Storage backends: local filesystem and S3-compatible object storage (AWS S3, MinIO, R2).
+Selected with STORAGE_BACKEND=local|s3. All I/O methods are async; blocking
+filesystem and boto3 calls run in worker threads.
+"""
+import asyncio
+import os
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import BinaryIO
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local")
+
+# Local upload directory (configurable via env)
+LOCAL_UPLOAD_DIR = Path(os.getenv("LOCAL_UPLOAD_DIR") or tempfile.gettempdir()) / "auditpilot_uploads"
+
+# S3-compatible settings; S3_ENDPOINT_URL points at MinIO/R2, leave empty for AWS
+S3_BUCKET = os.getenv("S3_BUCKET", "")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL") or None
+S3_REGION = os.getenv("S3_REGION", "us-east-1")
+S3_ACCESS_KEY_ID = os.getenv("S3_ACCESS_KEY_ID") or None
+S3_SECRET_ACCESS_KEY = os.getenv("S3_SECRET_ACCESS_KEY") or None
+
+
+class StorageBackend(ABC):
+    """Key/value blob storage addressed by slash-separated keys."""
+
+    @abstractmethod
+    async def put_fileobj(self, key: str, fileobj: BinaryIO, content_type: str | None = None) -> str:
+        """Stream a file object into storage. Returns the storage URL."""
+
+    @abstractmethod
+    async def put_path(self, key: str, path: Path, content_type: str | None = None) -> str:
+        """Copy a local file into storage, leaving the source in place. Returns the storage URL."""
+
+    @abstractmethod
+    async def get_bytes(self, key: str) -> bytes:
+        """Read an object. Raises FileNotFoundError if it doesn't exist."""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Delete an object; missing objects are ignored."""
+
+    @abstractmethod
+    async def size(self, key: str) -> int | None:
+        """Object size in bytes, or None if it doesn't exist."""
+
+    @abstractmethod
+    def url_for(self, key: str) -> str:
+        """Stable storage URL recorded in files.storage_url."""
+
+    @abstractmethod
+    def presigned_get_url(self, key: str, expiration: int = 3600) -> str:
+        """URL a client can download the object from."""
+
+    def presigned_put_url(self, key: str, content_type: str | None = None, expiration: int = 3600) -> str | None:
+        """URL a client can PUT the object to directly, or None if unsupported."""
+        return None
+
+
+class LocalStorageBackend(StorageBackend):
+    def __init__(self, root: Path = LOCAL_UPLOAD_DIR):
+        self.root = root
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.root / key.replace("/", os.sep)
+
+    async def put_fileobj(self, key: str, fileobj: BinaryIO, content_type: str | None = None) -> str:
+        path = self._path(key)
+        await asyncio.to_thread(_copy_fileobj, fileobj, path)
+        return str(path)
+
+    async def put_path(self, key: str, path: Path, content_type: str | None = None) -> str:
+        dest = self._path(key)
+        await asyncio.to_thread(_link_or_copy, path, dest)
+        return str(dest)
+
+    async def get_bytes(self, key: str) -> bytes:
+        path = self._path(key)
+        if not path.exists():
+            raise FileNotFoundError(f"File not found: {key}")
+        return await asyncio.to_thread(path.read_bytes)
+
+    async def delete(self, key: str) -> None:
+        self._path(key).unlink(missing_ok=True)
+
+    async def size(self, key: str) -> int | None:
+        path = self._path(key)
+        return path.stat().st_size if path.exists() else None
+
+    def url_for(self, key: str) -> str:
+        return str(self._path(key))
+
+    def presigned_get_url(self, key: str, expiration: int = 3600) -> str:
+        """Return local file path (no presigned URLs for local storage)."""
+        return str(self._path(key))
+
+
+class S3StorageBackend(StorageBackend):
+    def __init__(
+        self,
+        bucket: str = S3_BUCKET,
+        endpoint_url: str | None = S3_ENDPOINT_URL,
+        region: str = S3_REGION,
+    ):
+        import boto3
+        from botocore.config import Config
+
+        if not bucket:
+            raise ValueError("S3_BUCKET must be set when STORAGE_BACKEND=s3")
+        self.bucket = bucket
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region,
+            aws_access_key_id=S3_ACCESS_KEY_ID,
+            aws_secret_access_key=S3_SECRET_ACCESS_KEY,
+            # Path-style addressing and SigV4 work for both AWS and MinIO
+            config=Config(signature_version="s3v4", s3={"addressing_style": "path"}),
+        )
+
+    def _extra(self, content_type: str | None) -> dict:
+        return {"ContentType": content_type} if content_type else {}
+
+    async def put_fileobj(self, key: str, fileobj: BinaryIO, content_type: str | None = None) -> str:
+        await asyncio.to_thread(
+            self.client.upload_fileobj, fileobj, self.bucket, key, ExtraArgs=self._extra(content_type)
+        )
+        return self.url_for(key)
+
+    async def put_path(self, key: str, path: Path, content_type: str | None = None) -> str:
+        await asyncio.to_thread(
+            self.client.upload_file, str(path), self.bucket, key, ExtraArgs=self._extra(content_type)
+        )
+        return self.url_for(key)
+
+    async def get_bytes(self, key: str) -> bytes:
+        from botocore.exceptions import ClientError
+
+        def _get() -> bytes:
+            try:
+                return self.client.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+            except ClientError as exc:
+                if exc.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+                    raise FileNotFoundError(f"File not found: {key}") from exc
+                raise
+
+        return await asyncio.to_thread(_get)
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self.client.delete_object, Bucket=self.bucket, Key=key)
+
+    async def size(self, key: str) -> int | None:
+        from botocore.exceptions import ClientError
+
+        def _head() -> int | None:
+            try:
+                return self.client.head_object(Bucket=self.bucket, Key=key)["ContentLength"]
+            except ClientError as exc:
+                if exc.response.get("Error", {}).get("Code") in ("NoSuchKey", "404", "NotFound"):
+                    return None
+                raise
+
+        return await asyncio.to_thread(_head)
+
+    def url_for(self, key: str) -> str:
+        return f"s3://{self.bucket}/{key}"
+
+    def presigned_get_url(self, key: str, expiration: int = 3600) -> str:
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": key},
+            ExpiresIn=expiration,
+        )
+
+    def presigned_put_url(self, key: str, content_type: str | None = None, expiration: int = 3600) -> str | None:
+        params = {"Bucket": self.bucket, "Key": key, **self._extra(content_type)}
+        return self.client.generate_presigned_url("put_object", Params=params, ExpiresIn=expiration)
+
+
+def _copy_fileobj(fileobj: BinaryIO, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fileobj.seek(0)
+    with open(path, "wb") as out:
+        shutil.copyfileobj(fileobj, out, length=1024 * 1024)
+
+
+def _link_or_copy(src: Path, dest: Path) -> None:
+    """Hard-link when possible (same filesystem, no byte copy), else copy."""
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copyfile(src, dest)
+
+
+_backend: StorageBackend | None = None
+
+
+def get_storage_backend() -> StorageBackend:
+    """Process-wide backend selected by STORAGE_BACKEND."""
+    global _backend
+    if _backend is None:
+        if STORAGE_BACKEND == "s3":
+            _backend = S3StorageBackend()
+        elif STORAGE_BACKEND == "local":
+            _backend = LocalStorageBackend()
+        else:
+            raise ValueError(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND}")
+    return _backend
@@ -1,16 +1,22 @@
 """
 Storage service for file upload/download.
-Uses local filesystem storage.
+Delegates to the configured StorageBackend (local filesystem or S3-compatible).
+Uploads are content-addressed: objects live under the sha256 of their bytes
+(see BlobRepository for reference counting).
 """
+import asyncio
+import hashlib
 import os
 import uuid
-import tempfile
 from pathlib import Path
-from fastapi import UploadFile
+from typing import BinaryIO
 
-# Local upload directory (configurable via env)
-LOCAL_UPLOAD_DIR = Path(os.getenv("LOCAL_UPLOAD_DIR", tempfile.gettempdir())) / "auditpilot_uploads"
-LOCAL_UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+from app.services.storage_backends import LOCAL_UPLOAD_DIR, get_storage_backend
+
+# Presigned URL lifetime for direct uploads/downloads
+PRESIGNED_URL_EXPIRATION = int(os.getenv("PRESIGNED_URL_EXPIRATION", "3600"))
+# In-progress resumable uploads live here until finalized (always local disk)
+PARTIAL_UPLOAD_DIR = LOCAL_UPLOAD_DIR / ".partial"
 
 
 def _object_key(org_id: str, inspection_id: str, file_name: str) -> str:
@@ -20,39 +26,97 @@ def _object_key(org_id: str, inspection_id: str, file_name: str) -> str:
     return f"{org_id}/{inspection_id}/{unique}"
 
 
-async def upload_file(
-    file: UploadFile,
-    org_id: str,
-    inspection_id: str,
-) -> tuple[str, str]:
+def blob_key(sha256: str) -> str:
+    """Storage key of a content-addressed blob, sharded two levels deep: blobs/ab/cd/abcd..."""
+    return f"blobs/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+def _digest_fileobj(fileobj: BinaryIO) -> tuple[str, int]:
+    fileobj.seek(0)
+    h = hashlib.sha256()
+    size = 0
+    while chunk := fileobj.read(1024 * 1024):
+        h.update(chunk)
+        size += len(chunk)
+    fileobj.seek(0)
+    return h.hexdigest(), size
+
+
+def _digest_path(path: Path) -> tuple[str, int]:
+    with open(path, "rb") as f:
+        return _digest_fileobj(f)
+
+
+async def content_digest(fileobj: BinaryIO) -> tuple[str, int]:
+    """(sha256 hex, size in bytes) of a file object, read in a worker thread."""
+    return await asyncio.to_thread(_digest_fileobj, fileobj)
+
+
+async def content_digest_path(path: Path) -> tuple[str, int]:
+    """(sha256 hex, size in bytes) of a local file."""
+    return await asyncio.to_thread(_digest_path, path)
+
+
+async def store_blob(sha256: str, fileobj: BinaryIO, content_type: str | None = None) -> str:
+    """Stream a file object into storage under its blob key. Returns the storage URL."""
+    return await get_storage_backend().put_fileobj(blob_key(sha256), fileobj, content_type)
+
+
+async def store_blob_path(sha256: str, path: Path, content_type: str | None = None) -> str:
     """
-    Upload file to local filesystem. Returns (storage_key, storage_url).
+    Copy a local file (e.g. a finalized resumable upload) into storage under its
+    blob key, leaving the source in place. Returns the storage URL.
     """
-    key = _object_key(org_id, inspection_id, file.filename or "file")
-    content = await file.read()
+    return await get_storage_backend().put_path(blob_key(sha256), path, content_type)
+
+
+async def store_path(storage_key: str, path: Path, content_type: str | None = None) -> str:
+    """Copy a local file into storage under a fixed key (e.g. a rendered export). Returns the storage URL."""
+    return await get_storage_backend().put_path(storage_key, path, content_type)
+
 
-    local_path = LOCAL_UPLOAD_DIR / key.replace("/", os.sep)
-    local_path.parent.mkdir(parents=True, exist_ok=True)
-    local_path.write_bytes(content)
-    return key, str(local_path)
+def partial_upload_path(upload_id: str) -> Path:
+    """Temp file that chunks of a resumable upload are written into."""
+    return PARTIAL_UPLOAD_DIR / f"{upload_id}.part"
 
 
 async def download_file(storage_key: str) -> bytes:
     """Download file bytes by storage key."""
-    local_path = LOCAL_UPLOAD_DIR / storage_key.replace("/", os.sep)
-    if not local_path.exists():
-        raise FileNotFoundError(f"File not found: {storage_key}")
-    return local_path.read_bytes()
+    return await get_storage_backend().get_bytes(storage_key)
 
 
 async def delete_file(storage_key: str) -> None:
     """Delete file from storage."""
-    local_path = LOCAL_UPLOAD_DIR / storage_key.replace("/", os.sep)
-    if local_path.exists():
-        local_path.unlink()
+    await get_storage_backend().delete(storage_key)
+
+
+async def object_size(storage_key: str) -> int | None:
+    """Size of a stored object, or None if it doesn't exist."""
+    return await get_storage_backend().size(storage_key)
+
 
+def storage_url(storage_key: str) -> str:
+    return get_storage_backend().url_for(storage_key)
 
-def generate_presigned_url(storage_key: str, expiration: int = 3600) -> str:
-    """Return local file path (no presigned URLs for local storage)."""
-    local_path = LOCAL_UPLOAD_DIR / storage_key.replace("/", os.sep)
-    return str(local_path)
+
+def generate_presigned_url(storage_key: str, expiration: int = PRESIGNED_URL_EXPIRATION) -> str:
+    """Download URL (a local path for the local backend)."""
+    return get_storage_backend().presigned_get_url(storage_key, expiration)
+
+
+def generate_presigned_upload(
+    org_id: str,
+    inspection_id: str,
+    file_name: str,
+    content_type: str | None = None,
+    expiration: int = PRESIGNED_URL_EXPIRATION,
+) -> tuple[str, str] | None:
+    """
+    Allocate a storage key and a presigned PUT URL for a direct-to-storage upload.
+    Returns (storage_key, upload_url), or None if the backend can't presign uploads.
+    """
+    key = _object_key(org_id, inspection_id, file_name)
+    url = get_storage_backend().presigned_put_url(key, content_type, expiration)
+    if url is None:
+        return None
+    return key, url
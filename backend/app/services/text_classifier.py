@@ -0,0 +1,245 @@
+"""
+Embedding-similarity classifier for transcriptions and PDF text.
+
+Each defect category is represented by the normalized mean embedding of a few
+descriptive prototype sentences, embedded once per process. A text is
+classified by cosine similarity between its embedding (which the pipelines
+compute anyway) and the category prototypes, turned into probabilities with a
+softmax. The softmax temperature and the smallest top-1/top-2 probability
+margin to trust are calibrated on human-reviewed findings; below that margin
+the BART zero-shot classifier decides instead, so only ambiguous texts pay for
+the extra rate-limited call.
+"""
+import logging
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.core.database import SessionLocal
+from app.core.metrics import TEXT_CLASSIFICATIONS
+from app.repositories.finding_repository import FindingRepository
+from app.services.embedding_service import MODEL as EMBEDDING_MODEL, EmbeddingService
+from app.services.hf_client import HFInferenceClient
+from app.services.org_profiles import DEFAULT_PROFILE, ClassificationProfile
+
+logger = logging.getLogger(__name__)
+
+# "embedding": prototype similarity with zero-shot fallback; "zero_shot": always BART
+TEXT_CLASSIFIER = os.getenv("TEXT_CLASSIFIER", "embedding")
+# Used until CLASSIFIER_MIN_REVIEWS reviewed findings are available for calibration
+CLASSIFIER_TEMPERATURE = float(os.getenv("CLASSIFIER_TEMPERATURE", "0.05"))
+CLASSIFIER_MIN_MARGIN = float(os.getenv("CLASSIFIER_MIN_MARGIN", "0.2"))
+CLASSIFIER_MIN_REVIEWS = int(os.getenv("CLASSIFIER_MIN_REVIEWS", "50"))
+# Accuracy the embedding classifier must reach on reviewed findings above the margin
+CLASSIFIER_TARGET_ACCURACY = float(os.getenv("CLASSIFIER_TARGET_ACCURACY", "0.9"))
+CLASSIFIER_CALIBRATION_SECONDS = float(os.getenv("CLASSIFIER_CALIBRATION_SECONDS", "3600"))
+
+# Descriptive sentences per built-in category, embedded alongside the category
+# name (an org's own categories are represented by their name alone)
+CATEGORY_PROTOTYPES: dict[str, list[str]] = {
+    "structural damage": [
+        "large crack running through the foundation wall",
+        "sagging roof beam and buckling support columns",
+        "spalling concrete with exposed corroded rebar",
+    ],
+    "electrical hazard": [
+        "exposed live wiring and an open junction box",
+        "scorched outlet with melted insulation",
+        "overloaded breaker panel missing its cover",
+    ],
+    "water damage": [
+        "water stains and mold on the ceiling from a leak",
+        "pipe leaking with standing water on the floor",
+        "rotting drywall and swollen flooring from moisture",
+    ],
+    "fire risk": [
+        "blocked fire exit and missing extinguisher",
+        "combustible materials stored next to a heater",
+        "smoke detector missing or not working",
+    ],
+    "equipment issue": [
+        "machine making grinding noise and not operating correctly",
+        "HVAC unit broken and leaking refrigerant",
+        "worn belts and damaged equipment needing repair",
+    ],
+    "fall hazard": [
+        "missing guardrail on an elevated platform",
+        "loose stair tread and broken handrail",
+        "slippery floor and unsecured ladder",
+    ],
+    "clear/no defect": [
+        "everything looks good, no issues found",
+        "area inspected and in satisfactory condition",
+        "routine inspection with nothing to report",
+    ],
+}
+
+# Softmax temperatures tried during calibration
+_TEMPERATURES = np.geomspace(0.005, 0.5, 40)
+
+
+@dataclass(frozen=True)
+class Calibration:
+    temperature: float
+    min_margin: float
+    samples: int = 0
+
+
+class EmbeddingClassifier:
+    """
+    Process-wide prototype classifier. Prototypes and calibration are loaded
+    lazily and kept per category set, so orgs sharing categories share them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._prototypes: dict[tuple[str, ...], np.ndarray] = {}
+        # category set → (calibration, when it was fitted)
+        self._calibrations: dict[tuple[str, ...], tuple[Calibration, float]] = {}
+
+    async def classify(
+        self,
+        hf: HFInferenceClient,
+        text: str,
+        embedding: list[float],
+        fallback,
+        profile: ClassificationProfile = DEFAULT_PROFILE,
+    ) -> dict:
+        """
+        Classify `text` into the profile's categories from its embedding. Calls
+        `fallback(text, profile)` (BART zero-shot) when the classifier is off, the
+        text is too short, or the margin is too low.
+        """
+        vector = np.asarray(embedding, dtype=np.float32)
+        if TEXT_CLASSIFIER != "embedding" or not text or len(text.strip()) < 10 or not vector.any():
+            return await fallback(text, profile)
+        categories = profile.categories
+        try:
+            prototypes = await self._load_prototypes(hf, categories)
+        except Exception as exc:
+            logger.warning("Prototype embeddings unavailable, using zero-shot: %s", exc)
+            TEXT_CLASSIFICATIONS.labels("zero_shot").inc()
+            return await fallback(text, profile)
+
+        calibration = self._current_calibration(categories, prototypes)
+        probs = _softmax(_normalize(vector) @ prototypes.T, calibration.temperature)
+        order = np.argsort(probs)[::-1]
+        margin = float(probs[order[0]] - probs[order[1]])
+        if margin < calibration.min_margin:
+            logger.info("Embedding classifier margin %.2f below %.2f, using zero-shot", margin, calibration.min_margin)
+            TEXT_CLASSIFICATIONS.labels("zero_shot").inc()
+            return await fallback(text, profile)
+
+        TEXT_CLASSIFICATIONS.labels("embedding").inc()
+        category = categories[order[0]]
+        confidence = float(probs[order[0]])
+        return {
+            "category": category,
+            "confidence": confidence,
+            "severity": profile.severity_of(category),
+            "needs_review": profile.needs_review(confidence),
+            "all_scores": {categories[i]: float(probs[i]) for i in order},
+        }
+
+    async def _load_prototypes(self, hf: HFInferenceClient, categories: tuple[str, ...]) -> np.ndarray:
+        """One unit-length prototype row per category, in the given order."""
+        prototypes = self._prototypes.get(categories)
+        if prototypes is not None:
+            return prototypes
+        texts = [[category, *CATEGORY_PROTOTYPES.get(category, [])] for category in categories]
+        flat = await EmbeddingService(hf).generate_embeddings([text for group in texts for text in group])
+        vectors = _normalize(np.asarray(flat, dtype=np.float32))
+        rows, start = [], 0
+        for group in texts:
+            rows.append(vectors[start:start + len(group)].mean(axis=0))
+            start += len(group)
+        prototypes = _normalize(np.stack(rows))
+        with self._lock:
+            if categories not in self._prototypes:
+                self._prototypes[categories] = prototypes
+                logger.info("Embedded %d prototype(s) for %d categories", len(flat), len(categories))
+            return self._prototypes[categories]
+
+    def _current_calibration(self, categories: tuple[str, ...], prototypes: np.ndarray) -> Calibration:
+        default = Calibration(CLASSIFIER_TEMPERATURE, CLASSIFIER_MIN_MARGIN)
+        with self._lock:
+            previous, fitted_at = self._calibrations.get(categories, (default, -math.inf))
+            if time.monotonic() - fitted_at < CLASSIFIER_CALIBRATION_SECONDS:
+                return previous
+            # Claim the refresh so concurrent callers keep using the previous calibration
+            self._calibrations[categories] = (previous, time.monotonic())
+        try:
+            calibration = self.calibrate(categories, prototypes)
+        except Exception:
+            logger.exception("Classifier calibration failed, keeping the previous one")
+            return previous
+        with self._lock:
+            self._calibrations[categories] = (calibration, time.monotonic())
+        return calibration
+
+    def calibrate(self, categories: tuple[str, ...], prototypes: np.ndarray) -> Calibration:
+        """
+        Fit the temperature (lowest negative log-likelihood of the reviewers'
+        categories) and the smallest margin above which the classifier's accuracy
+        on reviewed findings reaches CLASSIFIER_TARGET_ACCURACY.
+        """
+        db = SessionLocal()
+        try:
+            # Image findings embed Gemini descriptions, a different distribution: skip them
+            rows = FindingRepository(db).list_reviewed_embeddings(EMBEDDING_MODEL, file_types=("audio", "pdf"))
+        finally:
+            db.close()
+
+        index = {category: i for i, category in enumerate(categories)}
+        latest = {}
+        for row in rows:  # newest review first: keep each finding's final verdict
+            if row.finding_id not in latest and row.corrected_category in index:
+                latest[row.finding_id] = row
+        if len(latest) < CLASSIFIER_MIN_REVIEWS:
+            logger.info("%d reviewed finding(s), classifier uses default calibration", len(latest))
+            return Calibration(CLASSIFIER_TEMPERATURE, CLASSIFIER_MIN_MARGIN, len(latest))
+
+        embeddings = _normalize(np.asarray([row.embedding for row in latest.values()], dtype=np.float32))
+        labels = np.asarray([index[row.corrected_category] for row in latest.values()])
+        similarities = embeddings @ prototypes.T
+
+        def nll(temperature: float) -> float:
+            probs = _softmax(similarities, temperature)
+            return float(-np.log(probs[np.arange(len(labels)), labels] + 1e-12).mean())
+
+        temperature = float(min(_TEMPERATURES, key=nll))
+        probs = _softmax(similarities, temperature)
+        top2 = np.sort(probs, axis=1)[:, -2:]
+        margins = top2[:, 1] - top2[:, 0]
+        correct = probs.argmax(axis=1) == labels
+
+        # Accuracy of the predictions with margin >= each candidate threshold
+        order = np.argsort(margins)[::-1]
+        accuracy = np.cumsum(correct[order]) / np.arange(1, len(order) + 1)
+        meets = np.nonzero(accuracy >= CLASSIFIER_TARGET_ACCURACY)[0]
+        # No margin is trustworthy: always fall back to zero-shot
+        min_margin = float(margins[order][meets.max()]) if len(meets) else math.inf
+        logger.info(
+            "Calibrated classifier on %d reviewed finding(s): temperature=%.3f min_margin=%.3f (%.0f%% handled)",
+            len(labels), temperature, min_margin, 100 * (margins >= min_margin).mean(),
+        )
+        return Calibration(temperature, min_margin, len(labels))
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def _softmax(similarities: np.ndarray, temperature: float) -> np.ndarray:
+    logits = similarities / temperature
+    logits = logits - logits.max(axis=-1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+text_classifier = EmbeddingClassifier()
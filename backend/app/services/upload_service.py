@@ -0,0 +1,158 @@
+"""
+Register stored uploads: create files rows plus their processing jobs in one
+transaction, then hand the jobs to the job scheduler.
+Shared by the multipart, resumable and direct-to-storage upload paths.
+"""
+import logging
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.repositories.blob_repository import BlobRepository
+from app.repositories.file_repository import FileRepository
+from app.repositories.processing_job_repository import ProcessingJobRepository
+from app.services.inspection_events import publish_event
+from app.services.storage_service import blob_key, delete_file
+from app.services.gemini_client import GEMINI_BATCH_SIZE
+from app.workers.file_processor import process_file_background, process_image_batch_background
+from app.workers.leases import JOB_LEASE_SECONDS, WORKER_ID
+from app.workers.leases import lease_keeper
+from app.workers.scheduler import job_scheduler
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_IMAGE = {"image/jpeg", "image/png", "image/jpg"}
+ALLOWED_AUDIO = {"audio/mpeg", "audio/mp3", "audio/m4a", "audio/x-m4a", "audio/wav"}
+ALLOWED_PDF = {"application/pdf"}
+ALLOWED = ALLOWED_IMAGE | ALLOWED_AUDIO | ALLOWED_PDF
+MAX_SIZE = 50 * 1024 * 1024  # 50MB
+
+
+def file_type_from_mime(mime: str | None, filename: str) -> str:
+    if mime in ALLOWED_IMAGE:
+        return "image"
+    if mime in ALLOWED_AUDIO:
+        return "audio"
+    if mime in ALLOWED_PDF:
+        return "pdf"
+    if filename and filename.lower().endswith((".jpg", ".jpeg", ".png")):
+        return "image"
+    if filename and filename.lower().endswith((".mp3", ".m4a", ".wav")):
+        return "audio"
+    if filename and filename.lower().endswith(".pdf"):
+        return "pdf"
+    return "other"
+
+
+def is_allowed(mime: str | None, filename: str) -> bool:
+    return mime in ALLOWED or file_type_from_mime(mime, filename) != "other"
+
+
+def acquire_blobs(db: Session, digests: list[tuple[str, int, str | None]]) -> set[str]:
+    """
+    Reference one blob per (sha256, size, mime_type), no commit. Returns the hashes
+    that are new to the blob store; only those objects need writing, and they must
+    be written before the caller commits.
+    """
+    return BlobRepository(db).acquire_many(
+        [
+            {"sha256": sha, "storage_key": blob_key(sha), "size": size, "mime_type": mime}
+            for sha, size, mime in digests
+        ]
+    )
+
+
+async def discard_blobs(shas) -> None:
+    """
+    Best-effort removal of objects written for new blobs after a failed upload.
+    Call before rolling back, while the blobs row locks are still held.
+    """
+    for sha in shas:
+        try:
+            await delete_file(blob_key(sha))
+        except Exception:
+            logger.warning("Failed to clean up blob %s", sha)
+
+
+def register_files(
+    db: Session,
+    inspection_id: UUID,
+    org_id: UUID,
+    entries: list[dict],
+    priority: str = "interactive",
+) -> tuple[list[dict], list[tuple[str, str, str]]]:
+    """
+    Insert files rows and processing jobs for already-stored objects (no commit).
+    Each entry takes FileRepository.create() fields minus inspection_id.
+    priority is the jobs' scheduling class ("interactive" or "backfill").
+    Returns (response items, dispatch tuples of (job_id, file_id, file_type)),
+    both read from RETURNING so no reload is needed after the caller commits.
+    """
+    records = FileRepository(db).create_many(
+        [{"inspection_id": inspection_id, **entry} for entry in entries],
+        commit=False,
+    )
+    lease_expires_at = datetime.now(timezone.utc) + timedelta(seconds=JOB_LEASE_SECONDS)
+    jobs = ProcessingJobRepository(db).create_many(
+        [
+            {
+                "file_id": rec.id,
+                "inspection_id": inspection_id,
+                "org_id": org_id,
+                "file_type": rec.file_type,
+                "priority": priority,
+                # This process dispatches the jobs, so it holds their leases
+                "lease_owner": WORKER_ID,
+                "lease_expires_at": lease_expires_at,
+            }
+            for rec in records
+        ],
+        commit=False,
+    )
+    if records:
+        publish_event(db, inspection_id, "files_added", count=len(records))
+    created = [{"id": str(rec.id), "file_name": rec.file_name, "status": rec.status} for rec in records]
+    dispatch = [(str(job.id), str(job.file_id), job.file_type) for job in jobs]
+    return created, dispatch
+
+
+def enqueue_jobs(
+    inspection_id: UUID,
+    org_id: UUID,
+    dispatch: list[tuple[str, str, str]],
+    priority: str = "interactive",
+) -> None:
+    """
+    Submit committed jobs to the job scheduler under the org's fair share.
+    Images are grouped into tasks of up to GEMINI_BATCH_SIZE so they share
+    batched Gemini requests.
+    """
+    # Renew the jobs' leases from now until their task is done with them
+    lease_keeper.track(job_id for job_id, _, _ in dispatch)
+    images = [(job_id, file_id) for job_id, file_id, file_type in dispatch if file_type == "image"]
+    if GEMINI_BATCH_SIZE > 1 and len(images) > 1:
+        for i in range(0, len(images), GEMINI_BATCH_SIZE):
+            batch = images[i:i + GEMINI_BATCH_SIZE]
+            job_scheduler.submit(
+                process_image_batch_background,
+                str(inspection_id),
+                batch,
+                str(org_id),  # positional: the org_id keyword is the scheduler's
+                org_id=str(org_id),
+                priority=priority,
+                cost=len(batch),
+            )
+        dispatch = [entry for entry in dispatch if entry[2] != "image"]
+
+    for job_id, file_id, file_type in dispatch:
+        job_scheduler.submit(
+            process_file_background,
+            file_id,
+            file_type,
+            str(inspection_id),
+            job_id,
+            str(org_id),
+            org_id=str(org_id),
+            priority=priority,
+        )
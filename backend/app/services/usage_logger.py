@@ -0,0 +1,179 @@
+"""
+Batched writer for model call usage logs.
+Records are buffered in memory and bulk-inserted into usage_logs every
+USAGE_LOG_BATCH_SIZE records or USAGE_LOG_FLUSH_SECONDS, whichever comes first,
+so instrumenting a model call never adds a DB round trip to the call itself.
+"""
+import contextvars
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from uuid import UUID
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.models.file import File
+from app.models.inspection import Inspection
+from app.models.usage_log import UsageLog
+
+logger = logging.getLogger(__name__)
+
+USAGE_LOG_BATCH_SIZE = int(os.getenv("USAGE_LOG_BATCH_SIZE", "50"))
+USAGE_LOG_FLUSH_SECONDS = float(os.getenv("USAGE_LOG_FLUSH_SECONDS", "5"))
+# Upper bound on buffered records if the DB is unreachable; oldest are dropped.
+USAGE_LOG_MAX_BUFFER = 10_000
+
+# inspection/file the current task is working on, used to attribute calls
+_usage_context: contextvars.ContextVar[dict] = contextvars.ContextVar("usage_context", default={})
+
+
+@contextmanager
+def usage_context(inspection_id: UUID | None = None, file_id: UUID | None = None):
+    """Attribute every model call made inside this block to an inspection/file."""
+    token = _usage_context.set({"inspection_id": inspection_id, "file_id": file_id})
+    try:
+        yield
+    finally:
+        _usage_context.reset(token)
+
+
+class UsageLogWriter:
+    """Thread-safe in-memory buffer flushed by a daemon thread."""
+
+    def __init__(self, batch_size: int = USAGE_LOG_BATCH_SIZE, flush_interval: float = USAGE_LOG_FLUSH_SECONDS):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer: list[dict] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def record(
+        self,
+        model_name: str,
+        task_type: str,
+        *,
+        status: str,
+        processing_time_ms: int,
+        bytes_sent: int | None = None,
+        bytes_received: int | None = None,
+        http_status: int | None = None,
+        retry_count: int = 0,
+        input_tokens: int | None = None,
+        output_tokens: int | None = None,
+    ) -> None:
+        """Buffer one model call attempt. Never touches the database."""
+        ctx = _usage_context.get()
+        row = {
+            "inspection_id": ctx.get("inspection_id"),
+            "file_id": ctx.get("file_id"),
+            "model_name": model_name,
+            "task_type": task_type,
+            "status": status,
+            "processing_time_ms": processing_time_ms,
+            "bytes_sent": bytes_sent,
+            "bytes_received": bytes_received,
+            "http_status": http_status,
+            "retry_count": retry_count,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+        }
+        with self._lock:
+            self._buffer.append(row)
+            size = len(self._buffer)
+            if size > USAGE_LOG_MAX_BUFFER:
+                del self._buffer[: size - USAGE_LOG_MAX_BUFFER]
+        self._ensure_started()
+        if size >= self.batch_size:
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        """
+        Bulk-insert everything buffered so far. Returns the number of rows written.
+        If the insert fails, the records go back to the front of the buffer for the next flush.
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._buffer = self._buffer, []
+            if not batch:
+                return 0
+            db = SessionLocal()
+            try:
+                try:
+                    db.execute(insert(UsageLog), batch)
+                except IntegrityError:
+                    # Calls attributed to an inspection or file deleted since
+                    db.rollback()
+                    batch = _without_deleted_refs(db, batch)
+                    if batch:
+                        db.execute(insert(UsageLog), batch)
+                db.commit()
+                return len(batch)
+            except Exception as exc:
+                db.rollback()
+                logger.warning("Failed to write %d usage log records, retrying next flush: %s", len(batch), exc)
+                self._requeue(batch)
+                return 0
+            finally:
+                db.close()
+
+    def _requeue(self, batch: list[dict]) -> None:
+        """Put unwritten records back ahead of newer ones, keeping at most USAGE_LOG_MAX_BUFFER."""
+        with self._lock:
+            self._buffer = batch + self._buffer
+            size = len(self._buffer)
+            if size > USAGE_LOG_MAX_BUFFER:
+                del self._buffer[: size - USAGE_LOG_MAX_BUFFER]
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="usage-log-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+
+def _without_deleted_refs(db: Session, batch: list[dict]) -> list[dict]:
+    """
+    Apply what the usage_logs foreign keys would have done had the records been
+    written before their inspection or file was deleted: drop records of deleted
+    inspections (ON DELETE CASCADE) and clear deleted files (ON DELETE SET NULL).
+    """
+    inspection_ids = {row["inspection_id"] for row in batch if row["inspection_id"] is not None}
+    file_ids = {row["file_id"] for row in batch if row["file_id"] is not None}
+    live_inspections = set()
+    if inspection_ids:
+        live_inspections = set(db.scalars(select(Inspection.id).where(Inspection.id.in_(inspection_ids))))
+    live_files = set()
+    if file_ids:
+        live_files = set(db.scalars(select(File.id).where(File.id.in_(file_ids))))
+    kept = []
+    for row in batch:
+        if row["inspection_id"] is not None and row["inspection_id"] not in live_inspections:
+            continue
+        if row["file_id"] is not None and row["file_id"] not in live_files:
+            row = {**row, "file_id": None}
+        kept.append(row)
+    if len(kept) < len(batch):
+        logger.info("Dropped %d usage log records of deleted inspections", len(batch) - len(kept))
+    return kept
+
+
+usage_log_writer = UsageLogWriter()
+
+
+def record_model_call(model_name: str, task_type: str, **kwargs) -> None:
+    """Record one model call attempt on the shared writer."""
+    usage_log_writer.record(model_name, task_type, **kwargs)
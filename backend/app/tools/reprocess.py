@@ -0,0 +1,434 @@
+"""
+Bulk reprocessing of existing findings after a model, prompt or mapping change.
+
+    python -m app.tools.reprocess --stage embed
+    python -m app.tools.reprocess --stage severity --stage analyze --org <uuid> --since 2025-01-01
+
+Stages:
+  embed     re-embed finding text with the current embedding model
+  severity  re-derive severity from CATEGORY_SEVERITY (and each org's overrides)
+  analyze   re-run the file's ML pipeline and replace its findings
+
+By default only rows produced by another configuration are selected (their
+analysis_version / embedding_model / severity differ from the current one);
+--all selects everything in range. Findings with human reviews are left alone
+by severity and analyze unless --include-reviewed is given.
+
+Rows are taken in id order, --batch-size at a time, with up to --concurrency
+model calls in flight on one shared client per API, so the client-side rate
+limits and circuit breakers apply to the whole run. Each batch is written in
+one transaction and then recorded in the checkpoint file: an interrupted run
+started again with the same options resumes after the last written batch.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from uuid import UUID
+
+from sqlalchemy import and_, case, exists, func, or_, select, true
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.core.deadline import deadline
+from app.models.file import File
+from app.models.finding import Finding
+from app.models.human_review import HumanReview
+from app.models.inspection import Inspection
+from app.models.organization import Organization
+from app.repositories.finding_repository import FindingRepository
+from app.repositories.inspection_repository import InspectionRepository
+from app.services.embedding_service import MODEL as EMBEDDING_MODEL, EmbeddingService
+from app.services.hf_client import HFInferenceClient
+from app.services.image_processor import CATEGORY_SEVERITY
+from app.services.inspection_completion_service import InspectionCompletionService
+from app.services.job_tracker import JobTracker
+from app.services.org_profiles import DEFAULT_PROFILE, ClassificationProfile, org_profiles
+from app.services.storage_service import download_file
+from app.services.usage_logger import usage_log_writer
+from app.workers.file_processor import FILE_DEADLINE_SECONDS, analysis_version, analyze_file
+
+logger = logging.getLogger("app.tools.reprocess")
+
+STAGES = ("embed", "severity", "analyze")
+PIPELINE_TYPES = ("image", "audio", "pdf")
+DEFAULT_CHECKPOINT = "reprocess.checkpoint.json"
+
+
+@dataclass
+class Selection:
+    org_id: UUID | None
+    since: datetime | None
+    until: datetime | None
+    all: bool
+    include_reviewed: bool
+
+
+class Checkpoint:
+    """
+    Per-stage progress in a JSON file, replaced atomically after every batch.
+    Tied to the options and current model versions it was written with.
+    """
+
+    def __init__(self, path: Path, params: dict, restart: bool = False):
+        self.path = path
+        self.params = params
+        self.stages: dict[str, dict] = {}
+        if path.exists() and not restart:
+            saved = json.loads(path.read_text())
+            if saved.get("params") != params:
+                raise SystemExit(
+                    f"{path} was written for different options or model versions; "
+                    "pass --restart to discard it or --checkpoint to use another file"
+                )
+            self.stages = saved.get("stages", {})
+
+    def stage(self, name: str) -> dict:
+        return self.stages.setdefault(name, {"after": None, "done": 0, "failed": 0, "complete": False})
+
+    def save(self) -> None:
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps({"params": self.params, "stages": self.stages}, indent=2))
+        os.replace(tmp, self.path)
+
+
+class Progress:
+    """Throughput and ETA for one stage, logged after every batch."""
+
+    def __init__(self, stage: str, total: int):
+        self.stage = stage
+        self.total = total
+        self.processed = 0
+        self.failed = 0
+        self.started = time.monotonic()
+
+    def update(self, processed: int, failed: int) -> None:
+        self.processed += processed
+        self.failed += failed
+        elapsed = time.monotonic() - self.started
+        rate = self.processed / elapsed if elapsed > 0 else 0.0
+        eta = (self.total - self.processed) / rate if rate > 0 else 0.0
+        logger.info(
+            "%s: %d/%d (%.1f%%), %.2f rows/s, ETA %s, %d failed",
+            self.stage, self.processed, self.total,
+            100.0 * self.processed / self.total if self.total else 100.0,
+            rate, _duration(eta), self.failed,
+        )
+
+
+class Reprocessor:
+    def __init__(self, db: Session, hf: HFInferenceClient, selection: Selection, concurrency: int):
+        self.db = db
+        self.hf = hf
+        self.selection = selection
+        self.findings = FindingRepository(db)
+        self.profiles = custom_profiles(db, selection.org_id)
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    # ---------- selection ----------
+
+    def select_ids(self, stage: str):
+        """Ids (findings, or files for analyze) the stage should process."""
+        sel = self.selection
+        if stage == "analyze":
+            key = File.id
+            stmt = (
+                select(File.id)
+                .join(Inspection, Inspection.id == File.inspection_id)
+                .where(File.status == "completed", File.file_type.in_(PIPELINE_TYPES))
+            )
+            created_at = File.created_at
+            org_column = Inspection.org_id
+            if not sel.all:
+                stmt = stmt.where(or_(*(
+                    and_(
+                        File.file_type == file_type,
+                        exists().where(
+                            Finding.file_id == File.id,
+                            Finding.analysis_version.is_distinct_from(self._current_version(file_type)),
+                        ),
+                    )
+                    for file_type in PIPELINE_TYPES
+                )))
+            if not sel.include_reviewed:
+                stmt = stmt.where(~exists().where(HumanReview.finding_id == Finding.id, Finding.file_id == File.id))
+        else:
+            key = Finding.id
+            stmt = select(Finding.id)
+            created_at = Finding.created_at
+            org_column = Finding.org_id
+            if stage == "embed":
+                # Placeholder findings of failed analyses have nothing worth embedding
+                stmt = stmt.where(or_(
+                    Finding.extra_metadata.is_(None),
+                    ~Finding.extra_metadata.has_key("pipeline_error"),
+                ))
+                if not sel.all:
+                    stmt = stmt.where(Finding.embedding_model.is_distinct_from(EMBEDDING_MODEL))
+            else:
+                stmt = stmt.where(self._severity_scope(stale_only=not sel.all))
+                if not sel.include_reviewed:
+                    stmt = stmt.where(~exists().where(HumanReview.finding_id == Finding.id))
+
+        if sel.org_id is not None:
+            stmt = stmt.where(org_column == sel.org_id)
+        if sel.since is not None:
+            stmt = stmt.where(created_at >= sel.since)
+        if sel.until is not None:
+            stmt = stmt.where(created_at < sel.until)
+        return stmt, key
+
+    def _severity_scope(self, stale_only: bool):
+        """
+        Findings whose category has a severity in their org's profile (built-in or the
+        org's own categories) and, if stale_only, whose severity differs from it.
+        """
+        def _scope(severities: dict[str, str]):
+            clause = Finding.category.in_(list(severities))
+            if stale_only:
+                clause = and_(clause, Finding.severity.is_distinct_from(case(severities, value=Finding.category)))
+            return clause
+
+        clauses = [
+            and_(
+                Finding.org_id == org_id,
+                _scope({c: profile.severity_of(c) for c in [*CATEGORY_SEVERITY, *profile.categories]}),
+            )
+            for org_id, profile in self.profiles.items()
+        ]
+        default_orgs = or_(Finding.org_id.is_(None), Finding.org_id.notin_(list(self.profiles))) if self.profiles else true()
+        clauses.append(and_(default_orgs, _scope(CATEGORY_SEVERITY)))
+        return or_(*clauses)
+
+    def _current_version(self, file_type: str):
+        """The analysis_version a file's findings should have, by the file's org."""
+        default = analysis_version(file_type)
+        if not self.profiles:
+            return default
+        return case(
+            {org_id: analysis_version(file_type, profile) for org_id, profile in self.profiles.items()},
+            value=Inspection.org_id,
+            else_=default,
+        )
+
+    # ---------- stages ----------
+
+    async def run_stage(self, stage: str, state: dict, checkpoint: Checkpoint, batch_size: int, dry_run: bool) -> None:
+        if state["complete"]:
+            logger.info("%s: already complete in checkpoint, skipping", stage)
+            return
+        selected, key = self.select_ids(stage)
+        after = UUID(state["after"]) if state["after"] else None
+
+        def _page():
+            return selected if after is None else selected.where(key > after)
+
+        total = self.db.scalar(select(func.count()).select_from(_page().subquery()))
+        logger.info("%s: %d row(s) to process (%d done before resuming)", stage, total, state["done"])
+        if dry_run:
+            return
+
+        progress = Progress(stage, total)
+        handler = {"embed": self._reembed, "severity": self._reseverity, "analyze": self._reanalyze}[stage]
+        while True:
+            ids = list(self.db.scalars(_page().order_by(key).limit(batch_size)))
+            if not ids:
+                break
+            failed = await handler(ids)
+            after = ids[-1]
+            state["after"] = str(after)
+            state["done"] += len(ids) - failed
+            state["failed"] += failed
+            checkpoint.save()
+            progress.update(len(ids), failed)
+        state["complete"] = True
+        checkpoint.save()
+        logger.info(
+            "%s: finished, %d row(s) in %s, %d failed",
+            stage, progress.processed, _duration(time.monotonic() - progress.started), progress.failed,
+        )
+
+    async def _reembed(self, ids: list[UUID]) -> int:
+        rows = self.db.execute(
+            select(Finding.id, Finding.ai_caption, Finding.transcription, Finding.description, Finding.extra_metadata)
+            .where(Finding.id.in_(ids))
+        ).all()
+        embed_svc = EmbeddingService(self.hf)
+
+        async def _embed(row):
+            # Same text the pipelines embed (PDFs: the stored preview of the extracted text)
+            text = row.ai_caption or row.transcription or (row.extra_metadata or {}).get("preview") or row.description or ""
+            async with self._semaphore:
+                return await embed_svc.generate_embedding(text)
+
+        results = await asyncio.gather(*(_embed(row) for row in rows), return_exceptions=True)
+        changes = []
+        for row, result in zip(rows, results):
+            if isinstance(result, BaseException):
+                logger.warning("finding_id=%s embedding failed: %s", row.id, result)
+                continue
+            changes.append({"id": row.id, "embedding": result, "embedding_model": EMBEDDING_MODEL})
+        self.findings.update_many(changes)
+        return len(rows) - len(changes)
+
+    async def _reseverity(self, ids: list[UUID]) -> int:
+        rows = self.db.execute(
+            select(Finding.id, Finding.inspection_id, Finding.category, Finding.severity, Finding.org_id)
+            .where(Finding.id.in_(ids))
+        ).all()
+        target = {row.id: org_profiles.get(self.db, row.org_id).severity_of(row.category) for row in rows}
+        changed = [row for row in rows if row.severity != target[row.id]]
+        self.findings.update_many([{"id": row.id, "severity": target[row.id]} for row in changed])
+        await self._refinalize({row.inspection_id for row in changed})
+        return 0
+
+    async def _reanalyze(self, ids: list[UUID]) -> int:
+        files = self.db.execute(
+            select(File.id, File.inspection_id, File.file_type, File.storage_key, Inspection.org_id)
+            .join(Inspection, Inspection.id == File.inspection_id)
+            .where(File.id.in_(ids))
+        ).all()
+        profiles = {f.org_id: org_profiles.get(self.db, f.org_id) for f in files}
+
+        async def _analyze(f) -> list[dict]:
+            async with self._semaphore:
+                with deadline(FILE_DEADLINE_SECONDS):
+                    data = await download_file(f.storage_key)
+                    findings = await analyze_file(self.hf, f.id, f.file_type, data, profiles[f.org_id])
+            # Keep the existing findings rather than replace them with a failure placeholder
+            errors = [x["extra_metadata"]["pipeline_error"] for x in findings if "pipeline_error" in (x.get("extra_metadata") or {})]
+            if errors:
+                raise RuntimeError(errors[0])
+            return findings
+
+        results = await asyncio.gather(*(_analyze(f) for f in files), return_exceptions=True)
+        ok, rows = [], []
+        for f, result in zip(files, results):
+            if isinstance(result, BaseException):
+                logger.warning("file_id=%s reanalysis failed, findings kept: %s", f.id, result)
+                continue
+            ok.append(f)
+            for finding in result:
+                finding.update(
+                    inspection_id=f.inspection_id,
+                    file_id=f.id,
+                    analysis_version=analysis_version(f.file_type, profiles[f.org_id]),
+                    embedding_model=EMBEDDING_MODEL,
+                )
+                rows.append(finding)
+        try:
+            self.findings.delete_by_files([f.id for f in ok], commit=False)
+            self.findings.create_many(rows, commit=False)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        await self._refinalize({f.inspection_id for f in ok})
+        return len(files) - len(ok)
+
+    async def _refinalize(self, inspection_ids: set[UUID]) -> None:
+        """Recompute risk and narrative of finished inspections whose findings changed."""
+        tracker = JobTracker(self.db)
+        inspections = InspectionRepository(self.db)
+        for inspection_id in inspection_ids:
+            inspection = inspections.get_by_id(inspection_id)
+            if inspection is None or inspection.processing_completed_at is None:
+                continue
+            counts = tracker.update_inspection_progress(inspection_id)
+            if counts is None:
+                continue
+            await InspectionCompletionService(self.db, self.hf).finalize(
+                inspection_id, total_files=counts["total"], failed_files=counts["failed"]
+            )
+
+
+def custom_profiles(db: Session, org_id: UUID | None = None) -> dict[UUID, ClassificationProfile]:
+    """Classification profiles of the orgs (or the one org) whose settings change the defaults."""
+    stmt = select(Organization.id, Organization.settings).where(Organization.settings.isnot(None))
+    if org_id is not None:
+        stmt = stmt.where(Organization.id == org_id)
+    profiles = {row.id: ClassificationProfile.from_settings(row.settings) for row in db.execute(stmt)}
+    return {org: profile for org, profile in profiles.items() if profile != DEFAULT_PROFILE}
+
+
+def _duration(seconds: float) -> str:
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}h{minutes:02d}m{seconds:02d}s" if hours else f"{minutes}m{seconds:02d}s"
+
+
+def _target_versions(profiles: dict[UUID, ClassificationProfile]) -> dict:
+    """
+    Current model versions and custom org profiles; a checkpoint is only resumed
+    against the same ones.
+    """
+    return {
+        "embedding_model": EMBEDDING_MODEL,
+        "analysis": {file_type: analysis_version(file_type) for file_type in PIPELINE_TYPES},
+        "severity": hashlib.sha256(json.dumps(CATEGORY_SEVERITY, sort_keys=True).encode()).hexdigest()[:12],
+        "profiles": {str(org_id): profile.fingerprint() for org_id, profile in sorted(profiles.items())},
+    }
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.tools.reprocess",
+        description="Re-run pipeline stages over existing findings.",
+    )
+    parser.add_argument("--stage", action="append", choices=STAGES, required=True,
+                        help="stage to run; repeat to run several, in the order given")
+    parser.add_argument("--org", type=UUID, help="only this org's inspections")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="created at or after (ISO date/time)")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="created before (ISO date/time)")
+    parser.add_argument("--all", action="store_true",
+                        help="include rows already produced by the current configuration")
+    parser.add_argument("--include-reviewed", action="store_true",
+                        help="also change findings that have human reviews (analyze deletes those reviews)")
+    parser.add_argument("--concurrency", type=int, default=4, help="model calls in flight (default 4)")
+    parser.add_argument("--batch-size", type=int, default=100, help="rows per write transaction (default 100)")
+    parser.add_argument("--checkpoint", type=Path, default=Path(DEFAULT_CHECKPOINT),
+                        help=f"progress file (default {DEFAULT_CHECKPOINT})")
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    parser.add_argument("--dry-run", action="store_true", help="only count what would be processed")
+    return parser.parse_args(argv)
+
+
+async def run(args: argparse.Namespace) -> None:
+    selection = Selection(
+        org_id=args.org,
+        since=args.since,
+        until=args.until,
+        all=args.all,
+        include_reviewed=args.include_reviewed,
+    )
+    db = SessionLocal(expire_on_commit=False)
+    hf = HFInferenceClient()
+    try:
+        reprocessor = Reprocessor(db, hf, selection, args.concurrency)
+        params = {
+            "selection": json.loads(json.dumps(asdict(selection), default=str)),
+            "versions": _target_versions(reprocessor.profiles),
+        }
+        checkpoint = Checkpoint(args.checkpoint, params, restart=args.restart)
+        for stage in args.stage:
+            await reprocessor.run_stage(stage, checkpoint.stage(stage), checkpoint, args.batch_size, args.dry_run)
+    finally:
+        await hf.close()
+        db.close()
+        usage_log_writer.flush()
+
+
+def main(argv: list[str] | None = None) -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(run(parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Storage cleanup: a daemon thread that periodically deletes blobs whose last
+reference is gone (e.g. files cascaded away with their inspection or org),
+direct uploads that were presigned but never registered, and expired resumable
+upload sessions with their partial files.
+Runs beside the job lease keeper, on its own thread, so slow storage deletes
+never delay lease renewals.
+"""
+import asyncio
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.repositories.blob_repository import BlobRepository
+from app.repositories.direct_upload_repository import DirectUploadRepository
+from app.repositories.upload_session_repository import UploadSessionRepository
+from app.services.storage_service import delete_file, partial_upload_path
+
+logger = logging.getLogger(__name__)
+
+CLEANUP_SECONDS = float(os.getenv("CLEANUP_SECONDS", "300"))
+CLEANUP_BATCH_SIZE = 100
+
+
+async def collect_blobs(db: Session, shas: list[str] | None = None, limit: int = CLEANUP_BATCH_SIZE) -> int:
+    """
+    Delete unreferenced blobs (among shas, or any) and their objects. The rows are
+    deleted and stay locked until the objects are gone, so a concurrent upload of
+    the same content waits and then writes a fresh object. Returns the count.
+    """
+    try:
+        keys = BlobRepository(db).delete_unreferenced(shas, limit=limit)
+        for key in keys:
+            await delete_file(key)
+        db.commit()
+    except Exception:
+        # Rows come back with ref_count 0; the next pass (or upload) takes them over
+        db.rollback()
+        logger.exception("Blob cleanup failed")
+        return 0
+    if keys:
+        logger.info("Deleted %d unreferenced blob(s)", len(keys))
+    return len(keys)
+
+
+async def collect_direct_uploads(db: Session, limit: int = CLEANUP_BATCH_SIZE) -> int:
+    """
+    Forget presigned keys left unregistered past their deadline and delete whatever
+    was uploaded under them. Returns the count.
+    """
+    try:
+        keys = DirectUploadRepository(db).delete_expired(datetime.now(timezone.utc), limit=limit)
+        for key in keys:
+            await delete_file(key)
+        db.commit()
+    except Exception:
+        db.rollback()
+        logger.exception("Direct upload cleanup failed")
+        return 0
+    if keys:
+        logger.info("Deleted %d expired direct upload(s)", len(keys))
+    return len(keys)
+
+
+def collect_upload_sessions(db: Session, limit: int = CLEANUP_BATCH_SIZE) -> int:
+    """Delete expired resumable upload sessions and their partial files. Returns the count."""
+    try:
+        upload_ids = UploadSessionRepository(db).delete_expired(datetime.now(timezone.utc), limit=limit)
+        for upload_id in upload_ids:
+            partial_upload_path(upload_id).unlink(missing_ok=True)
+        db.commit()
+    except Exception:
+        db.rollback()
+        logger.exception("Upload session cleanup failed")
+        return 0
+    if upload_ids:
+        logger.info("Deleted %d expired upload session(s)", len(upload_ids))
+    return len(upload_ids)
+
+
+class Janitor:
+    """Daemon thread running the cleanup passes every CLEANUP_SECONDS."""
+
+    def __init__(self, interval: float = CLEANUP_SECONDS):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="storage-cleanup", daemon=True)
+                self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                asyncio.run(self.run_once())
+            except Exception:
+                logger.exception("Cleanup pass failed")
+
+    async def run_once(self) -> None:
+        db = SessionLocal()
+        try:
+            while await collect_blobs(db) == CLEANUP_BATCH_SIZE:
+                pass
+            while await collect_direct_uploads(db) == CLEANUP_BATCH_SIZE:
+                pass
+            while collect_upload_sessions(db) == CLEANUP_BATCH_SIZE:
+                pass
+        finally:
+            db.close()
+
+
+janitor = Janitor()
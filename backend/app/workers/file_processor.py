@@ -1,218 +1,510 @@
 """
-Background file processing: called by FastAPI BackgroundTasks after upload.
+Background file processing: run by the job scheduler after upload.
 Runs ML pipelines to generate findings from uploaded files.
 """
 import asyncio
+import hashlib
+import json
 import logging
+import os
+import threading
 import time
+from functools import lru_cache
 from uuid import UUID
 
 from app.core.database import SessionLocal
-from app.repositories.file_repository import FileRepository
+from app.core.deadline import deadline
+from app.core.metrics import (
+    DB_STATEMENTS_PER_FILE,
+    PIPELINES_IN_FLIGHT,
+    count_statements,
+    observe_stage,
+)
+from app.core.profiling import profiled, should_profile_job
 from app.repositories.finding_repository import FindingRepository
 from app.services.hf_client import HFInferenceClient
-from app.services.image_processor import ImageProcessor
+from app.services.image_processor import (
+    CATEGORY_SEVERITY,
+    CLASSIFIER_MODEL,
+    CONFIDENCE_THRESHOLD,
+    DEFECT_CATEGORIES,
+    ImageProcessor,
+)
 from app.services.audio_processor import AudioProcessor
 from app.services.pdf_processor import PdfProcessor
-from app.services.embedding_service import EmbeddingService
+from app.services.embedding_service import MODEL as EMBEDDING_MODEL, EmbeddingService
 from app.services.inspection_completion_service import InspectionCompletionService
+from app.services.org_profiles import DEFAULT_PROFILE, ClassificationProfile, org_profiles
 from app.services.storage_service import download_file
+from app.services.text_classifier import CATEGORY_PROTOTYPES, TEXT_CLASSIFIER, text_classifier
+from app.services.inspection_events import publish_event
 from app.services.job_tracker import JobTracker
+from app.services.usage_logger import usage_context
+from app.workers.leases import JOB_LEASE_SECONDS, WORKER_ID, lease_keeper
 
 logger = logging.getLogger(__name__)
 
+# Time budget for one file's download and model calls (for an image batch: its
+# downloads and batched analysis, then each image's embedding), retries included;
+# clients stop retrying rather than outlive it
+FILE_DEADLINE_SECONDS = float(os.getenv("FILE_DEADLINE_SECONDS", "180"))
 
-def process_file_background(file_id: str, file_type: str, inspection_id: str) -> None:
+
+def process_file_background(
+    file_id: str,
+    file_type: str,
+    inspection_id: str,
+    job_id: str | None = None,
+    org_id: str | None = None,
+) -> None:
     """
-    Synchronous entry point for FastAPI BackgroundTasks.
+    Synchronous entry point run by the job scheduler.
     Creates its own DB session and processes one file.
     """
-    asyncio.run(_process_file(file_id, file_type, inspection_id))
+    in_flight = PIPELINES_IN_FLIGHT.labels(file_type)
+    in_flight.inc()
+    try:
+        with usage_context(inspection_id=UUID(inspection_id), file_id=UUID(file_id)):
+            if should_profile_job():
+                with profiled(f"job-{file_type}-{file_id}", thread_ids={threading.get_ident()}):
+                    asyncio.run(_process_file(file_id, file_type, inspection_id, job_id, org_id))
+            else:
+                asyncio.run(_process_file(file_id, file_type, inspection_id, job_id, org_id))
+    except Exception:
+        # Let the sweeper retry the job instead of renewing its lease forever
+        lease_keeper.abandon([job_id])
+        raise
+    finally:
+        lease_keeper.untrack([job_id])
+        in_flight.dec()
 
 
-async def _process_file(file_id: str, file_type: str, inspection_id: str) -> None:
-    db = SessionLocal()
+async def _process_file(
+    file_id: str,
+    file_type: str,
+    inspection_id: str,
+    job_id: str | None = None,
+    org_id: str | None = None,
+) -> None:
+    # Worker objects are short-lived; skip the post-commit reload SELECTs.
+    db = SessionLocal(expire_on_commit=False)
     hf = HFInferenceClient()
     try:
-        tracker = JobTracker(db)
-        file_repo = FileRepository(db)
-        finding_repo = FindingRepository(db)
-        file_uuid = UUID(file_id)
-        inspection_uuid = UUID(inspection_id)
+        with count_statements() as statements:
+            await _run_pipeline(db, hf, file_id, file_type, inspection_id, job_id, org_id)
+        DB_STATEMENTS_PER_FILE.observe(statements.count)
+        logger.info("file_id=%s issued %d DB statements", file_id, statements.count)
+    finally:
+        await hf.close()
+        db.close()
 
-        tracker.update_file_status(file_uuid, "processing")
-        start = time.monotonic()
 
-        try:
-            # Get file record for storage key
-            file_record = file_repo.get_by_id(file_uuid)
-            if not file_record:
-                raise ValueError(f"File record not found: {file_id}")
+async def _run_pipeline(
+    db,
+    hf: HFInferenceClient,
+    file_id: str,
+    file_type: str,
+    inspection_id: str,
+    job_id: str | None,
+    org_id: str | None = None,
+) -> None:
+    tracker = JobTracker(db)
+    file_uuid = UUID(file_id)
+    inspection_uuid = UUID(inspection_id)
+    job_uuid = UUID(job_id) if job_id else None
+
+    # Claim the file: pending → processing. A duplicate or stale job matches no row.
+    file_record = tracker.claim_file(file_uuid, job_uuid, WORKER_ID, JOB_LEASE_SECONDS)
+    if not file_record:
+        logger.info("file_id=%s not pending or job not leased here, skipping", file_id)
+        return
+    start = time.monotonic()
 
+    try:
+        with deadline(FILE_DEADLINE_SECONDS):
             # Download file bytes from local storage
-            file_bytes = await download_file(file_record.storage_key)
-
-            # Route to appropriate pipeline
-            if file_type == "image":
-                await _process_image(hf, finding_repo, file_uuid, inspection_uuid, file_bytes)
-            elif file_type == "audio":
-                await _process_audio(hf, finding_repo, file_uuid, inspection_uuid, file_bytes)
-            elif file_type == "pdf":
-                await _process_pdf(hf, finding_repo, file_uuid, inspection_uuid, file_bytes)
-            else:
-                logger.info("No ML pipeline for file_type=%s, marking complete", file_type)
-
-        except Exception as e:
-            logger.exception("Processing failed for file_id=%s", file_id)
-            tracker.update_file_status(file_uuid, "failed", error_message=str(e))
-            return
+            with observe_stage(file_type, "download"):
+                file_bytes = await download_file(file_record.storage_key)
 
-        tracker.update_file_status(file_uuid, "completed")
-        tracker.update_inspection_progress(inspection_uuid)
+            profile = org_profiles.get(db, org_id)
+            findings = await analyze_file(hf, file_uuid, file_type, file_bytes, profile)
+        _persist_findings(db, tracker, file_type, file_uuid, inspection_uuid, job_uuid, findings, profile)
 
         duration = time.monotonic() - start
         logger.info("file_id=%s pipeline completed in %.2fs", file_id, duration)
 
-        # Check if all files are done → finalize inspection
-        total = file_repo.total_count_by_inspection(inspection_uuid)
-        completed = file_repo.count_by_inspection_and_status(inspection_uuid, "completed")
-        failed = file_repo.count_by_inspection_and_status(inspection_uuid, "failed")
+    except Exception as e:
+        logger.exception("Processing failed for file_id=%s", file_id)
+        _mark_failed(db, tracker, file_uuid, job_uuid, e)
+
+    await _finalize_if_done(db, hf, tracker, inspection_uuid, file_type)
+
 
-        if completed + failed >= total:
-            completion = InspectionCompletionService(db, hf)
-            await completion.finalize(inspection_uuid)
+async def analyze_file(
+    hf: HFInferenceClient,
+    file_id: UUID,
+    file_type: str,
+    data: bytes,
+    profile: ClassificationProfile = DEFAULT_PROFILE,
+) -> list[dict]:
+    """Run the file type's ML pipeline with the org's profile. Returns Finding dicts (without inspection/file ids)."""
+    if file_type == "image":
+        return await _process_image(hf, file_id, data, profile)
+    if file_type == "audio":
+        return await _process_audio(hf, file_id, data, profile)
+    if file_type == "pdf":
+        return await _process_pdf(hf, file_id, data, profile)
+    logger.info("No ML pipeline for file_type=%s, marking complete", file_type)
+    return []
+
+
+@lru_cache(maxsize=1024)
+def analysis_version(file_type: str, profile: ClassificationProfile = DEFAULT_PROFILE) -> str:
+    """
+    Fingerprint of the models, prompts, labels and severity mapping behind a
+    file type's findings, plus the org's classification profile unless it is
+    the default. Stored on each finding, so findings produced by an older
+    configuration or older org settings can be selected for reprocessing
+    (app.tools.reprocess).
+    """
+    from app.services.audio_processor import TRANSCRIPTION_MODEL
+    from app.services.gemini_client import ANALYSIS_PROMPT, BATCH_ANALYSIS_PROMPT, GEMINI_MODEL
+
+    shared = [
+        CLASSIFIER_MODEL, DEFECT_CATEGORIES, CATEGORY_SEVERITY, CONFIDENCE_THRESHOLD,
+        TEXT_CLASSIFIER, CATEGORY_PROTOTYPES, EMBEDDING_MODEL,
+    ]
+    parts = {
+        "image": [GEMINI_MODEL, ANALYSIS_PROMPT, BATCH_ANALYSIS_PROMPT, CATEGORY_SEVERITY, CONFIDENCE_THRESHOLD],
+        "audio": [TRANSCRIPTION_MODEL, *shared],
+        "pdf": shared,
+    }.get(file_type, [])
+    digest = hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()[:12]
+    # The default profile is made of the constants above already
+    if profile == DEFAULT_PROFILE:
+        return f"{file_type}:{digest}"
+    return f"{file_type}:{digest}:{profile.fingerprint()}"
+
+
+def process_image_batch_background(
+    inspection_id: str,
+    jobs: list[tuple[str | None, str]],
+    org_id: str | None = None,
+) -> None:
+    """
+    Synchronous entry point run by the job scheduler: several images of one
+    inspection, given as (job_id, file_id) pairs, analyzed with batched Gemini requests.
+    """
+    in_flight = PIPELINES_IN_FLIGHT.labels("image")
+    in_flight.inc(len(jobs))
+    job_ids = [job_id for job_id, _ in jobs]
+    try:
+        with usage_context(inspection_id=UUID(inspection_id)):
+            if should_profile_job():
+                with profiled(f"job-image-batch-{inspection_id}", thread_ids={threading.get_ident()}):
+                    asyncio.run(_process_image_batch(inspection_id, jobs, org_id))
+            else:
+                asyncio.run(_process_image_batch(inspection_id, jobs, org_id))
+    except Exception:
+        lease_keeper.abandon(job_ids)
+        raise
+    finally:
+        lease_keeper.untrack(job_ids)
+        in_flight.dec(len(jobs))
+
+
+async def _process_image_batch(inspection_id: str, jobs: list[tuple[str | None, str]], org_id: str | None = None) -> None:
+    from app.services.gemini_client import GeminiVisionClient
+
+    db = SessionLocal(expire_on_commit=False)
+    hf = HFInferenceClient()
+    gemini = GeminiVisionClient()
+    try:
+        with count_statements() as statements:
+            await _run_image_batch(db, hf, gemini, inspection_id, jobs, org_id)
+        DB_STATEMENTS_PER_FILE.observe(statements.count / len(jobs))
+        logger.info("image batch of %d issued %d DB statements", len(jobs), statements.count)
     finally:
+        await gemini.close()
         await hf.close()
         db.close()
 
 
+async def _run_image_batch(
+    db,
+    hf: HFInferenceClient,
+    gemini,
+    inspection_id: str,
+    jobs: list[tuple[str | None, str]],
+    org_id: str | None = None,
+) -> None:
+    tracker = JobTracker(db)
+    inspection_uuid = UUID(inspection_id)
+
+    claimed = []
+    for job_id, file_id in jobs:
+        job_uuid = UUID(job_id) if job_id else None
+        file_record = tracker.claim_file(UUID(file_id), job_uuid, WORKER_ID, JOB_LEASE_SECONDS)
+        if not file_record:
+            logger.info("file_id=%s not pending or job not leased here, skipping", file_id)
+            continue
+        claimed.append((file_record, job_uuid))
+    if not claimed:
+        return
+
+    finished: set[UUID] = set()
+    try:
+        profile = org_profiles.get(db, org_id)
+        # One budget for the downloads and the batched analysis: the images share those requests
+        with deadline(FILE_DEADLINE_SECONDS):
+            with observe_stage("image", "download"):
+                downloads = await asyncio.gather(
+                    *(download_file(file_record.storage_key) for file_record, _ in claimed),
+                    return_exceptions=True,
+                )
+            ready = []
+            for (file_record, job_uuid), data in zip(claimed, downloads):
+                if isinstance(data, BaseException):
+                    logger.error("Download failed for file_id=%s: %s", file_record.id, data)
+                    _mark_failed(db, tracker, file_record.id, job_uuid, data)
+                    finished.add(file_record.id)
+                else:
+                    ready.append((file_record, job_uuid, data))
+
+            classifications = []
+            if ready:
+                with observe_stage("image", "analyze"):
+                    classifications = await gemini.analyze_images([data for _, _, data in ready], profile)
+                logger.info("Analyzed %d image(s) for inspection %s in batched requests", len(ready), inspection_id)
+
+        # Each classified image gets its own budget for its embedding, so images
+        # late in the batch are not failed for time spent on the ones before them
+        for (file_record, job_uuid, _data), classification in zip(ready, classifications):
+            try:
+                with deadline(FILE_DEADLINE_SECONDS):
+                    findings = await _image_findings(hf, file_record.id, classification)
+                _persist_findings(db, tracker, "image", file_record.id, inspection_uuid, job_uuid, findings, profile)
+            except Exception as e:
+                logger.exception("Processing failed for file_id=%s", file_record.id)
+                _mark_failed(db, tracker, file_record.id, job_uuid, e)
+            finished.add(file_record.id)
+    except Exception as e:
+        logger.exception("Image batch failed for inspection %s", inspection_id)
+        for file_record, job_uuid in claimed:
+            if file_record.id not in finished:
+                _mark_failed(db, tracker, file_record.id, job_uuid, e)
+
+    await _finalize_if_done(db, hf, tracker, inspection_uuid, "image")
+
+
+def _persist_findings(
+    db,
+    tracker: JobTracker,
+    file_type: str,
+    file_uuid: UUID,
+    inspection_uuid: UUID,
+    job_uuid: UUID | None,
+    findings: list[dict],
+    profile: ClassificationProfile = DEFAULT_PROFILE,
+) -> None:
+    """Persist all findings and the status change in one transaction."""
+    with observe_stage(file_type, "persist"):
+        for finding in findings:
+            finding.update(inspection_id=inspection_uuid, file_id=file_uuid)
+            finding.setdefault("analysis_version", analysis_version(file_type, profile))
+            finding.setdefault("embedding_model", EMBEDDING_MODEL)
+        finding_ids = FindingRepository(db).create_many(findings, commit=False)
+        if finding_ids:
+            publish_event(db, inspection_uuid, "findings", file_id=str(file_uuid), count=len(finding_ids))
+        if not tracker.finish_job(job_uuid, "completed", WORKER_ID, commit=False):
+            _lease_lost(db, file_uuid, job_uuid)
+            return
+        tracker.update_file_status(file_uuid, "completed", commit=False)
+        db.commit()
+    logger.info("file_id=%s persisted %d finding(s)", file_uuid, len(findings))
+
+
+def _mark_failed(db, tracker: JobTracker, file_uuid: UUID, job_uuid: UUID | None, error: BaseException) -> None:
+    db.rollback()
+    if not tracker.finish_job(job_uuid, "failed", WORKER_ID, commit=False):
+        _lease_lost(db, file_uuid, job_uuid)
+        return
+    tracker.update_file_status(file_uuid, "failed", error_message=str(error), commit=False)
+    db.commit()
+
+
+def _lease_lost(db, file_uuid: UUID, job_uuid: UUID | None) -> None:
+    """The job was reclaimed while we ran (lease expired): the new owner's result wins."""
+    db.rollback()
+    logger.warning("file_id=%s job_id=%s lease lost, discarding result", file_uuid, job_uuid)
+
+
+async def _finalize_if_done(db, hf: HFInferenceClient, tracker: JobTracker, inspection_uuid: UUID, file_type: str) -> None:
+    """Check if all files are done → finalize inspection."""
+    counts = tracker.update_inspection_progress(inspection_uuid)
+    if counts is not None:
+        completion = InspectionCompletionService(db, hf)
+        with observe_stage(file_type, "finalize"):
+            await completion.finalize(
+                inspection_uuid,
+                total_files=counts["total"],
+                failed_files=counts["failed"],
+            )
+
+
 async def _process_image(
     hf: HFInferenceClient,
-    finding_repo: FindingRepository,
     file_id: UUID,
-    inspection_id: UUID,
     image_bytes: bytes,
-) -> None:
-    """Image pipeline: Gemini Vision direct analysis → embed → create Finding."""
+    profile: ClassificationProfile = DEFAULT_PROFILE,
+) -> list[dict]:
+    """Image pipeline: Gemini Vision direct analysis → embed → Finding rows."""
     from app.services.gemini_client import GeminiVisionClient
 
     gemini = GeminiVisionClient()
+    try:
+        # 1. Analyze image directly with Gemini Vision
+        try:
+            with observe_stage("image", "analyze"):
+                classification = await gemini.analyze_image(image_bytes, profile)
+        except Exception as exc:
+            classification = exc
+        return await _image_findings(hf, file_id, classification)
+    finally:
+        await gemini.close()
+
+
+async def _image_findings(
+    hf: HFInferenceClient,
+    file_id: UUID,
+    classification: dict | BaseException,
+) -> list[dict]:
+    """Embed a Gemini classification into Finding rows; a failed analysis becomes a needs-review finding."""
     embed_svc = EmbeddingService(hf)
 
     try:
-        # 1. Analyze image directly with Gemini Vision
-        classification = await gemini.analyze_image(image_bytes)
+        if isinstance(classification, BaseException):
+            raise classification
         logger.info("file_id=%s gemini result: %s (%.0f%%)", file_id, classification["category"], classification["confidence"] * 100)
 
         # 2. Generate embedding from the description
         description_text = classification.get("description", classification["category"])
-        embedding = await embed_svc.generate_embedding(description_text)
-
-        # 3. Create Finding
-        finding_repo.create(
-            inspection_id=inspection_id,
-            file_id=file_id,
-            category=classification["category"],
-            severity=classification["severity"],
-            confidence_score=classification["confidence"],
-            needs_review=classification["needs_review"],
-            ai_caption=classification.get("description", ""),
-            description=f"Image classified as {classification['category']} with {classification['confidence']:.0%} confidence.",
-            extra_metadata=classification.get("all_scores", {}),
-            embedding=embedding,
-        )
-        logger.info("file_id=%s finding created: %s (%s)", file_id, classification["category"], classification["severity"])
+        with observe_stage("image", "embed"):
+            embedding = await embed_svc.generate_embedding(description_text)
+
+        # 3. Build Finding
+        return [
+            dict(
+                category=classification["category"],
+                severity=classification["severity"],
+                confidence_score=classification["confidence"],
+                needs_review=classification["needs_review"],
+                ai_caption=classification.get("description", ""),
+                description=f"Image classified as {classification['category']} with {classification['confidence']:.0%} confidence.",
+                extra_metadata=classification.get("all_scores", {}),
+                embedding=embedding,
+            )
+        ]
     except Exception as exc:
         logger.exception("file_id=%s image pipeline failed", file_id)
-        finding_repo.create(
-            inspection_id=inspection_id,
-            file_id=file_id,
-            category="unknown",
-            severity="medium",
-            confidence_score=0.0,
-            needs_review=True,
-            ai_caption=None,
-            description=f"Image analysis failed: {str(exc)[:200]}. Manual review required.",
-            extra_metadata={"pipeline_error": str(exc)},
-            embedding=[0.0] * 384,
-        )
-        logger.info("file_id=%s fallback finding created (needs_review=true)", file_id)
-    finally:
-        await gemini.close()
+        logger.info("file_id=%s using fallback finding (needs_review=true)", file_id)
+        return [
+            dict(
+                category="unknown",
+                severity="medium",
+                confidence_score=0.0,
+                needs_review=True,
+                ai_caption=None,
+                description=f"Image analysis failed: {str(exc)[:200]}. Manual review required.",
+                extra_metadata={"pipeline_error": str(exc)},
+                embedding=[0.0] * 384,
+                # Unversioned, so reprocessing picks failed analyses up again
+                analysis_version=None,
+                embedding_model=None,
+            )
+        ]
 
 
 async def _process_audio(
     hf: HFInferenceClient,
-    finding_repo: FindingRepository,
     file_id: UUID,
-    inspection_id: UUID,
     audio_bytes: bytes,
-) -> None:
-    """Audio pipeline: Whisper transcribe → BART classify → embed → create Finding."""
+    profile: ClassificationProfile = DEFAULT_PROFILE,
+) -> list[dict]:
+    """Audio pipeline: Whisper transcribe → embed → classify → Finding rows."""
     audio_proc = AudioProcessor(hf)
     embed_svc = EmbeddingService(hf)
 
     # 1. Transcribe
-    transcription = await audio_proc.transcribe(audio_bytes)
+    with observe_stage("audio", "transcribe"):
+        transcription = await audio_proc.transcribe(audio_bytes)
     logger.info("file_id=%s transcription: %s", file_id, transcription[:100] if transcription else "(empty)")
 
-    # 2. Classify
-    classification = await audio_proc.classify_transcription(transcription)
+    # 2. Embed
+    with observe_stage("audio", "embed"):
+        embedding = await embed_svc.generate_embedding(transcription)
 
-    # 3. Embed
-    embedding = await embed_svc.generate_embedding(transcription)
+    # 3. Classify from the embedding; BART zero-shot only when ambiguous
+    with observe_stage("audio", "classify"):
+        classification = await text_classifier.classify(
+            hf, transcription, embedding, fallback=audio_proc.classify_transcription, profile=profile
+        )
 
-    # 4. Create Finding
-    finding_repo.create(
-        inspection_id=inspection_id,
-        file_id=file_id,
-        category=classification["category"],
-        severity=classification["severity"],
-        confidence_score=classification["confidence"],
-        needs_review=classification["needs_review"],
-        transcription=transcription,
-        description=f"Audio transcribed and classified as {classification['category']}.",
-        extra_metadata=classification.get("all_scores", {}),
-        embedding=embedding,
-    )
-    logger.info("file_id=%s audio finding created: %s", file_id, classification["category"])
+    # 4. Build Finding
+    logger.info("file_id=%s audio classified: %s", file_id, classification["category"])
+    return [
+        dict(
+            category=classification["category"],
+            severity=classification["severity"],
+            confidence_score=classification["confidence"],
+            needs_review=classification["needs_review"],
+            transcription=transcription,
+            description=f"Audio transcribed and classified as {classification['category']}.",
+            extra_metadata=classification.get("all_scores", {}),
+            embedding=embedding,
+        )
+    ]
 
 
 async def _process_pdf(
     hf: HFInferenceClient,
-    finding_repo: FindingRepository,
     file_id: UUID,
-    inspection_id: UUID,
     pdf_bytes: bytes,
-) -> None:
-    """PDF pipeline: pypdf extract → BART classify → embed → create Finding."""
+    profile: ClassificationProfile = DEFAULT_PROFILE,
+) -> list[dict]:
+    """PDF pipeline: pypdf extract → embed → classify → Finding rows."""
     pdf_proc = PdfProcessor(hf)
     embed_svc = EmbeddingService(hf)
 
     # 1. Extract text
-    text = await pdf_proc.extract_text(pdf_bytes)
+    with observe_stage("pdf", "extract"):
+        text = await pdf_proc.extract_text(pdf_bytes)
     logger.info("file_id=%s extracted %d chars from PDF", file_id, len(text))
 
-    # 2. Classify
-    classification = await pdf_proc.classify_text(text)
-
-    # 3. Embed (use first 2000 chars for embedding)
-    embedding = await embed_svc.generate_embedding(text[:2000])
-
-    # 4. Create Finding
-    finding_repo.create(
-        inspection_id=inspection_id,
-        file_id=file_id,
-        category=classification["category"],
-        severity=classification["severity"],
-        confidence_score=classification["confidence"],
-        needs_review=classification["needs_review"],
-        description=f"PDF analyzed and classified as {classification['category']}.",
-        extra_metadata={
-            "text_length": len(text),
-            "preview": text[:500],
-            **classification.get("all_scores", {}),
-        },
-        embedding=embedding,
-    )
-    logger.info("file_id=%s PDF finding created: %s", file_id, classification["category"])
+    # 2. Embed (use first 2000 chars for embedding)
+    with observe_stage("pdf", "embed"):
+        embedding = await embed_svc.generate_embedding(text[:2000])
+
+    # 3. Classify from the embedding; BART zero-shot only when ambiguous
+    with observe_stage("pdf", "classify"):
+        classification = await text_classifier.classify(
+            hf, text, embedding, fallback=pdf_proc.classify_text, profile=profile
+        )
+
+    # 4. Build Finding
+    logger.info("file_id=%s PDF classified: %s", file_id, classification["category"])
+    return [
+        dict(
+            category=classification["category"],
+            severity=classification["severity"],
+            confidence_score=classification["confidence"],
+            needs_review=classification["needs_review"],
+            description=f"PDF analyzed and classified as {classification['category']}.",
+            extra_metadata={
+                "text_length": len(text),
+                "preview": text[:500],
+                **classification.get("all_scores", {}),
+            },
+            embedding=embedding,
+        )
+    ]
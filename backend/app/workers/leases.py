@@ -0,0 +1,183 @@
+"""
+Job leases: every processing job is owned by one worker process for a limited
+time. The process that registers a job takes its lease and tracks the job
+while it waits in its scheduler or runs; a daemon thread renews the leases
+of tracked jobs only, and sweeps jobs whose lease expired because their
+process died (deploy, OOM, crash) or their task crashed. Swept jobs go back
+to the queue of the sweeping process with their file reset to pending, or
+to the 'dead' state once they have been claimed JOB_MAX_ATTEMPTS times,
+which marks the file failed so the inspection can still finalize.
+"""
+import asyncio
+import logging
+import os
+import socket
+import threading
+import uuid
+from collections import defaultdict
+from uuid import UUID
+
+from app.core.database import SessionLocal
+from app.core.metrics import JOBS_RECLAIMED
+from app.repositories.processing_job_repository import ProcessingJobRepository
+from app.services.hf_client import HFInferenceClient
+from app.services.inspection_completion_service import InspectionCompletionService
+from app.services.job_tracker import JobTracker
+from app.workers.scheduler import job_scheduler
+
+logger = logging.getLogger(__name__)
+
+# Identifies this process as a lease owner
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "120"))
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", str(JOB_LEASE_SECONDS / 4)))
+JOB_SWEEP_SECONDS = float(os.getenv("JOB_SWEEP_SECONDS", "60"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+
+class LeaseKeeper:
+    """Daemon thread renewing this process's job leases and reclaiming expired ones."""
+
+    def __init__(self, owner: str = WORKER_ID):
+        self.owner = owner
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        # Jobs queued in this process's scheduler or in flight
+        self._held: set[str] = set()
+
+    def track(self, job_ids) -> None:
+        """Keep renewing these jobs' leases until they are untracked."""
+        with self._lock:
+            self._held.update(str(job_id) for job_id in job_ids if job_id)
+
+    def untrack(self, job_ids) -> None:
+        with self._lock:
+            self._held.difference_update(str(job_id) for job_id in job_ids if job_id)
+
+    def abandon(self, job_ids) -> None:
+        """
+        Untrack jobs whose task crashed and expire their leases, so the sweeper
+        retries them (or dead-letters them after JOB_MAX_ATTEMPTS).
+        """
+        job_ids = [str(job_id) for job_id in job_ids if job_id]
+        self.untrack(job_ids)
+        if not job_ids:
+            return
+        db = SessionLocal()
+        try:
+            ProcessingJobRepository(db).release_leases(self.owner, job_ids)
+        except Exception:
+            logger.exception("Failed to release leases of crashed job(s) %s", job_ids)
+        finally:
+            db.close()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="job-lease-keeper", daemon=True)
+                self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the thread and expire this process's leases so other workers take the jobs over."""
+        self._stop.set()
+        db = SessionLocal()
+        try:
+            released = ProcessingJobRepository(db).release_leases(self.owner)
+            if released:
+                logger.info("Released %d job lease(s) on shutdown", released)
+        except Exception:
+            logger.exception("Failed to release job leases")
+        finally:
+            db.close()
+
+    def _run(self) -> None:
+        since_sweep = JOB_SWEEP_SECONDS  # sweep once right after startup
+        while not self._stop.wait(0 if since_sweep >= JOB_SWEEP_SECONDS else JOB_HEARTBEAT_SECONDS):
+            try:
+                self.renew()
+                if since_sweep >= JOB_SWEEP_SECONDS:
+                    since_sweep = 0.0
+                    self.sweep()
+                else:
+                    since_sweep += JOB_HEARTBEAT_SECONDS
+            except Exception:
+                logger.exception("Job lease keeper iteration failed")
+
+    def renew(self) -> int:
+        with self._lock:
+            held = list(self._held)
+        if not held:
+            return 0
+        db = SessionLocal()
+        try:
+            return ProcessingJobRepository(db).renew_leases(self.owner, held, JOB_LEASE_SECONDS)
+        finally:
+            db.close()
+
+    def sweep(self) -> int:
+        """Reclaim expired jobs: requeue them here or dead-letter them. Returns the number reclaimed."""
+        from app.services.upload_service import enqueue_jobs
+
+        db = SessionLocal(expire_on_commit=False)
+        try:
+            jobs = ProcessingJobRepository(db).reclaim_expired(
+                self.owner, JOB_LEASE_SECONDS, JOB_MAX_ATTEMPTS, commit=False
+            )
+            if not jobs:
+                db.rollback()
+                return 0
+            tracker = JobTracker(db)
+            requeued = [job for job in jobs if job.status == "queued"]
+            dead = [job for job in jobs if job.status == "dead"]
+            for job in requeued:
+                # A job lost mid-pipeline left its file processing; a lost queued one left it pending
+                tracker.update_file_status(job.file_id, "pending", commit=False)
+            for job in dead:
+                tracker.update_file_status(
+                    job.file_id,
+                    "failed",
+                    error_message=f"Processing abandoned after {job.attempts} attempt(s) (worker lost)",
+                    commit=False,
+                )
+            db.commit()
+            JOBS_RECLAIMED.labels("requeued").inc(len(requeued))
+            JOBS_RECLAIMED.labels("dead").inc(len(dead))
+            logger.warning("Reclaimed %d expired job(s): %d requeued, %d dead", len(jobs), len(requeued), len(dead))
+
+            groups = defaultdict(list)
+            for job in requeued:
+                groups[(job.inspection_id, job.org_id, job.priority)].append((str(job.id), str(job.file_id), job.file_type))
+            for (inspection_id, org_id, priority), dispatch in groups.items():
+                enqueue_jobs(inspection_id, org_id, dispatch, priority=priority)
+
+            # A dead job may have been the inspection's last unfinished file. Finalize on
+            # a scheduler worker: this thread must keep renewing leases meanwhile.
+            for inspection_id, org_id in {(job.inspection_id, job.org_id) for job in dead}:
+                job_scheduler.submit(finalize_if_done_background, str(inspection_id), org_id=str(org_id))
+            return len(jobs)
+        finally:
+            db.close()
+
+
+def finalize_if_done_background(inspection_id: str) -> None:
+    """Scheduler task: finalize the inspection if all its files have finished."""
+    asyncio.run(_finalize_if_done(UUID(inspection_id)))
+
+
+async def _finalize_if_done(inspection_id: UUID) -> None:
+    db = SessionLocal(expire_on_commit=False)
+    hf = HFInferenceClient()
+    try:
+        counts = JobTracker(db).update_inspection_progress(inspection_id)
+        if counts is not None:
+            await InspectionCompletionService(db, hf).finalize(
+                inspection_id, total_files=counts["total"], failed_files=counts["failed"]
+            )
+    finally:
+        await hf.close()
+        db.close()
+
+
+lease_keeper = LeaseKeeper()
@@ -0,0 +1,69 @@
+"""
+Background report export: called by FastAPI BackgroundTasks when an export
+is requested. Renders the report to a temp file and stores it.
+"""
+import asyncio
+import logging
+import os
+import tempfile
+from pathlib import Path
+from uuid import UUID
+
+from app.core.database import SessionLocal
+from app.repositories.inspection_repository import InspectionRepository
+from app.repositories.report_export_repository import ReportExportRepository
+from app.services.report_export import CONTENT_TYPES, export_key, render_report
+from app.services.storage_service import delete_file, store_path
+
+logger = logging.getLogger(__name__)
+
+
+def render_export_background(export_id: str) -> None:
+    """
+    Synchronous entry point for FastAPI BackgroundTasks.
+    Creates its own DB session and renders one export.
+    """
+    asyncio.run(_render_export(UUID(export_id)))
+
+
+async def _render_export(export_id: UUID) -> None:
+    db = SessionLocal(expire_on_commit=False)
+    repo = ReportExportRepository(db)
+    try:
+        # Claim: queued → running. A duplicate or stale task matches no row.
+        export = repo.mark_running(export_id)
+        if export is None:
+            logger.info("export_id=%s not queued, skipping", export_id)
+            return
+
+        fd, tmp_name = tempfile.mkstemp(suffix=f".{export.format}")
+        os.close(fd)
+        path = Path(tmp_name)
+        try:
+            inspection = InspectionRepository(db).get_by_id(export.inspection_id)
+            if inspection is None:
+                raise ValueError("Inspection not found")
+            await render_report(db, inspection, export.format, path)
+            key = export_key(export.org_id, export.inspection_id, export.version, export.format)
+            await store_path(key, path, CONTENT_TYPES[export.format])
+            repo.mark_completed(export_id, key, path.stat().st_size)
+            logger.info(
+                "export_id=%s rendered %s for inspection %s (%d bytes)",
+                export_id, export.format, export.inspection_id, path.stat().st_size,
+            )
+        except Exception as e:
+            db.rollback()
+            logger.exception("Export failed for export_id=%s", export_id)
+            repo.mark_failed(export_id, str(e)[:500])
+            return
+        finally:
+            path.unlink(missing_ok=True)
+
+        # Older versions of this report will never be served again
+        for old_key in repo.delete_superseded(export):
+            try:
+                await delete_file(old_key)
+            except Exception:
+                logger.warning("Failed to delete superseded export %s", old_key)
+    finally:
+        db.close()
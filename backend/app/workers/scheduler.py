@@ -0,0 +1,163 @@
+"""
+In-process scheduler for file processing jobs.
+
+Jobs are submitted with a priority class and an org. Worker threads always
+take from the highest non-empty class ("interactive" uploads before
+"backfill"/reprocess work). Within a class, orgs share the workers by
+weighted fair queuing: each task gets a virtual finish time of
+max(now, org's last finish) + cost / weight, and the task with the smallest
+finish runs next. An org that bulk-uploads thousands of files therefore
+queues behind itself, not in front of everyone else.
+
+Self-clocked: virtual time advances to the finish time of each task taken,
+so an org returning after being idle starts level with the others rather
+than with banked credit.
+"""
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+from app.core.metrics import SCHEDULER_QUEUE_DEPTH, SCHEDULER_WAIT_SECONDS, WORKER_QUEUE_DEPTH
+
+logger = logging.getLogger(__name__)
+
+PRIORITIES = ("interactive", "backfill")
+SCHEDULER_WORKERS = int(os.getenv("SCHEDULER_WORKERS", "8"))
+# Relative shares per org, e.g. "<org uuid>:2,<org uuid>:0.5"; unlisted orgs weigh 1
+SCHEDULER_ORG_WEIGHTS = os.getenv("SCHEDULER_ORG_WEIGHTS", "")
+
+
+def _parse_weights(raw: str) -> dict[str, float]:
+    weights = {}
+    for item in filter(None, (part.strip() for part in raw.split(","))):
+        org_id, _, weight = item.partition(":")
+        try:
+            weights[org_id.strip()] = max(float(weight), 0.01)
+        except ValueError:
+            logger.warning("Ignoring invalid SCHEDULER_ORG_WEIGHTS entry %r", item)
+    return weights
+
+
+@dataclass(order=True)
+class _Task:
+    finish: float
+    seq: int
+    org_id: str = field(compare=False)
+    priority: str = field(compare=False)
+    cost: int = field(compare=False)
+    fn: Callable = field(compare=False)
+    args: tuple = field(compare=False)
+    kwargs: dict = field(compare=False)
+    enqueued_at: float = field(compare=False)
+
+
+class _FairQueue:
+    """One priority class: tasks of all orgs ordered by virtual finish time."""
+
+    def __init__(self):
+        self.heap: list[_Task] = []
+        self.virtual_time = 0.0
+        self.last_finish: dict[str, float] = {}
+
+    def push(self, task: _Task, weight: float) -> None:
+        start = max(self.virtual_time, self.last_finish.get(task.org_id, 0.0))
+        task.finish = start + task.cost / weight
+        self.last_finish[task.org_id] = task.finish
+        heapq.heappush(self.heap, task)
+
+    def pop(self) -> _Task:
+        task = heapq.heappop(self.heap)
+        self.virtual_time = task.finish
+        if not self.heap:
+            # Idle class: forget per-org history so it cannot grow without bound
+            self.last_finish.clear()
+        return task
+
+
+class JobScheduler:
+    """Priority classes with per-org fair queuing, drained by a pool of daemon threads."""
+
+    def __init__(self, workers: int = SCHEDULER_WORKERS, weights: dict[str, float] | None = None):
+        self.workers = workers
+        self.weights = weights if weights is not None else _parse_weights(SCHEDULER_ORG_WEIGHTS)
+        self._queues = {priority: _FairQueue() for priority in PRIORITIES}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._threads: list[threading.Thread] = []
+        self._closed = False
+
+    def submit(
+        self,
+        fn: Callable,
+        *args,
+        org_id: str,
+        priority: str = "interactive",
+        cost: int = 1,
+        **kwargs,
+    ) -> None:
+        """Queue fn(*args, **kwargs). cost is the number of files it processes."""
+        if priority not in self._queues:
+            raise ValueError(f"Unknown priority: {priority}")
+        org_id = str(org_id)
+        task = _Task(0.0, next(self._seq), org_id, priority, cost, fn, args, kwargs, time.monotonic())
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Scheduler is shut down")
+            self._queues[priority].push(task, self.weights.get(org_id, 1.0))
+            self._ensure_started()
+            self._cond.notify()
+        SCHEDULER_QUEUE_DEPTH.labels(priority, org_id).inc(cost)
+        WORKER_QUEUE_DEPTH.inc(cost)
+
+    def queue_depth(self) -> dict[str, int]:
+        """Queued files per priority class."""
+        with self._cond:
+            return {priority: sum(t.cost for t in queue.heap) for priority, queue in self._queues.items()}
+
+    def shutdown(self) -> None:
+        """Stop taking tasks. Queued tasks are dropped; their jobs stay queued in the database for a sweeper to reclaim."""
+        with self._cond:
+            self._closed = True
+            dropped = sum(len(queue.heap) for queue in self._queues.values())
+            self._cond.notify_all()
+        if dropped:
+            logger.warning("Scheduler shut down with %d queued task(s)", dropped)
+
+    def _ensure_started(self) -> None:
+        # Called with self._cond held
+        self._threads = [t for t in self._threads if t.is_alive()]
+        for i in range(len(self._threads), self.workers):
+            thread = threading.Thread(target=self._run, name=f"job-scheduler-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _next(self) -> _Task | None:
+        with self._cond:
+            while True:
+                if self._closed:
+                    return None
+                for priority in PRIORITIES:
+                    if self._queues[priority].heap:
+                        return self._queues[priority].pop()
+                self._cond.wait()
+
+    def _run(self) -> None:
+        while True:
+            task = self._next()
+            if task is None:
+                return
+            SCHEDULER_QUEUE_DEPTH.labels(task.priority, task.org_id).dec(task.cost)
+            WORKER_QUEUE_DEPTH.dec(task.cost)
+            SCHEDULER_WAIT_SECONDS.labels(task.priority, task.org_id).observe(time.monotonic() - task.enqueued_at)
+            try:
+                task.fn(*task.args, **task.kwargs)
+            except Exception:
+                logger.exception("Scheduled task %s failed", getattr(task.fn, "__name__", task.fn))
+
+
+job_scheduler = JobScheduler()
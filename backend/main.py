@@ -1,7 +1,15 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
-from app.api.routes import files, findings, inspections, organizations
+from app.api.routes import exports, files, findings, inspections, organizations, uploads
+from app.core.metrics import MetricsMiddleware
+from app.core.profiling import PROFILING_ENABLED, ProfilingMiddleware
+from app.services.inspection_events import event_broker
+from app.services.usage_logger import usage_log_writer
+from app.workers.cleanup import janitor
+from app.workers.leases import lease_keeper
+from app.workers.scheduler import job_scheduler
 
 app = FastAPI(title="AuditPilot API")
 
@@ -12,13 +20,51 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
 
+app.include_router(exports.router)
 app.include_router(files.router)
 app.include_router(findings.router)
 app.include_router(inspections.router)
 app.include_router(organizations.router)
+app.include_router(uploads.router)
 
 
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.on_event("startup")
+def start_lease_keeper():
+    lease_keeper.start()
+
+
+@app.on_event("startup")
+def start_janitor():
+    janitor.start()
+
+
+@app.on_event("shutdown")
+def flush_usage_logs():
+    usage_log_writer.flush()
+
+
+@app.on_event("shutdown")
+def close_event_listener():
+    event_broker.close()
+
+
+@app.on_event("shutdown")
+def stop_job_scheduler():
+    job_scheduler.shutdown()
+    # Dropped and running jobs go to the other workers' sweepers right away
+    lease_keeper.stop()
+    janitor.stop()
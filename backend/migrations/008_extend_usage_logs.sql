@@ -0,0 +1,8 @@
+-- Per-attempt model call telemetry (written in batches by the usage log writer)
+ALTER TABLE usage_logs ADD COLUMN IF NOT EXISTS bytes_sent INTEGER;
+ALTER TABLE usage_logs ADD COLUMN IF NOT EXISTS bytes_received INTEGER;
+ALTER TABLE usage_logs ADD COLUMN IF NOT EXISTS status TEXT;
+ALTER TABLE usage_logs ADD COLUMN IF NOT EXISTS http_status INTEGER;
+ALTER TABLE usage_logs ADD COLUMN IF NOT EXISTS retry_count INTEGER DEFAULT 0;
+
+CREATE INDEX IF NOT EXISTS idx_usage_logs_file_id ON usage_logs(file_id);
@@ -0,0 +1,15 @@
+-- Create processing_jobs table (one row per file queued for ML processing)
+CREATE TABLE IF NOT EXISTS processing_jobs (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    file_id UUID REFERENCES files(id) ON DELETE CASCADE,
+    inspection_id UUID REFERENCES inspections(id) ON DELETE CASCADE,
+    file_type TEXT NOT NULL,
+    status TEXT DEFAULT 'queued' CHECK (status IN ('queued', 'running', 'completed', 'failed')),
+    created_at TIMESTAMP DEFAULT NOW(),
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_processing_jobs_file_id ON processing_jobs(file_id);
+CREATE INDEX IF NOT EXISTS idx_processing_jobs_inspection_id ON processing_jobs(inspection_id);
+CREATE INDEX IF NOT EXISTS idx_processing_jobs_status ON processing_jobs(status);
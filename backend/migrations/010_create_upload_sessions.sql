@@ -0,0 +1,18 @@
+-- Create upload_sessions table for resumable chunked uploads
+CREATE TABLE IF NOT EXISTS upload_sessions (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    org_id UUID REFERENCES organizations(id) ON DELETE CASCADE,
+    inspection_id UUID REFERENCES inspections(id) ON DELETE CASCADE,
+    file_name TEXT NOT NULL,
+    file_type TEXT NOT NULL,
+    mime_type TEXT,
+    total_size BIGINT NOT NULL,
+    received_ranges JSONB DEFAULT '[]'::jsonb,
+    status TEXT DEFAULT 'active' CHECK (status IN ('active', 'completed', 'aborted')),
+    file_id UUID REFERENCES files(id) ON DELETE SET NULL,
+    created_at TIMESTAMP DEFAULT NOW(),
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_upload_sessions_inspection_id ON upload_sessions(inspection_id);
+CREATE INDEX IF NOT EXISTS idx_upload_sessions_status ON upload_sessions(status);
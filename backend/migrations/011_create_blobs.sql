@@ -0,0 +1,14 @@
+-- Content-addressed blob store: one stored object per distinct file content
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256 TEXT PRIMARY KEY,
+    storage_key TEXT NOT NULL,
+    size BIGINT NOT NULL,
+    mime_type TEXT,
+    ref_count INTEGER NOT NULL DEFAULT 1 CHECK (ref_count >= 0),
+    created_at TIMESTAMP DEFAULT NOW()
+);
+
+-- Files point at their shared blob; NULL for objects stored outside the blob store
+ALTER TABLE files ADD COLUMN IF NOT EXISTS content_sha256 TEXT REFERENCES blobs(sha256);
+
+CREATE INDEX IF NOT EXISTS idx_files_content_sha256 ON files(content_sha256);
@@ -0,0 +1,7 @@
+-- Cache of summarization results keyed by a hash of model, parameters and input text
+CREATE TABLE IF NOT EXISTS narrative_summaries (
+    content_hash TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT NOW()
+);
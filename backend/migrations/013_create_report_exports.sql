@@ -0,0 +1,17 @@
+-- Create report_exports table: rendered inspection reports cached in storage by content version
+CREATE TABLE IF NOT EXISTS report_exports (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    inspection_id UUID REFERENCES inspections(id) ON DELETE CASCADE,
+    org_id UUID REFERENCES organizations(id) ON DELETE CASCADE,
+    format TEXT NOT NULL CHECK (format IN ('pdf', 'csv', 'jsonl')),
+    version TEXT NOT NULL,
+    status TEXT DEFAULT 'queued' CHECK (status IN ('queued', 'running', 'completed', 'failed')),
+    storage_key TEXT,
+    file_size BIGINT,
+    error_message TEXT,
+    created_at TIMESTAMP DEFAULT NOW(),
+    completed_at TIMESTAMP,
+    UNIQUE (inspection_id, format, version)
+);
+
+CREATE INDEX IF NOT EXISTS idx_report_exports_inspection_id ON report_exports(inspection_id);
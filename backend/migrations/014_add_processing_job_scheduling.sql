@@ -0,0 +1,11 @@
+-- Scheduling fields on processing jobs: priority class and owning org
+ALTER TABLE processing_jobs ADD COLUMN IF NOT EXISTS priority TEXT NOT NULL DEFAULT 'interactive'
+    CHECK (priority IN ('interactive', 'backfill'));
+ALTER TABLE processing_jobs ADD COLUMN IF NOT EXISTS org_id UUID REFERENCES organizations(id) ON DELETE CASCADE;
+
+UPDATE processing_jobs j
+SET org_id = i.org_id
+FROM inspections i
+WHERE j.inspection_id = i.id AND j.org_id IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_processing_jobs_org_status ON processing_jobs(org_id, status);
@@ -0,0 +1,3 @@
+-- Which pipeline and embedding model produced each finding (NULL: before tracking)
+ALTER TABLE findings ADD COLUMN IF NOT EXISTS analysis_version TEXT;
+ALTER TABLE findings ADD COLUMN IF NOT EXISTS embedding_model TEXT;
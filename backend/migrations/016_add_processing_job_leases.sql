@@ -0,0 +1,26 @@
+-- Leases on processing jobs: the owning worker renews lease_expires_at while the
+-- job is queued in its scheduler or running; expired jobs are reclaimed
+ALTER TABLE processing_jobs ADD COLUMN IF NOT EXISTS lease_owner TEXT;
+ALTER TABLE processing_jobs ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMPTZ;
+ALTER TABLE processing_jobs ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0;
+
+-- 'dead': given up on after too many lost attempts. Swapped only while the check
+-- lacks it: re-adding it locks and scans the whole table on every deploy
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conrelid = 'processing_jobs'::regclass
+          AND conname = 'processing_jobs_status_check'
+          AND pg_get_constraintdef(oid) LIKE '%dead%'
+    ) THEN
+        ALTER TABLE processing_jobs DROP CONSTRAINT IF EXISTS processing_jobs_status_check;
+        ALTER TABLE processing_jobs ADD CONSTRAINT processing_jobs_status_check
+            CHECK (status IN ('queued', 'running', 'completed', 'failed', 'dead'));
+    END IF;
+END $$;
+
+CREATE INDEX IF NOT EXISTS idx_processing_jobs_lease
+    ON processing_jobs(lease_expires_at) WHERE status IN ('queued', 'running');
+CREATE INDEX IF NOT EXISTS idx_processing_jobs_lease_owner
+    ON processing_jobs(lease_owner) WHERE status IN ('queued', 'running');
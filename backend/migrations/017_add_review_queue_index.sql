@@ -0,0 +1,3 @@
+-- Placeholder that keeps the numbering contiguous. The review queue's keyset index is
+-- org-scoped and is created with findings.org_id in 018 (idx_findings_org_review_queue).
+SELECT 1;
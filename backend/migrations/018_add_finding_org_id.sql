@@ -0,0 +1,55 @@
+-- Denormalized owning org on findings, so org-scoped queries skip the join to inspections
+ALTER TABLE findings ADD COLUMN IF NOT EXISTS org_id UUID REFERENCES organizations(id) ON DELETE CASCADE;
+
+-- Statistics for the new column are refreshed only when the backfill changed rows,
+-- not on every deploy
+DO $$
+DECLARE
+    backfilled BIGINT;
+BEGIN
+    UPDATE findings f
+    SET org_id = i.org_id
+    FROM inspections i
+    WHERE f.inspection_id = i.id AND f.org_id IS DISTINCT FROM i.org_id;
+    GET DIAGNOSTICS backfilled = ROW_COUNT;
+    IF backfilled > 0 THEN
+        ANALYZE findings;
+    END IF;
+END $$;
+
+-- Kept consistent by the database: copied from the inspection on insert (or when a
+-- finding moves inspection) and propagated if an inspection changes org
+CREATE OR REPLACE FUNCTION findings_set_org_id() RETURNS trigger AS $$
+BEGIN
+    SELECT org_id INTO NEW.org_id FROM inspections WHERE id = NEW.inspection_id;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_findings_set_org_id ON findings;
+CREATE TRIGGER trg_findings_set_org_id
+    BEFORE INSERT OR UPDATE OF inspection_id, org_id ON findings
+    FOR EACH ROW EXECUTE FUNCTION findings_set_org_id();
+
+CREATE OR REPLACE FUNCTION inspections_propagate_org_id() RETURNS trigger AS $$
+BEGIN
+    UPDATE findings SET org_id = NEW.org_id WHERE inspection_id = NEW.id;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_inspections_propagate_org_id ON inspections;
+CREATE TRIGGER trg_inspections_propagate_org_id
+    AFTER UPDATE OF org_id ON inspections
+    FOR EACH ROW WHEN (OLD.org_id IS DISTINCT FROM NEW.org_id)
+    EXECUTE FUNCTION inspections_propagate_org_id();
+
+-- Review queue per org, newest first (keyset on created_at, id)
+CREATE INDEX IF NOT EXISTS idx_findings_org_review_queue
+    ON findings (org_id, created_at DESC, id DESC)
+    WHERE needs_review;
+
+-- Per-category counts and category-filtered exports of one org
+CREATE INDEX IF NOT EXISTS idx_findings_org_category ON findings (org_id, category);
+-- Org-wide exports and time-windowed selections, oldest first
+CREATE INDEX IF NOT EXISTS idx_findings_org_created_at ON findings (org_id, created_at, id);
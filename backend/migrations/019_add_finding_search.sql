@@ -0,0 +1,13 @@
+-- Full-text search over findings: captions weigh most, then descriptions, then transcriptions.
+-- Adding a stored generated column rewrites the table; run it in a quiet window on large orgs.
+CREATE EXTENSION IF NOT EXISTS btree_gin;
+
+ALTER TABLE findings ADD COLUMN IF NOT EXISTS search_vector TSVECTOR
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(ai_caption, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(description, '')), 'B')
+        || setweight(to_tsvector('english', coalesce(transcription, '')), 'C')
+    ) STORED;
+
+-- btree_gin lets one GIN index serve both the org filter and the text match
+CREATE INDEX IF NOT EXISTS idx_findings_org_search ON findings USING gin (org_id, search_vector);
@@ -0,0 +1,19 @@
+-- Every deleted file drops its blob reference in the deleting transaction, whether the
+-- file is deleted directly or cascaded from its inspection or organization. Blobs left
+-- at ref_count 0 are collected after commit by the cleanup worker, which deletes the
+-- row first (failing on the FK if a file still points at it) and then the object.
+CREATE OR REPLACE FUNCTION files_release_blob() RETURNS trigger AS $$
+BEGIN
+    IF OLD.content_sha256 IS NOT NULL THEN
+        UPDATE blobs SET ref_count = ref_count - 1 WHERE sha256 = OLD.content_sha256;
+    END IF;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_files_release_blob ON files;
+CREATE TRIGGER trg_files_release_blob
+    AFTER DELETE ON files
+    FOR EACH ROW EXECUTE FUNCTION files_release_blob();
+
+CREATE INDEX IF NOT EXISTS idx_blobs_unreferenced ON blobs (sha256) WHERE ref_count = 0;
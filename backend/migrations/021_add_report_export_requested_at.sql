@@ -0,0 +1,5 @@
+-- When an export's version was last requested as the inspection's current state; orders
+-- versions (which are content hashes) so a late render never removes a newer export
+ALTER TABLE report_exports ADD COLUMN IF NOT EXISTS requested_at TIMESTAMP DEFAULT NOW();
+
+CREATE INDEX IF NOT EXISTS idx_report_exports_requested ON report_exports (inspection_id, format, requested_at);
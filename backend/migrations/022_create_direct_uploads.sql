@@ -0,0 +1,17 @@
+-- Storage keys issued by /files/presign. Registration only accepts keys found here,
+-- and records the file it created so registering a key again returns that file.
+-- Keys not registered by expires_at are swept together with any uploaded object.
+CREATE TABLE IF NOT EXISTS direct_uploads (
+    storage_key TEXT PRIMARY KEY,
+    org_id UUID NOT NULL REFERENCES organizations(id) ON DELETE CASCADE,
+    inspection_id UUID NOT NULL REFERENCES inspections(id) ON DELETE CASCADE,
+    file_name TEXT NOT NULL,
+    mime_type TEXT,
+    file_id UUID REFERENCES files(id) ON DELETE CASCADE,
+    expires_at TIMESTAMPTZ NOT NULL,
+    created_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_direct_uploads_pending_expires_at
+    ON direct_uploads (expires_at)
+    WHERE file_id IS NULL;
@@ -0,0 +1,11 @@
+-- Resumable upload sessions expire after a period without chunks; the cleanup worker
+-- deletes expired sessions together with their partial files
+ALTER TABLE upload_sessions ADD COLUMN IF NOT EXISTS expires_at TIMESTAMPTZ;
+
+UPDATE upload_sessions
+SET expires_at = COALESCE(updated_at, created_at, NOW()) + INTERVAL '1 day'
+WHERE expires_at IS NULL;
+
+ALTER TABLE upload_sessions ALTER COLUMN expires_at SET NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_upload_sessions_expires_at ON upload_sessions(expires_at);
@@ -0,0 +1,43 @@
+import json
+
+from app.services.gemini_client import _parse_batch_response
+
+
+def _entry(index, category="mold", confidence=0.9):
+    return {"index": index, "category": category, "confidence": confidence, "severity": "high", "description": ""}
+
+
+def test_each_index_gets_its_own_classification():
+    text = json.dumps([_entry(1, "rust"), _entry(0, "mold")])
+
+    results = _parse_batch_response(text, 2)
+
+    assert [r["category"] for r in results] == ["mold", "rust"]
+
+
+def test_missing_duplicate_and_out_of_range_entries_are_none():
+    text = json.dumps([
+        _entry(0, "mold"),
+        _entry(1, "rust"),
+        _entry(1, "water damage"),
+        _entry(3, "crack"),
+        _entry(-1, "crack"),
+        _entry(True, "crack"),
+    ])
+
+    results = _parse_batch_response(text, 3)
+
+    assert results[0]["category"] == "mold"
+    assert results[1] is None  # answered twice
+    assert results[2] is None  # not answered; index 3 is out of range
+
+
+def test_duplicate_after_malformed_entry_is_none():
+    text = json.dumps([_entry(0, confidence="high"), _entry(0, "mold")])
+
+    assert _parse_batch_response(text, 1) == [None]
+
+
+def test_unparseable_response_is_all_none():
+    assert _parse_batch_response("not json", 2) == [None, None]
+    assert _parse_batch_response(json.dumps({"index": 0}), 1) == [None]
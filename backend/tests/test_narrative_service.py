@@ -0,0 +1,70 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+from app.services import narrative_service
+from app.services.narrative_service import CHUNK_CHARS, NarrativeService
+
+
+class FakeHF:
+    def __init__(self, summary_chars: int):
+        self.summary_chars = summary_chars
+        self.calls = 0
+
+    async def inference_json(self, model, payload, task="inference"):
+        self.calls += 1
+        return [{"summary_text": "s" * self.summary_chars}]
+
+
+class FakeCache:
+    def get_many(self, content_hashes):
+        return {}
+
+    def put_many(self, model, summaries, commit=True):
+        pass
+
+
+def _service(hf):
+    service = NarrativeService(db=None, hf=hf)
+    service.cache = FakeCache()
+    return service
+
+
+def _findings(count: int, chars: int):
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [
+        SimpleNamespace(
+            id=uuid4(),
+            category="water damage",
+            severity="high",
+            ai_caption=str(i) * chars,
+            transcription=None,
+            description=None,
+            created_at=start + timedelta(minutes=i),
+        )
+        for i in range(count)
+    ]
+
+
+def test_oversized_summaries_do_not_loop_forever():
+    # Every summary is longer than half a chunk, so two never fit together
+    hf = FakeHF(summary_chars=CHUNK_CHARS // 2 + 100)
+    inspection = SimpleNamespace(name="Warehouse", site_location="Dock 4")
+
+    narrative = asyncio.run(asyncio.wait_for(_service(hf).generate(_findings(6, 1400), inspection), timeout=5))
+
+    assert narrative
+    # One round of group chunks, the joined fallback, then the final merge
+    assert hf.calls <= 3 + 1 + narrative_service.MAX_REDUCE_ROUNDS
+
+
+def test_group_summaries_reduce_to_one():
+    hf = FakeHF(summary_chars=200)
+    inspection = SimpleNamespace(name="Warehouse", site_location="Dock 4")
+
+    narrative = asyncio.run(_service(hf).generate(_findings(6, 1400), inspection))
+
+    # Short enough that the final merge keeps the section text as it is
+    assert narrative.endswith("Water damage (high, 6 findings): " + "s" * 200)
+    assert hf.calls == 4
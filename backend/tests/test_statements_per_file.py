@@ -0,0 +1,104 @@
+"""
+Statement budget of one processed file. Needs a migrated Postgres at DATABASE_URL;
+skipped when none is reachable. Model calls and storage are stubbed.
+"""
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import delete, select
+from sqlalchemy.exc import OperationalError
+
+from app.core.database import SessionLocal, engine
+from app.core.metrics import count_statements
+from app.models.file import File
+from app.models.inspection import Inspection
+from app.models.organization import Organization
+from app.models.processing_job import ProcessingJob
+from app.services.org_profiles import org_profiles
+from app.workers import file_processor
+from app.workers.leases import WORKER_ID
+
+
+def _database_available() -> bool:
+    try:
+        with engine.connect():
+            return True
+    except OperationalError:
+        return False
+
+
+pytestmark = pytest.mark.skipif(not _database_available(), reason="needs a migrated Postgres at DATABASE_URL")
+
+
+@pytest.fixture
+def pending_file():
+    """An org with an inspection of two pending audio files; the first one has a job leased here."""
+    db = SessionLocal(expire_on_commit=False)
+    org = Organization(name="Statement budget", slug=f"statements-{uuid.uuid4().hex[:8]}")
+    db.add(org)
+    db.flush()
+    inspection = Inspection(org_id=org.id, name="Statement budget")
+    db.add(inspection)
+    db.flush()
+    files = [
+        File(
+            inspection_id=inspection.id,
+            file_type="audio",
+            file_name=f"note-{i}.m4a",
+            storage_url=f"local://note-{i}.m4a",
+            storage_key=f"note-{i}.m4a",
+        )
+        for i in range(2)
+    ]
+    db.add_all(files)
+    db.flush()
+    job = ProcessingJob(
+        file_id=files[0].id,
+        inspection_id=inspection.id,
+        org_id=org.id,
+        file_type="audio",
+        lease_owner=WORKER_ID,
+        lease_expires_at=datetime.now(timezone.utc) + timedelta(minutes=5),
+    )
+    db.add(job)
+    db.commit()
+    try:
+        yield org, inspection, files[0], job
+    finally:
+        db.execute(delete(Organization).where(Organization.id == org.id))
+        db.commit()
+        db.close()
+
+
+def test_processed_file_statement_count(pending_file, monkeypatch):
+    org, inspection, f, job = pending_file
+
+    async def fake_download(storage_key):
+        return b"audio"
+
+    async def fake_analyze(hf, file_id, file_type, data, profile):
+        return [dict(category="water damage", severity="high", confidence_score=0.9, transcription="Leak by the pump.")]
+
+    monkeypatch.setattr(file_processor, "download_file", fake_download)
+    monkeypatch.setattr(file_processor, "analyze_file", fake_analyze)
+    org_profiles.invalidate(org.id)
+
+    db = SessionLocal(expire_on_commit=False)
+    try:
+        with count_statements() as statements:
+            asyncio.run(
+                file_processor._run_pipeline(
+                    db, None, str(f.id), "audio", str(inspection.id), str(job.id), str(org.id)
+                )
+            )
+        status = db.scalar(select(File.status).where(File.id == f.id))
+    finally:
+        db.close()
+
+    assert status == "completed"
+    # claim: job UPDATE, file UPDATE, NOTIFY; org profile SELECT;
+    # persist: findings INSERT, NOTIFY, job UPDATE, file UPDATE, NOTIFY;
+    # progress: status counts SELECT (the second file is still pending, so no finalize)
+    assert statements.count == 10
@@ -0,0 +1,43 @@
+from sqlalchemy.exc import OperationalError
+
+from app.services import usage_logger
+from app.services.usage_logger import UsageLogWriter
+
+
+class FailingSession:
+    def execute(self, *args, **kwargs):
+        raise OperationalError("INSERT", {}, Exception("connection refused"))
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def _record(writer, model_name):
+    writer._buffer.append({"model_name": model_name})
+
+
+def test_failed_flush_keeps_records_ahead_of_newer_ones(monkeypatch):
+    monkeypatch.setattr(usage_logger, "SessionLocal", FailingSession)
+    writer = UsageLogWriter()
+    _record(writer, "a")
+    _record(writer, "b")
+
+    assert writer.flush() == 0
+    _record(writer, "c")
+
+    assert [row["model_name"] for row in writer._buffer] == ["a", "b", "c"]
+
+
+def test_requeue_drops_oldest_past_max_buffer(monkeypatch):
+    monkeypatch.setattr(usage_logger, "SessionLocal", FailingSession)
+    monkeypatch.setattr(usage_logger, "USAGE_LOG_MAX_BUFFER", 3)
+    writer = UsageLogWriter()
+    for name in "abcd":
+        _record(writer, name)
+
+    writer.flush()
+
+    assert [row["model_name"] for row in writer._buffer] == ["b", "c", "d"]
@@ -15,7 +15,7 @@ export function ReviewQueue() {
 
     useEffect(() => {
         api.getReviewQueue()
-            .then(setFindings)
+            .then((page) => setFindings(page.items))
             .catch(console.error)
             .finally(() => setLoading(false));
     }, []);
@@ -175,8 +175,12 @@ export const api = {
     return res.json();
   },
 
-  async getReviewQueue(): Promise<(Finding & { inspection: { id: string; name: string } })[]> {
-    const res = await fetch(`${API_URL}/findings/review-queue`, { headers: await headers() });
+  async getReviewQueue(cursor?: string): Promise<{
+    items: (Finding & { inspection: { id: string; name: string } })[];
+    next_cursor: string | null;
+  }> {
+    const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : "";
+    const res = await fetch(`${API_URL}/findings/review-queue${query}`, { headers: await headers() });
     if (!res.ok) {
       const text = await res.text();
       try { throw new Error(JSON.parse(text).detail || text); } catch { throw new Error(text); }